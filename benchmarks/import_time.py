@@ -0,0 +1,79 @@
+""" Import-time budget of imputetspy.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. For each scenario the median wall time over `--repeat` runs is
+compared with its budget (in milliseconds), and the modules that must stay
+unloaded are checked. The script exits with status 1 if any budget is
+exceeded, so it can gate a CI job:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 21 --scale 1.5
+
+`python -X importtime -c "import imputetspy"` gives the per-module detail
+when a budget regresses.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# name: (statement, budget in ms, modules that must not be imported)
+SCENARIOS = {
+    "python": ("pass", None, ()),
+    "import imputetspy": ("import imputetspy", 60, ("numpy", "pandas", "scipy")),
+    "locf": ("import imputetspy; imputetspy.locf([1.0, float('nan'), 3.0])", 250, ("pandas", "scipy")),
+    "na_ma": ("import imputetspy; imputetspy.na_ma([1.0, float('nan'), 3.0])", 250, ("pandas", "scipy")),
+}
+
+PROBE = """
+import sys, time
+t = time.perf_counter()
+%s
+t = time.perf_counter() - t
+print(repr((t, sorted(m for m in %r if m in sys.modules))))
+"""
+
+
+def measure(statement, forbidden, repeat):
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    times, loaded = [], []
+    for _ in range(repeat) :
+        res = subprocess.run([sys.executable, "-c", PROBE % (statement, tuple(forbidden))],
+                             env = env, capture_output = True, text = True, check = True)
+        t, loaded = eval(res.stdout.strip().splitlines()[-1])
+        times.append(t * 1000)
+    times.sort()
+    return times[len(times) // 2], loaded
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--repeat", type = int, default = 9, help = "runs per scenario (median is reported)")
+    parser.add_argument("--scale", type = float, default = 1.0, help = "multiply every budget, for slow machines")
+    parser.add_argument("--json", help = "write the results to this file")
+    args = parser.parse_args(argv)
+
+    results, failed = {}, False
+    for name, (statement, budget, forbidden) in SCENARIOS.items() :
+        ms, loaded = measure(statement, forbidden, args.repeat)
+        ok = not loaded
+        if budget is not None :
+            budget = budget * args.scale
+            ok = ok and ms <= budget
+        failed = failed or not ok
+        results[name] = {"ms": round(ms, 2), "budget_ms": budget, "forbidden_loaded": loaded, "ok": ok}
+        print("%-20s %8.1f ms  budget %-8s %s%s" % (
+            name, ms, "-" if budget is None else "%.0f" % budget,
+            "ok" if ok else "FAIL", "  loaded: " + ", ".join(loaded) if loaded else ""))
+
+    if args.json :
+        with open(args.json, "w") as f :
+            json.dump(results, f, indent = 2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
@@ -0,0 +1,205 @@
+""" Benchmark suite of the imputetspy imputers.
+
+Every imputer of `imputetspy.main` and `na_kalman` is timed on synthetic
+random-walk series of growing length, with three gap structures, and on the
+bundled datasets:
+
+    random    independent missing values (missing rate `--rate`)
+    bursty    short gaps with geometric lengths (mean 5)
+    outage    a few long outages covering the same missing rate
+
+The gap generators are those of `imputetspy.evaluate`.
+
+Every method is called once on a small series before it is timed, so that
+lazy imports and numba compilation are not counted in its first case. For
+each case the best wall time over `--repeat` runs, the peak memory
+traced by tracemalloc during one extra run, and the throughput in points per
+second are reported. tracemalloc slows pure Python loops down by an order of
+magnitude, so cases slower than `--trace-limit` seconds are not traced. Results can be saved as JSON and compared with a saved
+baseline; the script exits with status 1 when a case is slower than the
+baseline by more than `--threshold`.
+
+    python benchmarks/suite.py --sizes 1e3 1e4 1e5 1e6 --json baseline.json
+    python benchmarks/suite.py --sizes 1e3 1e4 1e5 1e6 --compare baseline.json
+    python benchmarks/suite.py --methods locf na_ma --sizes 1e8 --repeat 1
+
+Larger sizes of a method and pattern are skipped once a run exceeds
+`--time-limit` seconds, so quadratic cliffs do not stall the suite.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import imputetspy
+from imputetspy import datasets
+from imputetspy.evaluate import PATTERNS
+
+METHODS = {
+    "na_ma": lambda x: imputetspy.na_ma(x, k = 4),
+    "na_mean": lambda x: imputetspy.na_mean(x),
+    "na_random": lambda x: imputetspy.na_random(x),
+    "na_interpolate": lambda x: imputetspy.na_interpolate(x, option = "linear"),
+    "locf": lambda x: imputetspy.locf(x),
+    "nocb": lambda x: imputetspy.nocb(x),
+    "na_kalman": lambda x: imputetspy.na_kalman(x),
+}
+
+
+def synthetic(n, pattern, rate, seed):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.standard_normal(n))
+    mask = PATTERNS[pattern](n, rate, rng)
+    # keep both ends observed, every imputer is defined there
+    mask[0] = mask[-1] = False
+    x[mask] = np.nan
+    return x
+
+
+def bundled():
+    return {
+        "ts_nh4": np.array(datasets.ts_nh4()),
+        "ts_heating": np.array(datasets.ts_heating()),
+        "ts_airgap": datasets.ts_airgap()["number_of_passengers"].to_numpy(dtype = float),
+    }
+
+
+def run_case(fn, x, repeat, trace_limit = 2.0):
+    times = []
+    for _ in range(repeat) :
+        t = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - t)
+    best = min(times)
+    peak = None
+    if best <= trace_limit :
+        tracemalloc.start()
+        fn(x)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return {"n": int(x.shape[0]), "missing": int(np.isnan(x).sum()), "seconds": best,
+            "peak_mb": peak, "points_per_s": x.shape[0] / best if best > 0 else None}
+
+
+def warm_up(methods, rate, seed):
+    x = synthetic(1000, "random", rate, seed)
+    for m in methods :
+        try :
+            METHODS[m](x)
+        except Exception :
+            # reported by the timed cases
+            pass
+
+
+def run(methods, sizes, patterns, rate, repeat, time_limit, seed, with_datasets = True, trace_limit = 2.0):
+    warm_up(methods, rate, seed)
+    results = []
+    series = []
+    if with_datasets :
+        series += [(name, None, x) for name, x in bundled().items()]
+    for pattern in patterns :
+        for n in sizes :
+            series.append((pattern, n, None))
+
+    slow = set()
+    for name, n, x in series :
+        if x is None :
+            if any((m, name) not in slow for m in methods) :
+                x = synthetic(n, name, rate, seed)
+            else :
+                continue
+        for m in methods :
+            if (m, name) in slow :
+                print("%-15s %-11s %11d  skipped (time limit)" % (m, name, x.shape[0]))
+                continue
+            try :
+                res = run_case(METHODS[m], x, repeat, trace_limit)
+            except Exception as e :
+                res = {"n": int(x.shape[0]), "error": "%s: %s" % (type(e).__name__, e)}
+            res.update(method = m, series = name)
+            results.append(res)
+            report(res)
+            if n is not None and res.get("seconds", 0) > time_limit :
+                slow.add((m, name))
+        del x
+    return results
+
+
+def key(res):
+    return "%s/%s/%d" % (res["method"], res["series"], res["n"])
+
+
+def report(res, base = None):
+    if "error" in res :
+        print("%-15s %-11s %11d  %s" % (res["method"], res["series"], res["n"], res["error"]))
+        return
+    peak = "-" if res["peak_mb"] is None else "%.1f" % res["peak_mb"]
+    line = "%-15s %-11s %11d %10.4f s %9s MB %12.3g pts/s" % (
+        res["method"], res["series"], res["n"], res["seconds"], peak, res["points_per_s"] or 0)
+    if base is not None :
+        line += "  x%.2f" % (res["seconds"] / base["seconds"])
+    print(line)
+
+
+def compare(results, baseline, threshold):
+    base = {key(r): r for r in baseline["results"] if "error" not in r}
+    regressions = []
+    print("\nratio to baseline (time / baseline time):")
+    for res in results :
+        b = base.get(key(res))
+        if (b is None) or ("error" in res) :
+            continue
+        report(res, b)
+        # sub-millisecond cases are dominated by timer noise
+        if (res["seconds"] > threshold * b["seconds"]) and (res["seconds"] > 1e-3) :
+            regressions.append(key(res))
+    if regressions :
+        print("\nslower than baseline by more than x%.2f: %s" % (threshold, ", ".join(regressions)))
+    return regressions
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs = "+", default = list(METHODS), choices = list(METHODS))
+    parser.add_argument("--sizes", nargs = "+", type = float, default = [1e3, 1e4, 1e5, 1e6],
+                        help = "synthetic series lengths, up to 1e8")
+    parser.add_argument("--patterns", nargs = "+", default = list(PATTERNS), choices = list(PATTERNS))
+    parser.add_argument("--rate", type = float, default = 0.1, help = "missing rate of the synthetic series")
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--time-limit", type = float, default = 10.0,
+                        help = "skip larger sizes once a run takes longer (seconds)")
+    parser.add_argument("--trace-limit", type = float, default = 2.0,
+                        help = "do not trace the memory of cases slower than this (seconds)")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--no-datasets", action = "store_true", help = "skip the bundled datasets")
+    parser.add_argument("--json", help = "write the results to this file")
+    parser.add_argument("--compare", help = "baseline JSON file written by --json")
+    parser.add_argument("--threshold", type = float, default = 1.25,
+                        help = "time ratio above which a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.methods, [int(s) for s in args.sizes], args.patterns, args.rate,
+                  args.repeat, args.time_limit, args.seed, not args.no_datasets, args.trace_limit)
+
+    if args.json :
+        meta = {"python": platform.python_version(), "numpy": np.__version__,
+                "imputetspy": imputetspy.__version__, "machine": platform.machine(),
+                "rate": args.rate, "seed": args.seed, "repeat": args.repeat}
+        with open(args.json, "w") as f :
+            json.dump({"meta": meta, "results": results}, f, indent = 2)
+    if args.compare :
+        with open(args.compare) as f :
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold) :
+            return 1
+    return 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
@@ -1,5 +1,51 @@
-# -*- coding:utf-8 -*- 
-from imputetspy.main import na_ma, na_mean, na_random, na_interpolate, locf, nocb
+# -*- coding:utf-8 -*-
+import importlib
+
+# Public names are resolved on first access (PEP 562), so `import imputetspy`
+# only costs numpy once a name is used, and pandas / scipy are imported by
+# the functions that actually need them.
+_LAZY = {
+    'na_ma': 'imputetspy.main',
+    'na_mean': 'imputetspy.main',
+    'na_random': 'imputetspy.main',
+    'na_interpolate': 'imputetspy.main',
+    'locf': 'imputetspy.main',
+    'nocb': 'imputetspy.main',
+    'GapIndex': 'imputetspy.gaps',
+    'gap_index': 'imputetspy.gaps',
+    'impute_chunks': 'imputetspy.streaming',
+    'OnlineLOCF': 'imputetspy.online',
+    'OnlineNOCB': 'imputetspy.online',
+    'OnlineMA': 'imputetspy.online',
+    'OnlineInterpolate': 'imputetspy.online',
+    'na_seadec': 'imputetspy.seasonal',
+    'na_seasplit': 'imputetspy.seasonal',
+    'na_kalman': 'imputetspy.kalman',
+    'impute_batch': 'imputetspy.batch',
+    'impute_parquet': 'imputetspy.arrow',
+    'set_backend': 'imputetspy.backend',
+    'get_backend': 'imputetspy.backend',
+}
+
+_SUBMODULES = ('main', 'utils', 'gaps', 'columns', 'streaming', 'online', 'datasets', 'timeaxis', 'seasonal', 'kalman', 'batch', 'backend', 'kernels', 'evaluate', 'instrument', 'cache', 'aio', 'arrow', 'cli')
+
+__all__ = list(_LAZY) + list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _LAZY :
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+    elif name in _SUBMODULES :
+        value = importlib.import_module('imputetspy.' + name)
+    else :
+        raise AttributeError("module 'imputetspy' has no attribute %r" % name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 package_data={'imputetspy' :['imputetspy/data/*']}
 
@@ -0,0 +1,109 @@
+import numpy as np
+from imputetspy.streaming import _STREAMS, impute_aligned
+
+# pyarrow is optional: it is imported by the functions below, and the
+# imputers recognise Arrow data by its module without importing it.
+
+
+def _pyarrow():
+    try :
+        import pyarrow
+    except ImportError :
+        raise ImportError("Arrow and Parquet support needs pyarrow, install it with `pip install pyarrow`")
+    return pyarrow
+
+
+def arrow_to_numpy(data):
+    """ Float numpy.array of an Arrow Array or ChunkedArray, with the nulls as NaN.
+
+    A floating point array without nulls (in a single chunk) is returned as
+    a zero-copy, read-only view of the Arrow buffer. Otherwise Arrow fills
+    the nulls with NaN (and casts integers to float64) in one pass over the
+    values, without a separate mask; several chunks are gathered into one
+    array.
+
+    Parameters:
+        data: pyarrow.Array or pyarrow.ChunkedArray of a numeric type.
+
+    Returns:
+        numpy.array
+
+    Examples:
+        >>> import pyarrow as pa
+        >>> from imputetspy.arrow import arrow_to_numpy
+        >>> arrow_to_numpy(pa.chunked_array([[1., None], [3.]]))
+        array([ 1., nan,  3.])
+    """
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+    if isinstance(data, pa.ChunkedArray) :
+        if data.num_chunks == 1 :
+            return arrow_to_numpy(data.chunk(0))
+        out = np.empty(len(data))
+        pos = 0
+        for chunk in data.chunks :
+            out[pos:pos + len(chunk)] = arrow_to_numpy(chunk)
+            pos += len(chunk)
+        return out
+    if not isinstance(data, pa.Array) :
+        raise TypeError("expected a pyarrow.Array or pyarrow.ChunkedArray, got %s" % type(data).__name__)
+    if not pa.types.is_floating(data.type) :
+        if not (pa.types.is_integer(data.type) or pa.types.is_decimal(data.type) or pa.types.is_null(data.type)) :
+            raise TypeError("Arrow arrays of type %s can not be imputed" % data.type)
+        data = data.cast(pa.float64(), safe = False)
+    if data.null_count :
+        data = pc.fill_null(data, pa.scalar(np.nan, data.type))
+    return data.to_numpy(zero_copy_only = True)
+
+
+def impute_parquet(source, target, column, method = "locf", **kwargs):
+    """ Impute a column of a Parquet file into a new Parquet file, row group by row group.
+
+    The column is read one row group at a time and streamed through the
+    chunk-wise imputer of `method` (see `imputetspy.impute_chunks`), which
+    carries the state a gap needs across row group boundaries. Each row
+    group is written to `target` as soon as all its values are imputed, with
+    its other columns untouched, so memory stays bounded by a few row groups
+    plus the pending gap (kept as run lengths) instead of the whole file.
+
+    Values left missing (e.g. beyond `maxgap`) are written as nulls. An
+    integer column becomes float64.
+
+    Parameters:
+        source: path or file object of the Parquet file.
+        target: path or file object of the Parquet file written.
+        column: name of the column to impute.
+        method: "locf", "nocb", "na_ma" or "na_interpolate" (linear).
+        kwargs: parameters of the method, e.g. `k`, `weighting`, `na_remaining` and `maxgap`.
+
+    Returns:
+        number of rows written.
+
+    Examples:
+        >>> from imputetspy.arrow import impute_parquet
+        >>> impute_parquet("sensors.parquet", "sensors_filled.parquet", "temperature", "na_interpolate", maxgap = 60)
+    """
+    pa = _pyarrow()
+    import pyarrow.parquet as pq
+    if method not in _STREAMS :
+        raise ValueError("method must be one of %s" % ", ".join(sorted(_STREAMS)))
+    source = pq.ParquetFile(source)
+    schema = source.schema_arrow
+    idx = schema.get_field_index(column)
+    if idx < 0 :
+        raise ValueError("column %r is not in the file" % column)
+    field = schema.field(idx)
+    if not pa.types.is_floating(field.type) :
+        field = field.with_type(pa.float64())
+        schema = schema.set(idx, field)
+
+    chunks = (arrow_to_numpy(source.read_row_group(i, columns = [column]).column(0))
+              for i in range(source.num_row_groups))
+    rows = 0
+    with pq.ParquetWriter(target, schema) as writer :
+        for i, vals in enumerate(impute_aligned(chunks, method, **kwargs)) :
+            table = source.read_row_group(i)
+            values = pa.array(vals, from_pandas = True).cast(field.type)
+            writer.write_table(table.set_column(idx, field, values).cast(schema))
+            rows += table.num_rows
+    return rows
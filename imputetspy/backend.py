@@ -0,0 +1,81 @@
+import os
+import importlib.util
+
+# "numpy": vectorized numpy code (the Kalman filter interprets its loops on
+#   short series, where vectorizing does not pay)
+# "numba": the loop kernels of `imputetspy.kernels` compiled by numba
+# "python": the same loop kernels, interpreted; slow, meant for checking the
+#   kernels against the numpy code where numba is not installed
+# "auto": "numba" for the Kalman filter, whose vectorized form is still
+#   several times slower, when numba is installed, "numpy" otherwise. The
+#   vectorized numpy code of the other imputers is kept, so their first calls
+#   do not pay for importing numba.
+BACKENDS = ("auto", "numpy", "numba", "python")
+
+_backend = os.environ.get("IMPUTETSPY_BACKEND", "auto")
+_compiled = {}
+_numba = None
+
+
+def numba_available():
+    """ True when numba can be imported (checked without importing it). """
+    global _numba
+    if _numba is None :
+        _numba = importlib.util.find_spec("numba") is not None
+    return _numba
+
+
+def _check(name):
+    if name not in BACKENDS :
+        raise ValueError("backend must be one of %s" % ", ".join(BACKENDS))
+    if (name == "numba") and not numba_available() :
+        raise ImportError("the numba backend needs numba, install it with `pip install numba`")
+
+
+def set_backend(name):
+    """ Select the backend of the loop kernels for every later call.
+
+    The default comes from the IMPUTETSPY_BACKEND environment variable, or
+    "auto". The imputers taking a `backend` argument override it per call.
+
+    Parameters:
+        name: "auto", "numpy", "numba" or "python".
+
+    Examples:
+        >>> import imputetspy
+        >>> imputetspy.set_backend("numpy")
+    """
+    global _backend
+    _check(name)
+    _backend = name
+
+
+def get_backend(backend = None):
+    """ Backend used by a call: `backend` when given, the global setting otherwise, with "auto" resolved. """
+    name = _backend if backend is None else backend
+    _check(name)
+    if name == "auto" :
+        return "numba" if numba_available() else "numpy"
+    return name
+
+
+def use_loops(backend = None):
+    """ True when the loop kernels replace the vectorized numpy code ("numba" or "python" selected explicitly). """
+    name = _backend if backend is None else backend
+    _check(name)
+    return name in ("numba", "python")
+
+
+def kernel(func, backend = None):
+    """ `func` compiled by numba for the numba backend, `func` itself otherwise.
+
+    Compilation happens on first use and is cached on disk by numba, next to
+    the module of `func`.
+    """
+    if get_backend(backend) != "numba" :
+        return func
+    jitted = _compiled.get(func)
+    if jitted is None :
+        import numba
+        jitted = _compiled[func] = numba.njit(cache = True)(func)
+    return jitted
@@ -0,0 +1,193 @@
+import numpy as np
+from imputetspy.gaps import GapIndex
+from imputetspy.utils import carry_fill, linear_fill, nearest_fill, window_bounds, \
+    window_reduce, window_apply, group_stat
+from imputetspy.instrument import instrumented
+
+METHODS = ("locf", "nocb", "mean", "ma", "interpolate")
+
+
+def ragged(data, offsets = None, lengths = None, inplace = False):
+    """ Concatenated values and offsets of a ragged collection of series.
+
+    Parameters:
+        data: one of
+            * 1-D numpy.array of concatenated series, with `offsets`;
+            * 2-D numpy.array of series padded along axis 1, with `lengths`;
+            * list of 1-D arrays (or lists).
+        offsets: series i is data[offsets[i]:offsets[i + 1]]; starts at 0 and ends at len(data).
+        lengths: number of values of each row of a padded 2-D array (every row is full when omitted).
+        inplace: use the buffer of a concatenated 1-D array as the result instead of a copy.
+
+    Returns:
+        (values, offsets, restore): the concatenated float values, the offsets,
+        and a function returning the filled values in the layout of `data`.
+    """
+    if isinstance(data, (list, tuple)) :
+        if (offsets is not None) or (lengths is not None) :
+            raise ValueError("offsets and lengths are only used with numpy.array data")
+        parts = [np.asarray(s, dtype=float).ravel() for s in data]
+        lengths = np.array([p.shape[0] for p in parts], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        values = np.concatenate(parts) if parts else np.empty(0)
+        return values, offsets, lambda v: np.split(v, offsets[1:-1])
+
+    x = np.asarray(data)
+    if x.ndim == 2 :
+        if offsets is not None :
+            raise ValueError("a padded 2-D array takes lengths, not offsets")
+        if lengths is None :
+            lengths = np.full(x.shape[0], x.shape[1])
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if (lengths.shape != (x.shape[0],)) or np.any(lengths < 0) or np.any(lengths > x.shape[1]) :
+            raise ValueError("lengths must hold one length per row, between 0 and %d" % x.shape[1])
+        inside = np.arange(x.shape[1]) < lengths[:, None]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        def restore(v):
+            res = x if inplace else x.astype(_float(x))
+            res[inside] = v
+            return res
+        if inplace :
+            _writable(x)
+        return x[inside].astype(_float(x), copy = False), offsets, restore
+
+    if x.ndim != 1 :
+        raise ValueError("data must be a list of series, a 1-D array with offsets or a padded 2-D array")
+    if offsets is None :
+        raise ValueError("offsets is needed for concatenated 1-D data")
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if (offsets.ndim != 1) or (offsets.shape[0] == 0) or (offsets[0] != 0) or \
+            (offsets[-1] != x.shape[0]) or np.any(np.diff(offsets) < 0) :
+        raise ValueError("offsets must be non decreasing, from 0 to len(data)")
+    if inplace :
+        _writable(x)
+        return x, offsets, lambda v: v
+    return np.array(x, dtype=_float(x)), offsets, lambda v: v
+
+
+def _float(x):
+    """ Floating dtype of the result: the dtype of `x` when it is floating, float64 otherwise. """
+    return x.dtype if x.dtype.kind == "f" else np.float64
+
+
+def _writable(x):
+    if (x.dtype.kind != "f") or (not x.flags.writeable) :
+        raise ValueError("inplace imputation needs a writable floating point buffer")
+
+
+def _ma_bounds(valid, offsets, nan_idx, nan_series, half):
+    """ `window_bounds` with every window clipped to the observations of its own series. """
+    start, pos, stop = window_bounds(valid, nan_idx, half)
+    lo = np.searchsorted(valid, offsets[:-1])[nan_series]
+    hi = np.searchsorted(valid, offsets[1:])[nan_series]
+    if half > 0 :
+        start = np.maximum(start, lo)
+    else :
+        start = lo
+    return start, pos, np.minimum(stop, hi)
+
+
+@instrumented(rows = True)
+def impute_batch(data, method = "locf", offsets = None, lengths = None, maxgap = None,
+                 inplace = False, **kwargs) :
+    """ Batched Missing Value Imputation of many independent series
+
+    Imputes a ragged collection of series in one vectorized pass instead of
+    one call per series. The series are concatenated and indexed by a single
+    GapIndex whose gaps stop at the series boundaries, so no observation is
+    used across two series, and every method runs once over all of them.
+    This removes the per call overhead (type checks, dispatch, small array
+    allocations) that dominates when imputing many short series.
+
+    Parameters:
+        data: the series, as
+            * a list of 1-D numpy.arrays or lists;
+            * a 1-D numpy.array of concatenated series, with `offsets`;
+            * a 2-D numpy.array with one series per row, padded at the end, with `lengths`.
+        method: "locf", "nocb", "mean" (overall mean or median of each series), "ma" (moving average) or "interpolate" (linear or nearest).
+        offsets: series i is data[offsets[i]:offsets[i + 1]] of a concatenated 1-D array.
+        lengths: number of values in each row of a padded 2-D array; the padding is left untouched.
+        maxgap: Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA.
+        inplace: if True, fill the caller's numpy.array instead of a copy.
+        kwargs: arguments of the method:
+            * "locf" / "nocb": na_remaining ("rev", "mean" for the mean of the series, or "keep");
+            * "mean": option ("mean", "median", "mode", "harmonic" or "geometric", see `imputetspy.na_mean`);
+            * "ma": k, func ("mean", "median" or a callable) and weighting ("linear" or "exponential");
+            * "interpolate": option ("linear" or "nearest").
+
+    Returns:
+        the imputed series in the layout of `data`: a list of numpy.arrays, a concatenated 1-D numpy.array or a padded 2-D numpy.array.
+
+    Examples:
+        >>> import numpy as np
+        >>> from imputetspy.batch import impute_batch
+        >>> series = [np.array([1., np.nan, 3.]), np.array([np.nan, 5., np.nan, 7.])]
+        >>> impute_batch(series, "interpolate")
+        [array([1., 2., 3.]), array([5., 5., 6., 7.])]
+        >>> values = np.array([1., np.nan, 3., np.nan, 5., np.nan, 7.])
+        >>> impute_batch(values, "locf", offsets = [0, 3, 7])
+        array([1., 1., 3., 5., 5., 5., 7.])
+    """
+    if method not in METHODS :
+        raise ValueError("method must be one of %s" % ", ".join(METHODS))
+    x, offsets, restore = ragged(data, offsets, lengths, inplace)
+    gaps = GapIndex(np.isnan(x), offsets)
+    series = np.searchsorted(offsets, gaps.starts, side="right") - 1
+    # gaps of series without any observation have nothing to be filled from
+    keep = gaps.keep(maxgap) & ((gaps.left >= 0) | (gaps.right < gaps.n))
+
+    if method in ("locf", "nocb") :
+        na_remaining = kwargs.pop("na_remaining", "rev")
+        _no_kwargs(method, kwargs)
+        carry_fill(x, gaps, forward = method == "locf", keep = keep,
+                   na_remaining = "keep" if na_remaining == "mean" else na_remaining)
+        if na_remaining == "mean" :
+            src = gaps.left if method == "locf" else gaps.right
+            rest = keep & ((src < 0) | (src >= gaps.n))
+            if rest.any() :
+                val = _series_stat(x, gaps.valid_idx, offsets)
+                x[gaps.positions(rest)] = np.repeat(val[series[rest]], gaps.lengths[rest])
+    elif method == "mean" :
+        option = kwargs.pop("option", "mean")
+        _no_kwargs(method, kwargs)
+        val = _series_stat(x, gaps.valid_idx, offsets, option)
+        x[gaps.positions(keep)] = np.repeat(val[series[keep]], gaps.lengths[keep])
+    elif method == "ma" :
+        k = kwargs.pop("k", 4)
+        func = kwargs.pop("func", "mean")
+        weighting = kwargs.pop("weighting", None)
+        _no_kwargs(method, kwargs)
+        if (func != "mean") and (weighting is not None) :
+            raise ValueError("weighting only can be used only if func = np.mean!!!!")
+        if weighting not in (None, "linear", "exponential") :
+            raise ValueError('please specify correct weighting!!!!')
+        func = {"mean": np.mean, "median": np.median}.get(func, func) if isinstance(func, str) else func
+        nan_idx = gaps.positions(keep)
+        valid = gaps.valid_idx
+        start, pos, stop = _ma_bounds(valid, offsets, nan_idx, np.repeat(series[keep], gaps.lengths[keep]), k // 2)
+        if (func is np.mean) or ((func is np.median) and (weighting is None)) :
+            x[nan_idx] = window_reduce(x[valid], start, pos, stop, func, weighting)
+        else :
+            x[nan_idx] = window_apply(x[valid], start, pos, stop, func, weighting)
+    else :
+        option = kwargs.pop("option", "linear")
+        _no_kwargs(method, kwargs)
+        if option == "linear" :
+            linear_fill(x, gaps, keep)
+        elif option == "nearest" :
+            nearest_fill(x, gaps, keep)
+        else :
+            raise ValueError("option must be 'linear' or 'nearest' for batch interpolation")
+    return restore(x)
+
+
+def _series_stat(x, valid, offsets, option = "mean"):
+    """ Statistic of the observed values of every series (NaN for series without any). """
+    series = np.searchsorted(offsets, valid, side="right") - 1
+    return group_stat(x[valid], series, offsets.shape[0] - 1, option)
+
+
+def _no_kwargs(method, kwargs):
+    if kwargs :
+        raise TypeError("unexpected arguments for method %r: %s" % (method, ", ".join(kwargs)))
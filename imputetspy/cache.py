@@ -0,0 +1,312 @@
+import collections
+import functools
+import hashlib
+import inspect
+import os
+import threading
+
+import numpy as np
+
+# Arguments that change how an imputation runs, not its result.
+IGNORED = ("n_jobs", "executor", "backend")
+
+_cache = None
+
+
+class Uncacheable(Exception):
+    """ Raised while keying a call whose arguments can not be hashed reliably. """
+
+
+def content_hash(x):
+    """ Hex digest of the dtype, shape and bytes of a numpy.array.
+
+    SHA-1 runs at about 1 GB/s (it is hashed with the CPU SHA extensions
+    where available) and releases the GIL; it is used as a content
+    fingerprint, not for security.
+    """
+    x = np.ascontiguousarray(x)
+    if x.dtype.kind == "O" :
+        raise Uncacheable("object arrays can not be hashed")
+    h = hashlib.sha1(("%s%s" % (x.dtype.str, x.shape)).encode(), usedforsecurity = False)
+    h.update(x.reshape(-1).view(np.uint8))
+    return h.hexdigest()
+
+
+def _part(value):
+    """ Stable text of an argument for the cache key. """
+    if (value is None) or isinstance(value, (bool, int, float, str, np.integer, np.floating)) :
+        return repr(value)
+    if isinstance(value, (list, tuple)) :
+        return "(%s)" % ", ".join(_part(v) for v in value)
+    if isinstance(value, np.ndarray) :
+        return "array:" + content_hash(value)
+    if hasattr(value, "to_numpy") and hasattr(value, "dtype") :
+        # pandas.Index / Series, e.g. a time axis or group labels
+        values = value.to_numpy()
+        if values.dtype.kind == "M" :
+            values = values.view(np.int64)
+        return "array:" + content_hash(values)
+    # random generators, GapIndex objects, callables, ...
+    raise Uncacheable("%s arguments are not cached" % type(value).__name__)
+
+
+def call_key(func, data, args = (), kwargs = None):
+    """ Key of the result of `func(data, *args, **kwargs)`; raises Uncacheable when the call can not be keyed reliably. """
+    from imputetspy import __version__
+    from imputetspy.utils import as_array
+    kwargs = kwargs or {}
+    if hasattr(data, "columns") :
+        raise Uncacheable("DataFrame data is not cached")
+    signature = _signature(func)
+    bound = signature.bind(data, *args, **kwargs)
+    bound.apply_defaults()
+    params = {}
+    for name, value in list(bound.arguments.items())[1:] :
+        if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD :
+            params.update(value)
+        else :
+            params[name] = value
+    if params.get("inplace") or (params.get("out") is not None) or (params.get("gaps") is not None) :
+        raise Uncacheable("inplace, out and gaps calls are not cached")
+    if (func.__name__ == "na_random") and not isinstance(params.get("rng"), (int, np.integer)) :
+        raise Uncacheable("na_random is only cached with an integer seed")
+    parts = ["%s.%s" % (func.__module__, func.__qualname__), __version__, _part(as_array(data))]
+    if hasattr(getattr(data, "index", None), "to_numpy") :
+        # time = "index" and groups = "hour" read the index of a pandas.Series
+        parts.append("index=" + _part(data.index))
+    parts += ["%s=%s" % (k, _part(v)) for k, v in sorted(params.items()) if k not in IGNORED]
+    return hashlib.sha1("\n".join(parts).encode(), usedforsecurity = False).hexdigest()
+
+
+class ResultCache(object):
+    """ LRU cache of imputation results.
+
+    Results are keyed by a content hash of the input series, the imputer and
+    its arguments. The memory tier keeps the most recently used results
+    within `max_bytes`; an optional disk tier stores every result as a .npy
+    file in `directory`, within `disk_max_bytes`, so that it outlives the
+    process; results that can not be written there (read-only or full
+    disk) are kept in memory only. Hits return a copy of the stored result.
+
+    Only calls on numpy.arrays, lists and pandas.Series returning a
+    numpy.array are cached. Calls writing into a buffer (`inplace`, `out`),
+    taking a `gaps` index, a random generator or a callable, and calls of
+    `na_random` without an integer seed go straight to the imputer.
+
+    Parameters:
+        max_bytes: memory budget of the stored results (default 256 MiB).
+        directory: folder of the disk tier, None for memory only.
+        disk_max_bytes: budget of the disk tier, None for no limit. The least recently used files are removed first. The sizes and the order of use of the files are kept in memory, read from `directory` once when the cache is created; files written by other processes afterwards are not counted until they are read.
+
+    Attributes:
+        hits, disk_hits, misses: counters of the lookups.
+        disk_nbytes: bytes of the disk tier (tracked with `disk_max_bytes` only).
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.cache import ResultCache
+        >>> cache = ResultCache(max_bytes = 64 * 2 ** 20, directory = "imputetspy-cache")
+        >>> data = imputetspy.datasets.ts_nh4()
+        >>> data_fill = cache.call(imputetspy.na_kalman, data, model = "level")
+        >>> data_fill = cache.call(imputetspy.na_kalman, data, model = "level")  # from the cache
+    """
+
+    def __init__(self, max_bytes = 256 * 2 ** 20, directory = None, disk_max_bytes = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.nbytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # path -> size of the disk tier files, least recently used first
+        self._files = collections.OrderedDict()
+        self.disk_nbytes = 0
+        if directory is not None :
+            os.makedirs(directory, exist_ok = True)
+            if disk_max_bytes is not None :
+                self._scan_disk()
+
+    def __len__(self):
+        return len(self._items)
+
+    def key(self, func, data, args = (), kwargs = None):
+        """ Cache key of `func(data, *args, **kwargs)`, see `call_key`. """
+        return call_key(func, data, args, kwargs)
+
+    def get(self, key):
+        """ Stored result of `key` (not copied), or None. """
+        with self._lock :
+            value = self._items.get(key)
+            if value is not None :
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+        path = self._path(key)
+        if (path is not None) and os.path.exists(path) :
+            try :
+                value = np.load(path, allow_pickle = False)
+            except (OSError, ValueError) :
+                return None
+            try :
+                # the modification time orders the files for the next process
+                os.utime(path)
+            except OSError :
+                # read-only or foreign cache directory: the touch is best effort
+                pass
+            value.flags.writeable = False
+            with self._lock :
+                self.disk_hits += 1
+            self._remember(key, value)
+            self._track(path)
+            return value
+        return None
+
+    def put(self, key, value):
+        """ Store the numpy.array `value` under `key`. """
+        value = np.array(value)
+        value.flags.writeable = False
+        self._remember(key, value)
+        path = self._path(key)
+        if path is not None :
+            tmp = "%s.%d.tmp" % (path, threading.get_ident())
+            try :
+                with open(tmp, "wb") as f :
+                    np.save(f, value, allow_pickle = False)
+                    size = f.tell()
+                os.replace(tmp, path)
+                self._track(path, size)
+            except OSError :
+                # read-only or full disk: the result stays in the memory tier only
+                try :
+                    os.remove(tmp)
+                except OSError :
+                    pass
+
+    def call(self, func, data, *args, **kwargs):
+        """ `func(data, *args, **kwargs)`, from the cache when possible. """
+        try :
+            key = self.key(func, data, args, kwargs)
+        except (Uncacheable, TypeError) :
+            # uncacheable arguments, or a call the imputer itself rejects
+            return func(data, *args, **kwargs)
+        value = self.get(key)
+        if value is not None :
+            return value.copy()
+        with self._lock :
+            self.misses += 1
+        result = func(data, *args, **kwargs)
+        if isinstance(result, np.ndarray) and (result.dtype.kind != "O") :
+            self.put(key, result)
+        return result
+
+    def clear(self, disk = False):
+        """ Empty the memory tier, and the disk tier too with `disk`. """
+        with self._lock :
+            self._items.clear()
+            self.nbytes = 0
+        if disk and (self.directory is not None) :
+            with self._lock :
+                self._files.clear()
+                self.disk_nbytes = 0
+            for name in os.listdir(self.directory) :
+                if name.endswith(".npy") :
+                    os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key, value):
+        if value.nbytes > self.max_bytes :
+            return
+        with self._lock :
+            old = self._items.pop(key, None)
+            if old is not None :
+                self.nbytes -= old.nbytes
+            self._items[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes :
+                _, dropped = self._items.popitem(last = False)
+                self.nbytes -= dropped.nbytes
+
+    def _path(self, key):
+        return None if self.directory is None else os.path.join(self.directory, key + ".npy")
+
+    def _scan_disk(self):
+        """ Seed the disk tier bookkeeping from `directory`, oldest files first. """
+        files = []
+        for entry in os.scandir(self.directory) :
+            if entry.name.endswith(".npy") :
+                st = entry.stat()
+                files.append((st.st_mtime, entry.path, st.st_size))
+        for _, path, size in sorted(files) :
+            self._files[path] = size
+            self.disk_nbytes += size
+        self._trim_disk()
+
+    def _track(self, path, size = None):
+        """ Mark the disk tier file `path` (of `size` bytes, looked up when None) as most recently used, then keep the tier within budget. """
+        if self.disk_max_bytes is None :
+            return
+        if (size is None) and (path not in self._files) :
+            # written by another process
+            try :
+                size = os.path.getsize(path)
+            except OSError :
+                return
+        with self._lock :
+            if size is None :
+                size = self._files.get(path, 0)
+            self.disk_nbytes += size - self._files.pop(path, 0)
+            self._files[path] = size
+        self._trim_disk()
+
+    def _trim_disk(self):
+        while True :
+            with self._lock :
+                if (self.disk_nbytes <= self.disk_max_bytes) or not self._files :
+                    return
+                path, size = self._files.popitem(last = False)
+                self.disk_nbytes -= size
+            try :
+                os.remove(path)
+            except OSError :
+                pass
+
+
+@functools.lru_cache(maxsize = None)
+def _signature(func):
+    return inspect.signature(inspect.unwrap(func))
+
+
+def enable_cache(cache = None, **kwargs):
+    """ Put a ResultCache in front of the imputers of imputetspy.main.
+
+    Parameters:
+        cache: the ResultCache to use, or None for a new one built from `kwargs` (max_bytes, directory, disk_max_bytes).
+
+    Returns:
+        the cache.
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.cache import enable_cache
+        >>> cache = enable_cache(max_bytes = 2 ** 30, directory = "/tmp/imputetspy")
+        >>> data_fill = imputetspy.na_ma(imputetspy.datasets.ts_nh4(), k = 6)
+    """
+    global _cache
+    _cache = ResultCache(**kwargs) if cache is None else cache
+    return _cache
+
+
+def disable_cache():
+    """ Stop caching the imputers of imputetspy.main. """
+    global _cache
+    _cache = None
+
+
+def cached(func):
+    """ Decorator looking the calls of an imputer up in the enabled cache. """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if (_cache is None) or not args :
+            return func(*args, **kwargs)
+        return _cache.call(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,246 @@
+""" Batch imputation of time series files.
+
+Imputes every file matching the input globs with one method of
+imputetspy.main and writes the results, in the same layout, to an output
+directory. Files are spread over a pool of worker processes.
+
+Text files hold the values separated by `--delimiter` (commas by default,
+line breaks also separate values), like the bundled tsNH4.txt: missing
+values are "nan", "NA" or empty. With `--column` the files are csv files
+with a header, and that column is imputed while the other columns are
+copied.
+
+locf, nocb, na_ma (mean) and na_interpolate (linear) stream every file in
+blocks, carrying the state of pending gaps over, so a file never has to
+fit in memory. The other methods and options load each file whole.
+
+    imputetspy "sensors/*.txt" --method na_interpolate --out filled/ --workers 8
+    imputetspy "plant/**/*.csv" --column nh4 --method na_ma -p k=6 -p weighting=linear --out filled/
+"""
+import argparse
+import ast
+import collections
+import glob
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+from imputetspy.columns import get_executor
+from imputetspy.streaming import _STREAMS, impute_aligned
+
+METHODS = ("locf", "nocb", "na_ma", "na_interpolate", "na_mean", "na_random")
+MISSING = ("", "nan", "NaN", "NAN", "NA", "na", "null", "None")
+
+
+def parse_params(items):
+    """ {name: value} of NAME=VALUE strings; values are Python literals or plain strings. """
+    params = {}
+    for item in items or () :
+        name, sep, value = item.partition("=")
+        if not sep :
+            raise ValueError("parameters are given as NAME=VALUE, got %r" % item)
+        try :
+            params[name.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError) :
+            params[name.strip()] = value
+    return params
+
+
+def stream_params(method, params):
+    """ Parameters of the streaming imputer of `method`, or None when it can not run streamed. """
+    if method not in _STREAMS :
+        return None
+    params = dict(params)
+    if (method == "na_interpolate") and (params.pop("option", "linear") != "linear") :
+        return None
+    if (method == "na_ma") and (params.pop("func", "mean") != "mean") :
+        return None
+    if params.get("na_remaining") == "mean" :
+        return None
+    try :
+        _STREAMS[method](**params)
+    except (TypeError, ValueError) :
+        return None
+    return params
+
+
+def _floats(tokens):
+    try :
+        return np.array(tokens, dtype = float)
+    except ValueError :
+        return np.array([np.nan if t.strip() in MISSING else float(t) for t in tokens], dtype = float)
+
+
+def read_text(path, delimiter = ",", block = 1 << 22):
+    """ Values of a delimited text file, as a generator of numpy.array blocks of about `block` characters. """
+    rest = ""
+    with open(path) as f :
+        while True :
+            text = f.read(block)
+            if not text :
+                break
+            text = (rest + text).replace("\r", "").replace("\n", delimiter)
+            tokens = text.split(delimiter)
+            # the last token may continue in the next block
+            rest = tokens.pop()
+            if tokens :
+                yield _floats(tokens)
+    if rest.strip() :
+        yield _floats([rest])
+
+
+def _format(values, fmt, delimiter = ","):
+    if fmt is None :
+        # shortest representation that reads back to the same float, as
+        # numpy prints it, without numpy's slower string conversion
+        return delimiter.join(map(repr, values.tolist()))
+    return delimiter.join([fmt % v for v in values.tolist()])
+
+
+def _output(path, root, out_dir):
+    return os.path.join(out_dir, os.path.relpath(os.path.abspath(path), root))
+
+
+def impute_file(path, output, method, params, column = None, delimiter = ",", fmt = None,
+                block = 1 << 22):
+    """ Impute one file into `output`; returns a dict of statistics. Runs in the workers. """
+    from imputetspy import main
+    t = time.perf_counter()
+    streamed = stream_params(method, params)
+    tmp = "%s.%d.tmp" % (output, os.getpid())
+    stats = {"missing": 0}
+
+    def counted(chunks):
+        for vals in chunks :
+            stats["missing"] += int(np.isnan(vals).sum())
+            yield vals
+    n = remaining = 0
+    try :
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+        if column is None :
+            chunks = counted(read_text(path, delimiter, block))
+            if streamed is not None :
+                filled = impute_aligned(chunks, method, **streamed)
+            else :
+                data = np.concatenate(list(chunks) or [np.empty(0)])
+                filled = [getattr(main, method)(data, **params)] if data.shape[0] else []
+            with open(tmp, "w") as f :
+                first = True
+                for vals in filled :
+                    n += vals.shape[0]
+                    remaining += int(np.isnan(vals).sum())
+                    if vals.shape[0] :
+                        f.write(("" if first else delimiter) + _format(vals, fmt, delimiter))
+                        first = False
+        else :
+            import pandas as pd
+            if streamed is not None :
+                # csv chunks waiting for their imputed values
+                frames = collections.deque()
+
+                def values():
+                    for frame in pd.read_csv(path, chunksize = max(1, block // 16)) :
+                        frames.append(frame)
+                        yield frame[column].to_numpy(dtype = float, na_value = np.nan)
+                header = True
+                for vals in impute_aligned(counted(values()), method, **streamed) :
+                    frame = frames.popleft()
+                    frame[column] = vals
+                    n += vals.shape[0]
+                    remaining += int(np.isnan(vals).sum())
+                    frame.to_csv(tmp, mode = "w" if header else "a", header = header, index = False,
+                                 float_format = fmt)
+                    header = False
+                if header :
+                    pd.read_csv(path, nrows = 0).to_csv(tmp, index = False)
+            else :
+                frame = pd.read_csv(path)
+                vals = next(counted([frame[column].to_numpy(dtype = float, na_value = np.nan)]))
+                frame[column] = getattr(main, method)(vals, **params)
+                n = vals.shape[0]
+                remaining = int(frame[column].isna().sum())
+                frame.to_csv(tmp, index = False, float_format = fmt)
+        os.replace(tmp, output)
+    except Exception as e :
+        if os.path.exists(tmp) :
+            os.remove(tmp)
+        return {"file": path, "error": "%s: %s" % (type(e).__name__, e)}
+    return {"file": path, "output": output, "n": n, "missing": stats["missing"], "remaining": remaining,
+            "seconds": time.perf_counter() - t, "streamed": streamed is not None}
+
+
+def report(res):
+    if "error" in res :
+        print("%-40s  FAILED  %s" % (res["file"], res["error"]), flush = True)
+        return
+    rate = res["n"] / res["seconds"] if res["seconds"] > 0 else float("inf")
+    print("%-40s %11d values %9d missing %9d left %8.3f s %12.3g values/s%s" % (
+        res["file"], res["n"], res["missing"], res["remaining"],
+        res["seconds"], rate, "" if res["streamed"] else "  (loaded whole)"), flush = True)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "imputetspy", description = __doc__.splitlines()[0],
+                                     epilog = "\n".join(__doc__.splitlines()[2:]),
+                                     formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs = "+", help = "input files or glob patterns (** matches sub-directories)")
+    parser.add_argument("--out", "-o", required = True, help = "output directory")
+    parser.add_argument("--method", "-m", default = "na_interpolate", choices = METHODS)
+    parser.add_argument("--param", "-p", action = "append", metavar = "NAME=VALUE",
+                        help = "parameter of the method, e.g. -p k=6 -p weighting=linear -p maxgap=10")
+    parser.add_argument("--workers", "-j", type = int, default = 1, help = "worker processes, -1 for every CPU")
+    parser.add_argument("--column", "-c", help = "impute this column of csv files with a header")
+    parser.add_argument("--delimiter", "-d", default = ",", help = "value separator of text files")
+    parser.add_argument("--fmt", help = "printf format of the written values, e.g. %%.6f (default: shortest exact)")
+    parser.add_argument("--block", type = int, default = 1 << 22, help = "characters read per block when streaming")
+    args = parser.parse_args(argv)
+
+    try :
+        params = parse_params(args.param)
+    except ValueError as e :
+        parser.error(str(e))
+    files = []
+    for pattern in args.inputs :
+        matches = sorted(glob.glob(pattern, recursive = True)) if glob.has_magic(pattern) else [pattern]
+        files += [f for f in matches if os.path.isfile(f)]
+    files = list(dict.fromkeys(files))
+    if not files :
+        parser.error("no input file matches %s" % " ".join(args.inputs))
+    # outputs keep the paths relative to the common directory of the inputs
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    outputs = [_output(f, root, args.out) for f in files]
+    if any(os.path.abspath(o) == os.path.abspath(f) for f, o in zip(files, outputs)) :
+        parser.error("the output directory would overwrite the input files")
+
+    t = time.perf_counter()
+    results = []
+    jobs = [(f, o, args.method, params, args.column, args.delimiter, args.fmt, args.block)
+            for f, o in zip(files, outputs)]
+    workers = min(os.cpu_count() or 1, len(jobs)) if args.workers < 0 else max(1, min(args.workers, len(jobs)))
+    pool = get_executor(workers, "process")
+    try :
+        if pool is None :
+            for job in jobs :
+                results.append(impute_file(*job))
+                report(results[-1])
+        else :
+            for future in as_completed([pool.submit(impute_file, *job) for job in jobs]) :
+                results.append(future.result())
+                report(results[-1])
+    finally :
+        if pool is not None :
+            pool.shutdown()
+    wall = time.perf_counter() - t
+
+    ok = [r for r in results if "error" not in r]
+    total = sum(r["n"] for r in ok)
+    print("\n%d files imputed, %d failed, %d values in %.2f s (%.3g values/s, %d workers)" % (
+        len(ok), len(results) - len(ok), total, wall, total / wall if wall > 0 else 0,
+        workers))
+    return 1 if len(ok) < len(results) else 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+from imputetspy.utils import check_data, is_arrow
+
+
+def is_2d(data):
+    """ True for pandas.DataFrame, 2-D numpy.array and nested lists. """
+    # np.ndim would convert Arrow arrays to numpy
+    return (not is_arrow(data)) and (np.ndim(data) == 2)
+
+
+def get_executor(n_jobs = None, executor = "thread"):
+    """ Return the executor used to impute columns, or None to run serially.
+
+    Parameters:
+        n_jobs: number of workers. None or 1 runs in the calling thread, -1 uses every CPU.
+        executor: "thread", "process" or an existing concurrent.futures.Executor.
+    """
+    if isinstance(executor, Executor) :
+        return executor
+    if (n_jobs is None) or (n_jobs == 1) :
+        return None
+    if n_jobs < 0 :
+        n_jobs = os.cpu_count() or 1
+    if executor == "thread" :
+        return ThreadPoolExecutor(max_workers = n_jobs)
+    elif executor == "process" :
+        return ProcessPoolExecutor(max_workers = n_jobs)
+    raise ValueError("executor must be 'thread', 'process' or a concurrent.futures.Executor")
+
+
+def impute_columns(imputer, data, n_jobs = None, executor = "thread", kernel = None,
+                   inplace = False, out = None, **kwargs):
+    """ Impute every column of a 2-D array or DataFrame independently.
+
+    When a `kernel` is given it receives the whole float block and fills all
+    columns at once along axis 0. Otherwise `imputer` is called on each column,
+    serially or fanned out across a thread or process pool.
+
+    Non numeric DataFrame columns are returned untouched. Column names, the
+    index and the column dtypes of the input are preserved. With `inplace` a
+    2-D numpy.array is filled in its own buffer and a DataFrame gets its
+    numeric columns assigned back.
+
+    Parameters:
+        imputer: single column imputer from imputetspy.main.
+        data: pandas.DataFrame, 2-D numpy.array or nested list.
+        n_jobs: number of workers, see `get_executor`.
+        executor: "thread", "process" or a concurrent.futures.Executor.
+        kernel: optional callable filling a 2-D float array column-wise in one pass.
+        inplace: fill `data` itself instead of a copy.
+        out: numpy.array receiving the result (2-D numpy.array input only).
+        kwargs: arguments passed to `imputer` or `kernel`. A `time` axis ("index" for the DataFrame index) is shared by every column.
+
+    Returns:
+        imputed data of the same type and shape as `data`.
+    """
+    if kwargs.get("gaps") is not None :
+        raise ValueError("gaps is only available for single column data")
+    kwargs.pop("gaps", None)
+    time = kwargs.pop("time", None)
+    if isinstance(time, str) and (time == "index") :
+        if not hasattr(data, "index") :
+            raise ValueError("time = 'index' is only available for pandas.Series and pandas.DataFrame data")
+        time = data.index
+    if time is not None :
+        # the kernels assume unit spacing, every column gets the shared time axis
+        kwargs["time"] = time
+        kernel = None
+
+    frame = hasattr(data, "columns")
+    if frame :
+        if out is not None :
+            raise ValueError("out is not available for DataFrame data")
+        numeric = [c for c in data.columns
+                   if (data[c].dtype.kind in "fiu") and (data[c].dtype.kind != "b")]
+        x = data[numeric].to_numpy(dtype = float, copy = True)
+    else :
+        x = check_data(data, inplace, out)
+        if x.dtype.kind != "f" :
+            x = x.astype(float)
+
+    if kernel is not None :
+        x = kernel(x, **kwargs)
+    else :
+        pool = get_executor(n_jobs, executor)
+        columns = [x[:, j] for j in range(x.shape[1])]
+        if pool is None :
+            for c in columns :
+                imputer(c, inplace = True, **kwargs)
+        else :
+            try :
+                for j, c in enumerate(pool.map(partial(imputer, **kwargs), columns)) :
+                    x[:, j] = c
+            finally :
+                if pool is not executor :
+                    pool.shutdown()
+
+    if not frame :
+        return x
+    if inplace :
+        for j, c in enumerate(numeric) :
+            data[c] = x[:, j].astype(data[c].dtype, copy = False)
+        return data
+    result = data.copy()
+    result[numeric] = x
+    return result.astype({c: data[c].dtype for c in numeric})
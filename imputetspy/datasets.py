@@ -1,9 +1,128 @@
+import hashlib
+import os
+import tempfile
 import numpy as np
 import pandas as pd
 from importlib import resources
 
 
 DATA_MODULE = "imputetspy"
+CACHE_ENV = "IMPUTETSPY_CACHE_DIR"
+# mkstemp creates files readable by their owner only; cached files get the
+# permissions of an ordinary file instead (os.umask can only be read by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def cache_dir():
+    '''
+    Directory of the binary dataset cache
+    ------
+    Taken from the IMPUTETSPY_CACHE_DIR environment variable, otherwise
+    $XDG_CACHE_HOME/imputetspy or ~/.cache/imputetspy.
+
+
+    Returns
+    ------
+        string path of the cache directory (it may not exist yet)
+    '''
+    path = os.environ.get(CACHE_ENV)
+    if not path :
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "imputetspy")
+    return path
+
+
+def clear_cache():
+    '''
+    Remove every cached .npy file from `cache_dir()`.
+    '''
+    path = cache_dir()
+    if os.path.isdir(path) :
+        for name in os.listdir(path) :
+            if name.endswith(".npy") :
+                os.remove(os.path.join(path, name))
+
+
+def _cache_path(path, *key):
+    st = os.stat(path)
+    raw = "|".join([os.path.abspath(path), str(st.st_size), str(st.st_mtime_ns)] + [str(k) for k in key])
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir(), "%s-%s.npy" % (stem, hashlib.sha1(raw.encode()).hexdigest()[:16]))
+
+
+def _save(target, arr):
+    # write next to the target and rename, so concurrent readers never see a partial file
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(target))
+    try :
+        with os.fdopen(fd, "wb") as f :
+            np.save(f, arr, allow_pickle=False)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, target)
+    except BaseException :
+        if os.path.exists(tmp) :
+            os.remove(tmp)
+        raise
+
+
+def load_series(path, column = None, delimiter = ",", cache = True):
+    '''
+    Load a (large) time series file through the binary cache
+    ------
+    The first call parses the text file and stores it as a .npy file in
+    `cache_dir()`. Later calls return a read-only numpy.memmap of that file,
+    so loading is instant and the data is paged in on demand. The cache key
+    holds the path, size and modification time of the file, so an edited
+    file is parsed again. .npy files are memory-mapped directly.
+
+    If the cache directory is not writable, the parsed array is returned.
+
+
+    Parameters
+    ------
+        path: path of a delimited text file (e.g. "1.5,nan,2.1,..."), a csv file or a .npy file.
+        column: name of the csv column to load; the file is read with pandas.read_csv and a header.
+        delimiter: field delimiter of text files, "," by default.
+        cache: set to False to always parse the file and skip the cache.
+
+
+    Returns
+    ------
+        numpy.memmap (read-only) or numpy array
+
+
+    Examples
+    ------
+        >>> import imputetspy
+
+        >>> data = imputetspy.datasets.load_series("sensor_2023.txt")
+
+        >>> data_fill = imputetspy.locf(data)
+    '''
+    path = os.fspath(path)
+    if path.endswith(".npy") :
+        return np.load(path, mmap_mode="r")
+    target = _cache_path(path, column, delimiter) if cache else None
+    if (target is not None) and os.path.exists(target) :
+        return np.load(target, mmap_mode="r")
+    if column is not None :
+        arr = pd.read_csv(path, usecols=[column])[column].to_numpy(dtype=float, na_value=np.nan)
+    else :
+        arr = np.loadtxt(path, delimiter=delimiter, unpack=False)
+    if target is None :
+        return arr
+    try :
+        _save(target, arr)
+    except OSError :
+        return arr
+    return np.load(target, mmap_mode="r")
+
+
+def _load_data(name, load):
+    # the file only exists inside the block for zipped installs
+    with resources.as_file(resources.files(DATA_MODULE) /'data'/ name) as data_path :
+        return load(os.fspath(data_path))
 
 def ts_airgap():
     '''
@@ -15,7 +134,7 @@ def ts_airgap():
 
     Returns
     ------
-        numpy array
+        pandas.DataFrame
     
 
     Examples
@@ -29,10 +148,8 @@ def ts_airgap():
     '''
     
     
-    #DATA_FILE = pkg_resources.resource_filename('imputetspy', 'data/tsAirgap.csv')
-    data_path = resources.files(DATA_MODULE) /'data'/'tsAirgap.csv'
-
-    df = pd.read_csv(data_path)
+    # 144 rows: parsing is cheaper than the cache lookup
+    df = _load_data('tsAirgap.csv', pd.read_csv)
  
     return df
     
@@ -47,7 +164,7 @@ def ts_nh4():
 
     Returns
     ------
-        numpy array
+        numpy.memmap (read-only), see `load_series`
     
 
     Examples
@@ -59,9 +176,7 @@ def ts_nh4():
         >>> data
     '''
     
-    data_path = resources.files(DATA_MODULE) /'data'/'tsNH4.txt'
-    
-    df = np.loadtxt(data_path, delimiter=",", unpack=False)
+    df = _load_data('tsNH4.txt', load_series)
  
     return df
 
@@ -75,7 +190,7 @@ def ts_heating():
    
     Returns
     ------
-        numpy array
+        numpy.memmap (read-only), see `load_series`
     
 
     Examples
@@ -88,10 +203,7 @@ def ts_heating():
 
     '''
     
-    #DATA_FILE = pkg_resources.resource_filename('imputetspy', 'data/tsAirgap.csv')
-    data_path = resources.files(DATA_MODULE) /'data'/'tsHeating.txt'
-
-    df = np.loadtxt(data_path, delimiter=",", unpack=False)
+    df = _load_data('tsHeating.txt', load_series)
  
     return df
 
@@ -0,0 +1,169 @@
+import itertools
+import time
+
+import numpy as np
+from imputetspy.columns import get_executor
+from imputetspy.gaps import GapIndex
+from imputetspy.utils import as_array
+
+# parameter grid of `evaluate` when none is given: every imputer of
+# imputetspy.main with its main options
+GRID = {
+    "na_interpolate": {"option": ["linear", "spline", "stineman"]},
+    "na_ma": {"k": [2, 4, 8], "weighting": [None, "linear", "exponential"]},
+    "na_mean": {"option": ["mean", "median"]},
+    "na_random": {"rng": 0},
+    "locf": {},
+    "nocb": {},
+}
+
+
+def random_mask(n, rate, rng):
+    """ Independent missing values, each position missing with probability `rate`. """
+    return rng.random(n) < rate
+
+
+def bursty_mask(n, rate, rng, mean_gap = 5):
+    """ Short gaps with geometric lengths of mean `mean_gap`, covering about `rate` of the series. """
+    mask = np.zeros(n, dtype = bool)
+    n_gaps = max(1, int(n * rate / mean_gap))
+    starts = rng.integers(0, n, n_gaps)
+    lengths = rng.geometric(1 / mean_gap, n_gaps)
+    pos = np.repeat(starts, lengths) + (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+    mask[pos[pos < n]] = True
+    return mask
+
+
+def outage_mask(n, rate, rng, n_outages = 5):
+    """ `n_outages` long outages of equal length, covering about `rate` of the series. """
+    mask = np.zeros(n, dtype = bool)
+    length = max(1, int(n * rate / n_outages))
+    for s in rng.integers(0, max(1, n - length), n_outages) :
+        mask[s:s + length] = True
+    return mask
+
+
+PATTERNS = {"random": random_mask, "bursty": bursty_mask, "outage": outage_mask}
+
+
+def inject_gaps(data, pattern = "random", rate = 0.1, rng = None):
+    """ Hide known values of a series behind synthetic gaps.
+
+    Parameters:
+        data: numpy.array, list or pandas.Series; its own missing values stay missing.
+        pattern: "random" (independent values), "bursty" (short gaps of mean length 5) or "outage" (5 long gaps).
+        rate: fraction of the series covered by the synthetic gaps.
+        rng: seed or numpy.random.Generator of the gap positions.
+
+    Returns:
+        (masked, hidden): a float copy of `data` with the gaps set to NaN, and the positions of the hidden observed values.
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.evaluate import inject_gaps
+        >>> masked, hidden = inject_gaps(imputetspy.datasets.ts_nh4(), "bursty", rate = 0.2, rng = 1)
+    """
+    if pattern not in PATTERNS :
+        raise ValueError("pattern must be one of %s" % ", ".join(PATTERNS))
+    x = np.array(as_array(data), dtype = float)
+    if x.ndim != 1 :
+        raise ValueError("inject_gaps takes a single series")
+    rng = np.random.default_rng(rng)
+    hidden = np.flatnonzero(PATTERNS[pattern](x.shape[0], rate, rng) & ~np.isnan(x))
+    x[hidden] = np.nan
+    return x, hidden
+
+
+def expand_grid(grid):
+    """ (method, params) pairs of a grid {method: {param: value or list of values}}. """
+    for method, params in grid.items() :
+        params = params or {}
+        names = list(params)
+        values = [v if isinstance(v, (list, tuple)) else [v] for v in params.values()]
+        for combo in itertools.product(*values) :
+            yield method, dict(zip(names, combo))
+
+
+def _score(method, params, cases):
+    """ Errors and wall time of one method on every masked series; runs in the worker. """
+    if isinstance(method, str) :
+        import imputetspy
+        fn = getattr(imputetspy, method)
+    else :
+        fn = method
+    rmse, mae, coverage, seconds = [], [], [], []
+    for masked, gaps, hidden, truth in cases :
+        t = time.perf_counter()
+        try :
+            filled = fn(masked, gaps = gaps, **params)
+        except Exception as e :
+            return {"error": "%s: %s" % (type(e).__name__, e)}
+        seconds.append(time.perf_counter() - t)
+        err = np.asarray(filled, dtype = float)[hidden] - truth
+        err = err[np.isfinite(err)]
+        coverage.append(err.shape[0] / max(1, hidden.shape[0]))
+        rmse.append(np.sqrt(np.mean(err ** 2)) if err.shape[0] else np.nan)
+        mae.append(np.mean(np.abs(err)) if err.shape[0] else np.nan)
+    return {"rmse": np.mean(rmse), "mae": np.mean(mae), "coverage": np.mean(coverage),
+            "seconds": np.mean(seconds)}
+
+
+def evaluate(data, grid = None, pattern = "random", rate = 0.1, repeats = 3, rng = None,
+             n_jobs = None, executor = "process") :
+    """ Accuracy and speed of imputation methods on a series with known values
+
+    Hides observed values of `data` behind synthetic gaps (see `inject_gaps`),
+    imputes them with every method and parameter combination of `grid`, and
+    scores the imputed values against the hidden ones. The gap index of every
+    masked series is built once and shared by all the methods. The grid points
+    run in parallel across a process pool when `n_jobs` is set; each wall time
+    is measured inside its worker.
+
+    Parameters:
+        data: numpy.array, list or pandas.Series.
+        grid: {method: {parameter: value or list of values}}; every combination is evaluated. A method is the name of an imputetspy imputer or a picklable callable taking `gaps`. Defaults to `GRID`, the imputers of imputetspy.main with their main options.
+        pattern: gap pattern, "random", "bursty" or "outage".
+        rate: fraction of the series hidden.
+        repeats: number of masked versions of the series; scores and times are averaged over them.
+        rng: seed or numpy.random.Generator of the gap positions.
+        n_jobs: number of workers, None or 1 to run serially, -1 for every CPU.
+        executor: "process", "thread" or a concurrent.futures.Executor.
+
+    Returns:
+        pandas.DataFrame with one row per grid point, sorted by RMSE: method, params, rmse, mae, coverage (fraction of the hidden values imputed, below 1 with `maxgap`), seconds (mean wall time of one call) and error (exception raised by the method, if any).
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.evaluate import evaluate
+        >>> data = imputetspy.datasets.ts_nh4()
+        >>> scores = evaluate(data, {"na_ma": {"k": [2, 4, 8]}, "na_interpolate": {"option": ["linear", "spline"]}}, rng = 0)
+        >>> scores = evaluate(data, pattern = "outage", n_jobs = 4)
+    """
+    import pandas as pd
+
+    values = np.asarray(as_array(data), dtype = float)
+    rng = np.random.default_rng(rng)
+    cases = []
+    for _ in range(repeats) :
+        masked, hidden = inject_gaps(values, pattern, rate, rng)
+        cases.append((masked, GapIndex(np.isnan(masked)), hidden, values[hidden]))
+
+    points = list(expand_grid(GRID if grid is None else grid))
+    pool = get_executor(n_jobs, executor)
+    try :
+        if pool is None :
+            scores = [_score(m, p, cases) for m, p in points]
+        else :
+            futures = [pool.submit(_score, m, p, cases) for m, p in points]
+            scores = [f.result() for f in futures]
+    finally :
+        if (pool is not None) and (pool is not executor) :
+            pool.shutdown()
+
+    rows = []
+    for (method, params), score in zip(points, scores) :
+        rows.append(dict(method = method if isinstance(method, str) else method.__name__,
+                         params = params, **score))
+    columns = ["method", "params", "rmse", "mae", "coverage", "seconds", "error"]
+    result = pd.DataFrame(rows, columns = columns)
+    return result.sort_values("rmse", na_position = "last", kind = "stable").reset_index(drop = True)
@@ -0,0 +1,148 @@
+import numpy as np
+from imputetspy.backend import use_loops, kernel
+from imputetspy.kernels import gap_runs, gap_positions
+from imputetspy.instrument import stage
+
+
+class GapIndex(object):
+    """ Run-length table of the missing values (gaps) of a series.
+
+    The table is built once in O(n) from the NaN mask and can be handed to
+    every imputer through its `gaps` argument, so that trying several methods
+    on the same series only pays for gap discovery once.
+
+    Parameters:
+        mask: boolean numpy.array, True where the series is missing.
+        offsets: optional boundaries of several series concatenated in `mask`
+            (series i is mask[offsets[i]:offsets[i + 1]]). Gaps are then cut at
+            the boundaries, and a gap at the start (end) of a series has no
+            left (right) neighbour.
+        backend: backend of the run detection and of `positions` (see `imputetspy.set_backend`).
+
+    Attributes:
+        n: length of the series.
+        mask: the boolean missing-value mask.
+        starts: index of the first missing value of each gap.
+        lengths: number of missing values of each gap.
+        left: index of the nearest valid observation before each gap (-1 if there is none).
+        right: index of the nearest valid observation after each gap (n if there is none).
+
+    Examples:
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_nh4()
+        >>> gaps = imputetspy.gap_index(data)
+        >>> data_fill_locf = imputetspy.locf(data, gaps = gaps)
+        >>> data_fill_ma = imputetspy.na_ma(data, gaps = gaps)
+    """
+
+    def __init__(self, mask, offsets = None, backend = None):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.ndim != 1 :
+            raise ValueError("GapIndex is only available for single column data")
+        self.n = mask.shape[0]
+        self.mask = mask
+        self.backend = backend
+        if (offsets is None) and use_loops(backend) :
+            runs = kernel(gap_runs, backend)
+            empty = np.empty(0, dtype=np.int64)
+            self.starts = np.empty(runs(mask, empty, empty), dtype=np.int64)
+            self.lengths = np.empty_like(self.starts)
+            runs(mask, self.starts, self.lengths)
+            self.left = self.starts - 1
+            self.right = self.starts + self.lengths
+        elif offsets is None :
+            edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+            self.starts = np.flatnonzero(edges == 1)
+            self.lengths = np.flatnonzero(edges == -1) - self.starts
+            self.left = self.starts - 1
+            self.right = self.starts + self.lengths
+        else :
+            offsets = np.asarray(offsets, dtype=np.int64)
+            # a series boundary ends every run, as if a valid value sat in between
+            first = np.zeros(self.n + 1, dtype=bool)
+            first[offsets] = True
+            prev = np.concatenate(([False], mask[:-1])) & ~first[:-1]
+            nxt = np.concatenate((mask[1:], [False])) & ~first[1:]
+            self.starts = np.flatnonzero(mask & ~prev)
+            ends = np.flatnonzero(mask & ~nxt) + 1
+            self.lengths = ends - self.starts
+            series = np.searchsorted(offsets, self.starts, side="right") - 1
+            self.left = np.where(self.starts > offsets[series], self.starts - 1, -1)
+            self.right = np.where(ends < offsets[series + 1], ends, self.n)
+        self._valid_idx = None
+
+    def __len__(self):
+        return self.starts.shape[0]
+
+    def __repr__(self):
+        return "GapIndex(n=%d, gaps=%d, missing=%d)" % (self.n, len(self), self.n_missing)
+
+    @property
+    def n_missing(self):
+        return int(self.lengths.sum())
+
+    @property
+    def valid_idx(self):
+        """ Indices of the observed values. """
+        if self._valid_idx is None :
+            self._valid_idx = np.flatnonzero(~self.mask)
+        return self._valid_idx
+
+    @stage("maxgap")
+    def keep(self, maxgap = None):
+        """ Boolean array telling which gaps are imputed under `maxgap`. """
+        if maxgap is None :
+            return np.ones(len(self), dtype=bool)
+        return self.lengths <= maxgap
+
+    def positions(self, which = None):
+        """ Indices of the missing values of the selected gaps (all gaps by default). """
+        if use_loops(self.backend) and ((which is None) or (np.asarray(which).dtype == bool)) :
+            keep = np.ones(len(self), dtype=bool) if which is None else np.asarray(which)
+            out = np.empty(int(self.lengths[keep].sum()), dtype=np.int64)
+            kernel(gap_positions, self.backend)(self.starts, self.lengths, keep, out)
+            return out
+        starts, lengths = self.starts, self.lengths
+        if which is not None :
+            starts, lengths = starts[which], lengths[which]
+        offsets = np.cumsum(lengths) - lengths
+        return np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+
+    def nan_idx(self, maxgap = None):
+        """ Indices of the missing values that are imputed under `maxgap`. """
+        if maxgap is None :
+            return self.positions()
+        return self.positions(self.keep(maxgap))
+
+    def check(self, x):
+        """ Raise if this index does not describe a series shaped like `x`. """
+        if x.shape[0] != self.n :
+            raise ValueError("gaps was built for a series of length %d, got %d" % (self.n, x.shape[0]))
+        return self
+
+
+def gap_index(data):
+    """ Build the GapIndex of a series.
+
+    Parameters:
+        data: numpy.array, list or pandas.Series
+            Series to index.
+
+    Returns:
+        imputetspy.GapIndex gap table of the series.
+
+    Examples:
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_nh4()
+        >>> gaps = imputetspy.gap_index(data)
+        >>> gaps.starts, gaps.lengths
+    """
+    return GapIndex(np.isnan(np.asarray(data, dtype=float)))
+
+
+@stage("gaps")
+def get_gaps(x, gaps = None, backend = None):
+    """ Reuse `gaps` when given, otherwise index the missing values of `x`. """
+    if gaps is None :
+        return GapIndex(np.isnan(x), backend = backend)
+    return gaps.check(x)
@@ -0,0 +1,224 @@
+import functools
+import threading
+import time
+
+import numpy as np
+
+# Opt-in instrumentation of the public imputers. While no sink is set, the
+# wrappers below only test `_sink is None` and call through, so they can be
+# left in place on every call.
+_sink = None
+_memory = False
+_local = threading.local()
+
+
+class Collector(object):
+    """ In-memory sink keeping every record.
+
+    Attributes:
+        records: list of the records, oldest first.
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.instrument import Collector, enable, disable
+        >>> sink = enable(Collector())
+        >>> data_fill = imputetspy.locf(imputetspy.datasets.ts_nh4())
+        >>> disable()
+        >>> sink.records[0]["stages"]
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records = []
+
+    def to_frame(self):
+        """ The records as a pandas.DataFrame, one column per stage. """
+        import pandas as pd
+        rows = []
+        for r in self.records :
+            row = {k: v for k, v in r.items() if k != "stages"}
+            row.update(("stage_" + k, v) for k, v in r["stages"].items())
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def enable(sink = None, memory = False):
+    """ Start recording every call of the public imputers.
+
+    Each call produces one record, a dict handed to `sink`:
+
+        function    name of the imputer
+        seconds     wall time of the call
+        stages      seconds spent in "check_data" (input conversion), "gaps"
+                    (gap discovery), "maxgap" (gap filtering), "fit" (model
+                    fitting) and "impute" (the rest: the filling itself)
+        n           length of the series (rows of 2-D data, series of impute_batch)
+        missing     number of missing values
+        gap_hist    {bound: count}: number of gaps of length in (previous bound, bound], bounds being powers of two
+        bytes       peak memory allocated during the call (with `memory`, None otherwise)
+        error       the exception raised by the call, if any
+
+    Calls nested in a recorded call (the columns of a DataFrame, the
+    imputation of a deseasonalized series) add to its stages instead of
+    producing records of their own. Columns imputed by a thread pool are
+    recorded separately, by a process pool not at all.
+
+    Parameters:
+        sink: callable receiving each record, or None for a new `Collector`.
+        memory: measure `bytes` with tracemalloc. This slows down the Python loops of the imputers considerably.
+
+    Returns:
+        the sink.
+    """
+    global _sink, _memory
+    if sink is None :
+        sink = Collector()
+    if not callable(sink) :
+        raise TypeError("sink must be callable")
+    _sink, _memory = sink, memory
+    return sink
+
+
+def disable():
+    """ Stop recording. """
+    global _sink
+    _sink = None
+
+
+def enabled():
+    return _sink is not None
+
+
+class collect(object):
+    """ Context manager recording the calls of its block, see `enable`.
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.instrument import collect
+        >>> with collect() as sink :
+        ...     data_fill = imputetspy.na_ma(imputetspy.datasets.ts_nh4())
+        >>> sink.to_frame()
+    """
+
+    def __init__(self, sink = None, memory = False):
+        self.sink = Collector() if sink is None else sink
+        self.memory = memory
+
+    def __enter__(self):
+        self._previous = (_sink, _memory)
+        return enable(self.sink, self.memory)
+
+    def __exit__(self, *exc):
+        global _sink, _memory
+        _sink, _memory = self._previous
+        return False
+
+
+def gap_hist(lengths):
+    """ {bound: count} of gap lengths binned by powers of two, see `enable`. """
+    if lengths.shape[0] == 0 :
+        return {}
+    bins = np.bincount(np.ceil(np.log2(lengths)).astype(np.int64))
+    return {2 ** int(b): int(bins[b]) for b in np.flatnonzero(bins)}
+
+
+def _profile(data, rows = False):
+    """ n, missing values and gap histogram of the input of a call. """
+    from imputetspy.gaps import GapIndex
+    from imputetspy.utils import as_array
+    try :
+        x = as_array(data)
+        if x.dtype.kind not in "fc" :
+            x = np.asarray(x, dtype = float)
+    except (TypeError, ValueError) :
+        return {"n": len(data) if hasattr(data, "__len__") else None, "missing": None, "gap_hist": None}
+    mask = np.isnan(x)
+    n = mask.shape[0] if mask.ndim else 1
+    if mask.ndim == 2 :
+        # one series per column (per row with `rows`), cut at the series boundaries
+        if not rows :
+            mask = mask.T
+        step = max(mask.shape[1], 1)
+        mask = np.ascontiguousarray(mask).ravel()
+        lengths = GapIndex(mask, np.arange(0, mask.shape[0] + 1, step)).lengths
+    else :
+        lengths = GapIndex(mask.ravel()).lengths
+    return {"n": int(n), "missing": int(mask.sum()), "gap_hist": gap_hist(lengths)}
+
+
+def _record(func, args, kwargs, rows = False):
+    import tracemalloc
+    sink = _sink
+    record = {"function": func.__name__}
+    record.update(_profile(args[0] if args else kwargs.get("data"), rows))
+    stages = {}
+    tracing = _memory and not tracemalloc.is_tracing()
+    if tracing :
+        tracemalloc.start()
+    elif _memory :
+        tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0] if _memory else 0
+    _local.stages = stages
+    t = time.perf_counter()
+    try :
+        return func(*args, **kwargs)
+    except Exception as e :
+        record["error"] = "%s: %s" % (type(e).__name__, e)
+        raise
+    finally :
+        seconds = time.perf_counter() - t
+        _local.stages = None
+        record["bytes"] = (tracemalloc.get_traced_memory()[1] - base) if _memory else None
+        if tracing :
+            tracemalloc.stop()
+        stages["impute"] = max(0.0, seconds - sum(stages.values()))
+        record["seconds"] = seconds
+        record["stages"] = stages
+        sink(record)
+
+
+def instrumented(func = None, rows = False):
+    """ Decorator recording the calls of a public imputer while a sink is set.
+
+    With `rows` the rows of 2-D data are the series (as in `impute_batch`)
+    instead of the columns.
+    """
+    if func is None :
+        return functools.partial(instrumented, rows = rows)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if (_sink is None) or (getattr(_local, "stages", None) is not None) :
+            return func(*args, **kwargs)
+        return _record(func, args, kwargs, rows)
+    return wrapper
+
+
+def stage(name):
+    """ Decorator adding the time of a function to the `name` stage of the recorded call.
+
+    Stages do not nest: time spent in a stage called from another stage
+    belongs to the outer one.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None :
+                return func(*args, **kwargs)
+            stages = getattr(_local, "stages", None)
+            if (stages is None) or getattr(_local, "in_stage", False) :
+                return func(*args, **kwargs)
+            _local.in_stage = True
+            t = time.perf_counter()
+            try :
+                return func(*args, **kwargs)
+            finally :
+                stages[name] = stages.get(name, 0.0) + time.perf_counter() - t
+                _local.in_stage = False
+        return wrapper
+    return decorate
@@ -0,0 +1,583 @@
+import math
+import warnings
+from array import array
+
+import numpy as np
+from imputetspy.utils import check_data
+from imputetspy.columns import is_2d, impute_columns
+from imputetspy.gaps import get_gaps
+from imputetspy.backend import get_backend, kernel
+from imputetspy.instrument import instrumented, stage
+
+# Structural models in the sense of R's StructTS:
+#   "level": y = mu + eps, mu' = mu + xi                              (ARIMA(0,1,1))
+#   "trend": y = mu + eps, mu' = mu + beta + xi, beta' = beta + zeta  (ARIMA(0,2,2))
+# with variances h (eps), q1 (xi) and q2 (zeta). The overall scale is
+# concentrated out of the likelihood: the filter runs with variances that sum
+# to one, so that any of them (the noise included) can go to zero.
+# The recursions are written twice. The loops below run on scalars over
+# preallocated buffers, a handful of scalar operations per step; they are
+# compiled by numba ("numba" backend) or interpreted ("python"). The "numpy"
+# backend splits a pass in two: the state covariances depend only on which
+# values are missing, and settle to a steady state within a few steps of
+# every gap, so a Python loop only runs over those transients
+# (`_covariances`); given the gains, the states and the smoothed level are
+# linear recurrences, solved for the whole series by a blocked scan (`_scan`).
+# Both agree to rounding, about 1e-12 relative. The transients cost about
+# as much per step as the plain loop, so the "numpy" backend vectorizes only
+# series of at least VECTORIZE_MIN values with at most one gap per
+# VECTORIZE_SPARSE values, and interprets the loops otherwise.
+MODELS = {"level": 1, "trend": 2}
+# bound of the log variance ratios searched by the fit
+BOUND = 20.0
+# relative change of the predicted covariances below which they are steady
+STEADY = 1e-14
+VECTORIZE_MIN = 4096
+VECTORIZE_SPARSE = 16
+
+
+def _level_filter(y, q, h, af, pf):
+    """ Local level Kalman filter; returns the likelihood terms (ssq, slogf, nobs).
+
+    The filtered states and variances are written into `af` and `pf` unless
+    they are empty. The filtered level is NaN before the first observation
+    (diffuse prior).
+    """
+    n = len(y)
+    store = len(af) > 0
+    a, p = math.nan, math.inf
+    ssq, slogf, nobs = 0.0, 0.0, 0
+    for t in range(n) :
+        yt = y[t]
+        if yt == yt :
+            if a != a :
+                # diffuse start: the first observation sets the level
+                a, p = yt, h
+            else :
+                f = p + h
+                v = yt - a
+                a += p / f * v
+                ssq += v * v / f
+                slogf += math.log(f)
+                nobs += 1
+                p = p * h / f
+        if store :
+            af[t] = a
+            pf[t] = p
+        p += q
+    return ssq, slogf, nobs
+
+
+def _level_smooth(af, pf, q, s):
+    """ Rauch-Tung-Striebel smoother of `_level_filter`: smoothed level written into `s`. """
+    n = len(af)
+    st = af[n - 1]
+    s[n - 1] = st
+    for t in range(n - 2, -1, -1) :
+        at = af[t]
+        if at == at :
+            pt = pf[t]
+            st = at + pt / (pt + q) * (st - at)
+        s[t] = st
+
+
+def _trend_filter(y, q1, q2, h, fm, fb, f11, f12, f22):
+    """ Local linear trend Kalman filter (state level m, slope b; covariance p11, p12, p22).
+
+    Returns the likelihood terms (ssq, slogf, nobs) and writes the filtered
+    states and covariances into `fm`, `fb`, `f11`, `f12` and `f22` unless
+    they are empty. The level is NaN before the first observation; the slope
+    starts with a large (diffuse) variance and is identified by the second
+    observation.
+    """
+    n = len(y)
+    store = len(fm) > 0
+    p0 = 1e7 * max(h, q1, q2)
+    m, b = math.nan, 0.0
+    p11, p12, p22 = p0, 0.0, p0
+    ssq, slogf, nobs, seen = 0.0, 0.0, 0, 0
+    for t in range(n) :
+        yt = y[t]
+        if yt == yt :
+            if m != m :
+                m, p11, p12, p22 = yt, h, 0.0, p0
+                seen = 1
+            else :
+                f = p11 + h
+                v = yt - m
+                k1 = p11 / f
+                k2 = p12 / f
+                m += k1 * v
+                b += k2 * v
+                p22 -= k2 * p12
+                p12 = p12 * h / f
+                p11 = p11 * h / f
+                # the slope is still diffuse until the second observation
+                if seen >= 2 :
+                    ssq += v * v / f
+                    slogf += math.log(f)
+                    nobs += 1
+                seen += 1
+        if store :
+            fm[t] = m
+            fb[t] = b
+            f11[t] = p11
+            f12[t] = p12
+            f22[t] = p22
+        m += b
+        p11 += 2 * p12 + p22 + q1
+        p12 += p22
+        p22 += q2
+    return ssq, slogf, nobs
+
+
+def _trend_smooth(fm, fb, f11, f12, f22, q1, q2, s):
+    """ Rauch-Tung-Striebel smoother of `_trend_filter`: smoothed level written into `s`. """
+    n = len(fm)
+    sm, sb = fm[n - 1], fb[n - 1]
+    s[n - 1] = sm
+    for t in range(n - 2, -1, -1) :
+        p11, p12, p22 = f11[t], f12[t], f22[t]
+        # P T' and the predicted covariance T P T' + Q
+        c11, c12, c21, c22 = p11 + p12, p12, p12 + p22, p22
+        a11 = c11 + c21 + q1
+        a12 = c21
+        a22 = p22 + q2
+        det = a11 * a22 - a12 * a12
+        # J = P T' inv(T P T' + Q)
+        j11 = (c11 * a22 - c12 * a12) / det
+        j12 = (c12 * a11 - c11 * a12) / det
+        j21 = (c21 * a22 - c22 * a12) / det
+        j22 = (c22 * a11 - c21 * a12) / det
+        m, b = fm[t], fb[t]
+        if m != m :
+            # before the first observation: extrapolate the smoothed trend backwards
+            sm -= sb
+            s[t] = sm
+            continue
+        d1 = sm - (m + b)
+        d2 = sb - b
+        sm = m + j11 * d1 + j12 * d2
+        sb = b + j21 * d1 + j22 * d2
+        s[t] = sm
+
+
+def _runs(obs, start):
+    """ (begin, end, observed) of the runs of observed and missing values of obs[start:]. """
+    o = obs[start:]
+    if o.shape[0] == 0 :
+        return []
+    edges = np.flatnonzero(o[1:] != o[:-1]) + 1
+    begin = np.concatenate(([0], edges))
+    end = np.concatenate((edges, [o.shape[0]]))
+    return zip((begin + start).tolist(), (end + start).tolist(), o[begin].tolist())
+
+
+def _spans(begin, end):
+    """ Positions of the ranges [begin, end) concatenated, and the offset of each within its range. """
+    lengths = end - begin
+    offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(begin, lengths) + offset, offset
+
+
+def _covariances(obs, t0, start, step, gap):
+    """ Predicted state covariances at every position after the first observation `t0` (NaN up to t0).
+
+    `start` is the filtered covariance at t0, a tuple of its distinct terms;
+    step(s) returns the predicted and the filtered covariance of an
+    observation following the filtered covariance s, and gap(s, k) the
+    covariance predicted k steps after s without observations (for scalar
+    terms and for arrays of them). Within a run of observations the
+    covariance converges to its steady state: once a prediction no longer
+    changes (relative STEADY) the rest of the run keeps it. The loop only
+    steps through these transients; the gaps and the steady parts are
+    filled afterwards in one pass each.
+    """
+    pos, rows = [], []
+    steady, gaps = [], []
+    s = start
+    for b, e, o in _runs(obs, t0 + 1) :
+        if not o :
+            gaps.append((b, e) + s)
+            s = gap(s, e - b)
+            continue
+        prev = None
+        for t in range(b, e) :
+            a, s = step(s)
+            if (prev is not None) and all(abs(u - v) <= STEADY * abs(u) for u, v in zip(a, prev)) :
+                steady.append((t, e) + prev)
+                break
+            pos.append(t)
+            rows.append(a)
+            prev = a
+    ph = np.full((obs.shape[0], len(start)), np.nan)
+    if pos :
+        ph[pos] = rows
+    for runs, predict in ((steady, lambda r, k: r), (gaps, lambda r, k: gap(tuple(r), k + 1))) :
+        if runs :
+            runs = np.array(runs)
+            idx, k = _spans(runs[:, 0].astype(np.intp), runs[:, 1].astype(np.intp))
+            row = np.repeat(runs[:, 2:], runs[:, 1].astype(np.intp) - runs[:, 0].astype(np.intp), axis = 0).T
+            ph[idx] = np.column_stack(predict(row, k))
+    return ph
+
+
+def _scan(A, d):
+    """ Solution of the linear recurrence x[t] = A[t] @ x[t - 1] + d[t], x[-1] = 0, for A (n, k, k) and d (n, k).
+
+    The series is cut into about sqrt(n) blocks of about sqrt(n) steps. The
+    recurrence runs through all the blocks at once, from a zero state,
+    accumulating the products of A; a short loop over the block ends then
+    gives the state entering every block, and one vectorized pass adds its
+    contribution.
+    """
+    n, k = d.shape
+    block = max(16, int(math.sqrt(n)))
+    nb = -(-n // block)
+    pad = nb * block - n
+    if pad :
+        A = np.concatenate((A, np.broadcast_to(np.eye(k), (pad, k, k))))
+        d = np.concatenate((d, np.zeros((pad, k))))
+    # (block, k, k, blocks): step j of every block is contiguous
+    C = np.ascontiguousarray(A.reshape(nb, block, k, k).transpose(1, 2, 3, 0))
+    D = np.ascontiguousarray(d.reshape(nb, block, k).transpose(1, 2, 0))
+    for j in range(1, block) :
+        D[j] += np.einsum("ikr,kr->ir", C[j], D[j - 1])
+        C[j] = np.einsum("ikr,kjr->ijr", C[j], C[j - 1])
+    carry = np.zeros((k, nb))
+    x = np.zeros(k)
+    for r in range(1, nb) :
+        x = C[-1, :, :, r - 1] @ x + D[-1, :, r - 1]
+        carry[:, r] = x
+    D += np.einsum("bikr,kr->bir", C, carry)
+    return D.transpose(2, 0, 1).reshape(nb * block, k)[:n]
+
+
+def _level_filter_np(y, q, h, store):
+    """ `_level_filter` vectorized; returns ([filtered levels, variances] or [], ssq, slogf, nobs). """
+    n = y.shape[0]
+    obs = ~np.isnan(y)
+    idx = np.flatnonzero(obs)
+    if idx.shape[0] == 0 :
+        return ([np.full(n, np.nan), np.full(n, np.inf)] if store else []), 0.0, 0.0, 0
+    t0 = idx[0]
+
+    def step(s):
+        a = s[0] + q
+        return (a,), (a * h / (a + h),)
+
+    def gap(s, k):
+        return (s[0] + k * q,)
+
+    ph = _covariances(obs, t0, (h,), step, gap)[:, 0]
+    f = ph + h
+    yo = np.where(obs, y, 0.0)
+    # a[t] = h / f a[t - 1] + p / f y[t] at observations, a[t - 1] otherwise
+    c = np.where(obs, h / f, 1.0)
+    d = np.where(obs, ph / f * yo, 0.0)
+    c[:t0 + 1] = 0.0
+    d[:t0 + 1] = 0.0
+    d[t0] = y[t0]
+    af = _scan(c[:, None, None], d[:, None])[:, 0]
+    af[:t0] = np.nan
+    o = idx[1:]
+    v = y[o] - af[o - 1]
+    res = float(np.sum(v * v / f[o])), float(np.sum(np.log(f[o]))), o.shape[0]
+    if not store :
+        return ([],) + res
+    pf = np.where(obs, ph * h / f, ph)
+    pf[t0] = h
+    pf[:t0] = np.inf
+    return ([af, pf],) + res
+
+
+def _level_smooth_np(af, pf, q, s):
+    """ `_level_smooth` vectorized. """
+    n = af.shape[0]
+    seen = ~np.isnan(af)
+    with np.errstate(invalid = "ignore") :
+        # s[t] = J s[t + 1] + (1 - J) a[t], J = p / (p + q); s[t + 1] before the first observation
+        J = np.where(seen, pf / (pf + q), 1.0)
+        d = np.where(seen, q / (pf + q) * af, 0.0)
+    J[n - 1] = 0.0
+    d[n - 1] = af[n - 1]
+    s[:] = _scan(J[::-1, None, None], d[::-1, None])[::-1, 0]
+
+
+def _trend_filter_np(y, q1, q2, h, store):
+    """ `_trend_filter` vectorized; returns ([level, slope, p11, p12, p22] or [], ssq, slogf, nobs). """
+    n = y.shape[0]
+    obs = ~np.isnan(y)
+    idx = np.flatnonzero(obs)
+    p0 = 1e7 * max(h, q1, q2)
+    if idx.shape[0] == 0 :
+        return ([np.full(n, np.nan), np.zeros(n)] + [np.full(n, np.nan)] * 3 if store else []), 0.0, 0.0, 0
+    t0 = idx[0]
+
+    def step(s):
+        p11, p12, p22 = s
+        a11, a12, a22 = p11 + 2 * p12 + p22 + q1, p12 + p22, p22 + q2
+        f = a11 + h
+        return (a11, a12, a22), (a11 * h / f, a12 * h / f, a22 - a12 / f * a12)
+
+    def gap(s, k):
+        # k predictions without update, summed in closed form
+        p11, p12, p22 = s
+        k2 = k * (k - 1)
+        return (p11 + k * (2 * p12 + p22 + q1) + k2 * p22 + q2 * (k2 * (k - 2) / 3 + k2 / 2),
+                p12 + k * p22 + q2 * k2 / 2, p22 + k * q2)
+
+    ph11, ph12, ph22 = _covariances(obs, t0, (h, 0.0, p0), step, gap).T
+    f = ph11 + h
+    k1 = ph11 / f
+    k2 = ph12 / f
+    yo = np.where(obs, y, 0.0)
+    # (m, b)[t] = (I - K H) T (m, b)[t - 1] + K y[t] at observations, T (m, b)[t - 1] otherwise
+    A = np.empty((n, 2, 2))
+    A[:, 0, 0] = A[:, 0, 1] = np.where(obs, h / f, 1.0)
+    A[:, 1, 0] = np.where(obs, -k2, 0.0)
+    A[:, 1, 1] = np.where(obs, 1 - k2, 1.0)
+    d = np.column_stack((np.where(obs, k1 * yo, 0.0), np.where(obs, k2 * yo, 0.0)))
+    A[:t0 + 1] = 0.0
+    d[:t0 + 1] = 0.0
+    d[t0, 0] = y[t0]
+    x = _scan(A, d)
+    fm, fb = x[:, 0].copy(), x[:, 1].copy()
+    fm[:t0] = np.nan
+    # the slope is still diffuse until the second observation
+    o = idx[2:]
+    v = y[o] - (fm[o - 1] + fb[o - 1])
+    res = float(np.sum(v * v / f[o])), float(np.sum(np.log(f[o]))), o.shape[0]
+    if not store :
+        return ([],) + res
+    f11 = np.where(obs, ph11 * h / f, ph11)
+    f12 = np.where(obs, ph12 * h / f, ph12)
+    f22 = np.where(obs, ph22 - k2 * ph12, ph22)
+    f11[t0], f12[t0], f22[t0] = h, 0.0, p0
+    return ([fm, fb, f11, f12, f22],) + res
+
+
+def _trend_smooth_np(fm, fb, f11, f12, f22, q1, q2, s):
+    """ `_trend_smooth` vectorized. """
+    n = fm.shape[0]
+    seen = ~np.isnan(fm)
+    c11, c12, c21, c22 = f11 + f12, f12, f12 + f22, f22
+    a11 = c11 + c21 + q1
+    a12 = c21
+    a22 = f22 + q2
+    with np.errstate(invalid = "ignore", divide = "ignore") :
+        det = a11 * a22 - a12 * a12
+        J = np.empty((n, 2, 2))
+        J[:, 0, 0] = (c11 * a22 - c12 * a12) / det
+        J[:, 0, 1] = (c12 * a11 - c11 * a12) / det
+        J[:, 1, 0] = (c21 * a22 - c22 * a12) / det
+        J[:, 1, 1] = (c22 * a11 - c21 * a12) / det
+    # s[t] = J s[t + 1] + (x - J T x)[t]; before the first observation s[t] = inv(T) s[t + 1]
+    pm = fm + fb
+    d = np.column_stack((fm - J[:, 0, 0] * pm - J[:, 0, 1] * fb, fb - J[:, 1, 0] * pm - J[:, 1, 1] * fb))
+    J[~seen] = [[1.0, -1.0], [0.0, 1.0]]
+    d[~seen] = 0.0
+    J[n - 1] = 0.0
+    d[n - 1] = fm[n - 1], fb[n - 1]
+    s[:] = _scan(J[::-1], d[::-1])[::-1, 0]
+
+
+def _engine(x, backend = None):
+    """ How the passes over the series `x` run: "numba" (compiled loops), "python" (interpreted loops) or "numpy" (vectorized). """
+    name = get_backend(backend)
+    if name != "numpy" :
+        return name
+    n = x.shape[0]
+    if n < VECTORIZE_MIN :
+        return "python"
+    obs = np.isnan(x)
+    if VECTORIZE_SPARSE * np.count_nonzero(obs[1:] != obs[:-1]) > n :
+        return "python"
+    return "numpy"
+
+
+def _series(x, engine):
+    """ Observations as the filter indexes them fastest: a list of floats when interpreted, a float64 array otherwise. """
+    if engine == "python" :
+        return np.asarray(x, dtype = float).tolist()
+    return np.ascontiguousarray(x, dtype = float)
+
+
+def _buffer(n, engine):
+    """ Output buffer of the filter and smoother loops (empty for n = 0). """
+    if engine == "python" :
+        return array("d", bytes(8 * n))
+    return np.empty(n)
+
+
+def _weights(z):
+    """ Variances (h, q1[, q2]) summing to one from unconstrained log ratios to h. """
+    w = np.exp(np.concatenate(([0.0], z)) - max(0.0, np.max(z)))
+    return w / w.sum()
+
+
+def _run(y, model, w, store = False, engine = "python"):
+    """ Filter pass with variances `w` = (h, q1[, q2]); returns the filtered buffers and the likelihood terms. """
+    if engine == "numpy" :
+        if model == "level" :
+            return _level_filter_np(y, w[1], w[0], store)
+        return _trend_filter_np(y, w[1], w[2], w[0], store)
+    # level: states and variances; trend: level, slope and the three covariance terms
+    out = [_buffer(len(y) if store else 0, engine) for _ in range(2 if model == "level" else 5)]
+    if model == "level" :
+        res = kernel(_level_filter, engine)(y, w[1], w[0], *out)
+    else :
+        res = kernel(_trend_filter, engine)(y, w[1], w[2], w[0], *out)
+    return (out,) + tuple(res)
+
+
+def _loglik(y, model, z, engine = "python"):
+    _, ssq, slogf, nobs = _run(y, model, _weights(z), engine = engine)
+    if nobs == 0 :
+        return 0.0
+    # concentrated Gaussian log-likelihood, up to a constant
+    return -0.5 * (nobs * math.log(max(ssq, 1e-300) / nobs) + slogf)
+
+
+def _start(x, model):
+    """ Method of moments log ratios from the autocovariances of the differenced series. """
+    d = np.diff(x, n = MODELS[model])
+    with warnings.catch_warnings() :
+        # regular gaps leave some lag products all NaN; they count as zero
+        warnings.simplefilter("ignore", RuntimeWarning)
+        g = [np.nanmean(d * d)] + [np.nanmean(d[l:] * d[:-l]) for l in range(1, MODELS[model] + 1)]
+    g = np.nan_to_num(g)
+    eps = 1e-4 * max(g[0], 1e-12)
+    if model == "level" :
+        h = max(-g[1], eps)
+        q = [max(g[0] - 2 * h, eps)]
+    else :
+        h = max(g[2], eps)
+        q1 = max(-g[1] - 4 * h, eps)
+        q = [q1, max(g[0] - 2 * q1 - 6 * h, eps)]
+    return np.clip(np.log(np.array(q) / h), -BOUND, BOUND)
+
+
+@stage("fit")
+def fit_kalman(data, model = "trend", backend = None):
+    """ Maximum likelihood variances of a structural model.
+
+    The overall scale is concentrated out of the likelihood and the log
+    ratios of the variances to the noise variance are optimized with
+    scipy.optimize.minimize (Nelder-Mead), starting from method of moments
+    estimates on the differenced series.
+
+    Parameters:
+        data: numpy.array, list or pandas.Series
+        model: "level" (local level) or "trend" (local linear trend).
+        backend: "numba" compiles the filter, "numpy" vectorizes it on long series and "python" interprets it (see `imputetspy.set_backend`).
+
+    Returns:
+        dict of variances: "level", "slope" (trend model only) and "noise".
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.kalman import fit_kalman
+        >>> params = fit_kalman(imputetspy.datasets.ts_nh4(), model = "level")
+    """
+    from scipy.optimize import minimize
+
+    if model not in MODELS :
+        raise ValueError("model must be 'level' or 'trend'")
+    x = check_data(data)
+    valid = x[~np.isnan(x)]
+    if valid.shape[0] <= MODELS[model] + 1 :
+        raise ValueError("na_kalman needs more than %d observed values" % (MODELS[model] + 1))
+    engine = _engine(x, backend)
+    y = _series(x, engine)
+    res = minimize(lambda z: -_loglik(y, model, z, engine), _start(x, model),
+                   method = "Nelder-Mead", bounds = [(-BOUND, BOUND)] * MODELS[model],
+                   # finite difference gradients drown in rounding noise on long series, so the
+                   # search is derivative free; 0.05 on the log ratios is ~5% on the variances
+                   options = {"xatol": 0.05, "fatol": 0.01, "maxfev": 200})
+    w = _weights(res.x)
+    _, ssq, _, nobs = _run(y, model, w, engine = engine)
+    w = w * ssq / max(nobs, 1)
+    params = {"level": w[1], "noise": w[0]}
+    if model == "trend" :
+        params["slope"] = w[2]
+    return params
+
+
+def kalman_states(x, model, params, smooth = True, backend = None):
+    """ Smoothed (or filtered) level of the structural model at every position of `x`. """
+    w = np.array([params["noise"], params["level"]] + ([params["slope"]] if model == "trend" else []), dtype = float)
+    if (np.any(w < 0)) or (w.sum() <= 0) :
+        raise ValueError("params must hold non negative variances, not all zero")
+    w = w / w.sum()
+    engine = _engine(x, backend)
+    out, _, _, _ = _run(_series(x, engine), model, w, store = True, engine = engine)
+    if smooth :
+        s = _buffer(x.shape[0], engine)
+        if model == "level" :
+            (_level_smooth_np if engine == "numpy" else kernel(_level_smooth, engine))(out[0], out[1], w[1], s)
+        else :
+            (_trend_smooth_np if engine == "numpy" else kernel(_trend_smooth, engine))(*out, w[1], w[2], s)
+    else :
+        s = out[0]
+    s = np.frombuffer(s, dtype = float)
+    if not smooth :
+        # the filter knows nothing before the first observation: use the first filtered level
+        first = np.flatnonzero(~np.isnan(x))[:1]
+        s[:first[0] if first.shape[0] else 0] = s[first] if first.shape[0] else np.nan
+    return s
+
+
+@instrumented
+def na_kalman(data, model = "trend", smooth = True, params = None, maxgap = None, gaps = None,
+              n_jobs = None, executor = "thread", inplace = False, out = None, backend = None) :
+    """ Missing Value Imputation by Kalman Smoothing
+
+    Fits a structural time series model by maximum likelihood and replaces
+    the missing values by the Kalman smoothed (or filtered) level. Missing
+    observations are handled by skipping the update step of the filter. The
+    filter and the Rauch-Tung-Striebel smoother run in linear time; each
+    likelihood evaluation of the fit is one filter pass. With numba installed
+    the loops are compiled; without it long series are filtered and smoothed
+    vectorized (see `imputetspy.set_backend`).
+
+    Parameters:
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
+            Data to impute.
+        model: "trend" (local linear trend, what R's StructTS fits on non seasonal data, the default) or "level" (local level, a random walk plus noise).
+        smooth: if True use the Kalman smoother (all observations), otherwise the Kalman filter (past observations only).
+        params: optional dict of variances ("level", "slope" for the trend model, "noise") to skip the maximum likelihood fit, e.g. the result of `imputetspy.kalman.fit_kalman`.
+        maxgap: Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA.
+        gaps: imputetspy.GapIndex of `data` (see `imputetspy.gap_index`).
+        n_jobs: number of workers used when `data` is a pandas.DataFrame or 2-D numpy.array; every column is fitted and imputed independently.
+        executor: "thread" (default), "process" or a concurrent.futures.Executor running the columns when `n_jobs` is set. Without numba short or gappy columns are filtered by interpreted Python, so use "process" to run them in parallel.
+        inplace: if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy.
+        out: numpy.array receiving the result, with the same shape as `data`.
+        backend: None for the global setting, or "numba", "numpy" or "python" for this call (see `imputetspy.set_backend`).
+
+    Returns:
+        numpy.array imputed data (pandas.DataFrame for DataFrame input).
+
+    Examples:
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_nh4()
+        >>> data_fill = imputetspy.na_kalman(data)
+        >>> data_fill_level = imputetspy.na_kalman(data, model = "level", maxgap = 10)
+    """
+    if is_2d(data) :
+        return impute_columns(na_kalman, data, n_jobs, executor, model = model, smooth = smooth,
+                              params = params, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, backend = backend)
+
+    if model not in MODELS :
+        raise ValueError("model must be 'level' or 'trend'")
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps, backend)
+    nan_idx = gaps.nan_idx(maxgap)
+    if nan_idx.shape[0] == 0 :
+        return x
+    if params is None :
+        params = fit_kalman(x, model, backend)
+    level = kalman_states(np.asarray(x, dtype = float), model, params, smooth, backend)
+    x[nan_idx] = level[nan_idx]
+    return x
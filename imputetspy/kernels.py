@@ -0,0 +1,158 @@
+import math
+import numpy as np
+
+# Loop kernels of the gap-walking methods. They are written in the subset of
+# Python that numba compiles (scalars, numpy arrays, no None arguments and no
+# calls to other Python functions), so `imputetspy.backend.kernel` can hand
+# out either the function itself or its numba compilation. Each kernel
+# reproduces the arithmetic of the numpy code it replaces operation by
+# operation, so both backends give identical results.
+
+
+def gap_runs(mask, starts, lengths):
+    """ Runs of True in `mask`.
+
+    Writes the start and length of each run into `starts` and `lengths` as
+    long as they have room, and returns the number of runs; call it with
+    empty arrays to size them.
+    """
+    n = mask.shape[0]
+    room = starts.shape[0]
+    k = 0
+    i = 0
+    while i < n :
+        if mask[i] :
+            j = i + 1
+            while (j < n) and mask[j] :
+                j += 1
+            if k < room :
+                starts[k] = i
+                lengths[k] = j - i
+            k += 1
+            i = j
+        else :
+            i += 1
+    return k
+
+
+def gap_positions(starts, lengths, keep, out):
+    """ Positions of the missing values of the gaps selected by `keep`, written into `out`. """
+    k = 0
+    for g in range(starts.shape[0]) :
+        if keep[g] :
+            for i in range(starts[g], starts[g] + lengths[g]) :
+                out[k] = i
+                k += 1
+    return k
+
+
+def carry_gaps(x, starts, lengths, src, alt, keep, rev, fill_mean, mean):
+    """ LOCF / NOCB of the selected gaps of `x` in place, from the neighbour `src` of each gap.
+
+    Gaps without that neighbour take their other neighbour `alt` when `rev`
+    is set, or `mean` when `fill_mean` is set, and stay NaN otherwise.
+    """
+    n = x.shape[0]
+    for g in range(starts.shape[0]) :
+        if not keep[g] :
+            continue
+        s = src[g]
+        if (s < 0) or (s >= n) :
+            s = alt[g]
+            if rev and (s >= 0) and (s < n) :
+                v = x[s]
+            elif fill_mean :
+                v = mean
+            else :
+                continue
+        else :
+            v = x[s]
+        for i in range(starts[g], starts[g] + lengths[g]) :
+            x[i] = v
+
+
+def ma_windows(vals, start, pos, stop, weighting, tv, tq, median, out):
+    """ Weighted moving average (or median) of every window of `vals`, see `utils.window_reduce`.
+
+    `weighting` is 0 (none), 1 ("linear") or 2 ("exponential"). With `tv` and
+    `tq` not empty the "linear" weights follow the time distance; exponential
+    time weights are left to numpy, whose vectorized pow can differ from the
+    scalar one in the last bit. Sums use the pairwise summation of numpy (8
+    accumulators on blocks of up to 128 values, halving above), so means
+    match numpy.mean to the last bit.
+    """
+    m = start.shape[0]
+    width = 1
+    for i in range(m) :
+        width = max(width, stop[i] - start[i])
+    buf = np.empty(width)
+    acc = np.empty(8)
+    # explicit stack of the pairwise summation: (offset, length, combine) tasks and partial sums
+    t_lo = np.empty(192, dtype=np.int64)
+    t_n = np.empty(192, dtype=np.int64)
+    t_sum = np.empty(192, dtype=np.int64)
+    part = np.empty(192)
+    timed = tv.shape[0] > 0
+    for i in range(m) :
+        a = start[i]
+        n_left = pos[i] - a
+        w = stop[i] - a
+        if w == 0 :
+            out[i] = math.nan
+            continue
+        for j in range(w) :
+            v = vals[a + j]
+            if weighting > 0 :
+                if timed :
+                    wt = 1 / (1 + abs(tv[a + j] - tq[i]))
+                else :
+                    rank = j if j < n_left else j - n_left
+                    wt = 1 / (rank + 2) if weighting == 1 else math.pow(0.5, rank + 1)
+                v = wt * v
+            buf[j] = v
+        if median :
+            s = np.sort(buf[:w])
+            h = w // 2
+            out[i] = s[h] if w % 2 else (s[h - 1] + s[h]) / 2
+            continue
+        t_lo[0] = 0
+        t_n[0] = w
+        t_sum[0] = 0
+        top = 1
+        k = 0
+        while top > 0 :
+            top -= 1
+            lo = t_lo[top]
+            n = t_n[top]
+            if t_sum[top] :
+                k -= 1
+                part[k - 1] = part[k - 1] + part[k]
+            elif n < 8 :
+                res = 0.0
+                for j in range(lo, lo + n) :
+                    res += buf[j]
+                part[k] = res
+                k += 1
+            elif n <= 128 :
+                for q in range(8) :
+                    acc[q] = buf[lo + q]
+                j = 8
+                while j < n - (n % 8) :
+                    for q in range(8) :
+                        acc[q] += buf[lo + j + q]
+                    j += 8
+                res = ((acc[0] + acc[1]) + (acc[2] + acc[3])) + ((acc[4] + acc[5]) + (acc[6] + acc[7]))
+                while j < n :
+                    res += buf[lo + j]
+                    j += 1
+                part[k] = res
+                k += 1
+            else :
+                half = n // 2
+                half -= half % 8
+                # combine once both halves are summed; the left half is popped first
+                t_lo[top], t_n[top], t_sum[top] = 0, 0, 1
+                t_lo[top + 1], t_n[top + 1], t_sum[top + 1] = lo + half, n - half, 0
+                t_lo[top + 2], t_n[top + 2], t_sum[top + 2] = lo, half, 0
+                top += 3
+        out[i] = part[0] / w
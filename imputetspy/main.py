@@ -1,18 +1,29 @@
+from functools import partial
 import numpy as np
-import pandas as pd
-from imputetspy.utils import check_data, consecutive, power_exp, stineman_interp, slopes
-from imputetspy.datasets import ts_airgap, ts_heating, ts_nh4
-from scipy import stats
-from scipy.stats import gmean, hmean, mode
-from scipy.interpolate import interp1d
-
-
+from imputetspy.utils import check_data, stineman_interp, slopes, carry_fill, \
+    window_bounds, window_reduce, window_apply, carry_fill_2d, stat_fill_2d, \
+    linear_fill, nearest_fill, spline_fill, at_times, get_rng, random_draw, random_fill_2d, \
+    group_stat, local_stat, window_loop, linear_fill_2d, ma_fill_2d
+from imputetspy.columns import is_2d, impute_columns
+from imputetspy.gaps import get_gaps
+from imputetspy.timeaxis import time_axis, time_keep, group_labels
+from imputetspy.backend import use_loops
+from imputetspy.instrument import instrumented
+from imputetspy.cache import cached
+# scipy is imported inside the functions that need it, so that
+# `import imputetspy` and the numpy-only imputers start fast
+
+
+@instrumented
+@cached
 def na_ma(data, k = 4, func='mean', 
-                weighting = None, maxgap = None) :
+                weighting = None, maxgap = None, gaps = None,
+                n_jobs = None, executor = "thread", inplace = False, out = None, time = None,
+                backend = None) :
     """ Missing value replacement by weighted moving average. Uses semi-adaptive window size to ensure all NAs are replaced    
     
     Parameters:
-        data: numpy.array, list or pandas.Series
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
                 Data to impute.
                 
         k: integer width of the moving average window. Expands to both sides of the center element e.g. k=2 means 4 observations (2 left, 2 right) are taken into account. If all observations in the current window are NA, the window size is automatically increased until there are at least 2 non-NA values present.
@@ -26,8 +37,20 @@ def na_ma(data, k = 4, func='mean',
                                 * "exponential" - Exponential Weighted Moving Average (EWMA)
                                 
         maxgap: Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA. This option mostly makes sense if you want to treat long runs of NA afterwards separately.
+
+        gaps: imputetspy.GapIndex of `data` (see `imputetspy.gap_index`). Pass it to reuse the gap discovery when the same series is imputed several times.
+
+        n_jobs: number of workers used when `data` is a pandas.DataFrame or 2-D numpy.array; every column is imputed independently. None runs serially, -1 uses every CPU.
+
+        executor: "thread" (default), "process" or a concurrent.futures.Executor running the columns when `n_jobs` is set.
+
+        inplace: if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+
+        out: numpy.array receiving the result, with the same shape as `data`.
+        time: None (unit spacing, the default), "index" to use the DatetimeIndex or numeric index of a pandas.Series, or an array of timestamps or numbers with one value per sample. The series is not resampled: distances are measured on this axis and `maxgap` becomes a duration ("2h", pandas.Timedelta, or a number for numeric axes), the time between the observations around a gap. With a `weighting`, the weights follow the time distance d in sampling steps (the median spacing): 1/(1 + d) for "linear" and 1/2^d for "exponential".
+        backend: None for the global setting, or "numpy" / "numba" for this call (see `imputetspy.set_backend`). With numba the mean and median windows are computed by a compiled loop instead of being gathered into blocks; results are identical.
     Returns:
-        numpy.array imputed data.
+        numpy.array imputed data (pandas.DataFrame for DataFrame input).
     
     Examples:
     
@@ -38,103 +61,101 @@ def na_ma(data, k = 4, func='mean',
     
     """
     
+    if is_2d(data) :
+        # mean and median windows of every column at once, unless the loop kernels are asked for
+        block = (k // 2 > 0) and (func in ("mean", "median")) and ((func == "mean") or (weighting == None)) \
+            and (weighting in (None, "linear", "exponential")) and not use_loops(backend)
+        return impute_columns(na_ma, data, n_jobs, executor, kernel = ma_fill_2d if block else None,
+                              k = k, func = func, weighting = weighting, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, time = time,
+                              **({} if block else {"backend": backend}))
+
     if (func != 'mean') & (weighting != None) :
-        raise("weighting only can be used only if func = np.mean!!!!")
+        raise ValueError("weighting only can be used only if func = np.mean!!!!")
+    if weighting not in (None, "linear", "exponential") :
+        raise ValueError('please specify correct weighting!!!!')
     
     if func == 'mean':
         func = np.mean
     elif func == 'median':
         func = np.median
     elif func == 'mode':
+        from scipy import stats
         func =  stats.mode
     else:
         func = func
 
-    x = check_data(data)
-    idx = np.arange(x.shape[0])
-    nan_idx = idx[np.isnan(x)]
-    non_nan_idx = idx[np.isnan(x) == False]
-    if maxgap != None :
-        z = consecutive(nan_idx)
-        exc = []
-        for i in range(len(z)) :
-            if len(z[i]) > maxgap :
-                exc.extend(z[i])
-        nan_idx = nan_idx[np.isin(nan_idx, exc) == False]
-    else :
-        pass
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps, backend)
+    t, is_datetime = time_axis(data, time, x.shape[0])
+    nan_idx = gaps.positions(time_keep(gaps, maxgap, t, is_datetime))
+    non_nan_idx = gaps.valid_idx
     prev_k = k//2
-    inp = []
-    if weighting == None :
-        for i in nan_idx :
-            try :
-                prv = non_nan_idx[(i - non_nan_idx) > 0][-prev_k:]
-            except :
-                prv = []
-            try :
-                nxt = non_nan_idx[(non_nan_idx - i) > 0][:prev_k]
-            except :
-                nxt = []
-            to_mv = np.append(prv, nxt)
-            inp.append(func(x[to_mv]))
-    elif weighting == "linear" :
-        for i in nan_idx :
-            try :
-                prv = non_nan_idx[(i - non_nan_idx) > 0][-prev_k:]
-                prv = (1/(np.arange(len(prv)) + 2)) * x[prv]
-            except :
-                prv = []
-            try :
-                nxt = non_nan_idx[(non_nan_idx - i) > 0][:prev_k]
-                nxt = (1/(np.arange(len(nxt)) + 2)) * x[nxt]
-            except :
-                nxt = []
-            to_mv = np.append(prv, nxt)
-            inp.append(np.mean(to_mv))    
-    elif weighting == "exponential" :
-        for i in nan_idx :
-            try :
-                prv = non_nan_idx[(i - non_nan_idx) > 0][-prev_k:]
-                prv = power_exp(len(prv)) * x[prv]
-            except :
-                prv = []
-            try :
-                nxt = non_nan_idx[(non_nan_idx - i) > 0][:prev_k]
-                nxt = power_exp(len(nxt)) * x[nxt]
-            except :
-                nxt = []
-            to_mv = np.append(prv, nxt)
-            inp.append(np.mean(to_mv))
+    start, pos, stop = window_bounds(non_nan_idx, nan_idx, prev_k)
+    tv = tq = None
+    if (t is not None) & (weighting != None) :
+        # time distances in sampling steps, so the weights do not depend on the time unit
+        step = np.median(np.diff(t)) if t.shape[0] > 1 else 1.0
+        tv, tq = t[non_nan_idx] / step, t[nan_idx] / step
+    # the loop kernel sums in float64 and takes exponential time weights from numpy only
+    loops = use_loops(backend) & (x.dtype == np.float64) & ((tv is None) | (weighting != "exponential"))
+    if loops & ((func is np.mean) | ((func is np.median) & (weighting == None))) :
+        inp = window_loop(x[non_nan_idx], start, pos, stop, func is np.median, weighting, tv, tq, backend)
+    elif (prev_k > 0) & ((func is np.mean) | ((func is np.median) & (weighting == None))) :
+        inp = window_reduce(x[non_nan_idx], start, pos, stop, func, weighting, tv, tq)
     else :
-        raise('please specify correct weighting!!!!')
+        inp = window_apply(x[non_nan_idx], start, pos, stop, func, weighting, tv, tq)
     x[nan_idx] = inp
     return x
 
 
 
-def na_mean(data, option = "mean", maxgap = None) :
+@instrumented
+@cached
+def na_mean(data, option = "mean", maxgap = None, gaps = None,
+            n_jobs = None, executor = "thread", inplace = False, out = None,
+            window = None, groups = None) :
     """ Missing Value Imputation by overall Average values (can use median & mode as well)
         
+    Every statistic is computed with numpy from the observed values of the
+    series, in one reduction. With `window` each gap gets the statistic of
+    its own neighbourhood, and with `groups` each missing value gets the
+    statistic of its group (e.g. its hour of the day).
 
     Parameters:
 
-        data (float): numpy.array, list or pandas.Series data to impute.
+        data (float): numpy.array, list, pandas.Series or pandas.DataFrame data to impute.
         option (string): Algorithm to be used. Accepts these following input:  
 
                 - "mean" - take the mean for imputation (default choice)\n
                 - "median" - take the median for imputation\n
-                - "mode" - take the mode for imputation\n
-                - "harmonic" - take the harmonic mean\n
-                - "geometric" - take the geometric mean\n    
+                - "mode" - take the mode (the most frequent value, the smallest one among ties) for imputation\n
+                - "harmonic" - take the harmonic mean (NaN if a value is not positive)\n
+                - "geometric" - take the geometric mean (NaN if a value is not positive)\n    
 
         maxgap (int): Maximum number of successive NAs to still perform imputation on. 
                 Default setting is to replace all NAs without limitation. 
                 With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA. 
                 This option mostly makes sense if you want to treat long runs of NA afterwards separately.
+        gaps (GapIndex): gap table of `data` (see `imputetspy.gap_index`). 
+                Pass it to reuse the gap discovery when the same series is imputed several times.
+        n_jobs (int): number of workers used when `data` is a pandas.DataFrame or 2-D numpy.array; 
+                every column is imputed independently. The overall "mean" and "median" are vectorized along axis 0 and ignore it. 
+                None runs serially, -1 uses every CPU.
+        executor (string): "thread" (default), "process" or a concurrent.futures.Executor running the columns when `n_jobs` is set.
+        inplace (bool): if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. 
+                The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+        out (numpy.array): array receiving the result, with the same shape as `data`.
+        window (int): if set, every gap is filled with the statistic of the observations at most `window` 
+                positions before and after it instead of the whole series.
+        groups: if set, every missing value is filled with the statistic of the observations of its group. 
+                An array with one label per sample, or the name of a field of the DatetimeIndex of a 
+                pandas.Series / DataFrame such as "hour", "dayofweek" or "month". 
+                Missing values of groups without observations are left NA.
         
     
     Returns:
-        numpy array imputed data.
+        numpy array imputed data (pandas.DataFrame for DataFrame input).
     
     Examples:
     
@@ -142,55 +163,88 @@ def na_mean(data, option = "mean", maxgap = None) :
         >>> data = imputetspy.datasets.ts_nh4()
         >>> data_fill_mean = imputetspy.na_mean(data, option = 'mean')
         >>> data_fill_med = imputetspy.na_mean(data, option = 'median')
+        >>> data_fill_local = imputetspy.na_mean(data, window = 48)
     
     """
     
+    if is_2d(data) :
+        if groups is not None :
+            groups = group_labels(data, groups, np.shape(data)[0])
+        overall = (option in ("mean", "median")) and (window is None) and (groups is None)
+        return impute_columns(na_mean, data, n_jobs, executor, kernel = stat_fill_2d if overall else None,
+                              option = option, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out,
+                              **({} if overall else {"window": window, "groups": groups}))
+
+    if option not in ("mean", "median", "mode", "harmonic", "geometric") :
+        raise ValueError("option must be 'mean', 'median', 'mode', 'harmonic' or 'geometric'")
+    if (window is not None) and (groups is not None) :
+        raise ValueError("window and groups can not be used together")
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps)
+    valid = gaps.valid_idx
+
+    if window is not None :
+        if (int(window) != window) or (window < 1) :
+            raise ValueError("window must be a positive integer")
+        keep = gaps.keep(maxgap)
+        val = local_stat(x, gaps, keep, int(window), option)
+        x[gaps.positions(keep)] = np.repeat(val, gaps.lengths[keep])
+        return x
+    
+    nan_idx = gaps.nan_idx(maxgap)
+    if groups is not None :
+        labels, codes = np.unique(group_labels(data, groups, x.shape[0]), return_inverse = True)
+        codes = codes.ravel()
+        val = group_stat(x[valid], codes[valid], labels.shape[0], option)
+        x[nan_idx] = val[codes[nan_idx]]
+        return x
 
-    x = check_data(data)
-    idx = np.arange(x.shape[0])
-    nan_idx = idx[np.isnan(x)]
-    non_nan_idx = idx[np.isnan(x) == False]
-    if maxgap != None :
-        z = consecutive(nan_idx)
-        exc = []
-        for i in range(len(z)) :
-            if len(z[i]) > maxgap :
-                exc.extend(z[i])
-        nan_idx = nan_idx[np.isin(nan_idx, exc) == False]
-    else :
-        pass
-    
     if option == "mean" :
         val = np.nanmean(x)
     elif option == "median" :
         val = np.nanmedian(x)
-    elif option == "harmonic" :
-        val = hmean(x[np.isnan(x)])
-    elif option == "geometric" :
-        val = gmean(x[np.isnan(x)])
-    elif option == "mode" :
-        val = mode(x[np.isnan(x)])
+    else :
+        val = group_stat(x[valid], np.zeros(valid.shape[0], dtype=np.int64), 1, option)[0]
     
     x[nan_idx] = val
     
     return x
 
 
-def na_random(data, lower_bound = None, upper_bound = None, maxgap = None) :
+@instrumented
+@cached
+def na_random(data, lower_bound = None, upper_bound = None, maxgap = None, gaps = None,
+              n_jobs = None, executor = "thread", inplace = False, out = None,
+              rng = None, distribution = "uniform") :
     """ Missing Value Imputation by Random Sample
     
     Replaces each missing value by drawing a random sample between two given bounds based on uniform distribution.
+    All values are drawn in one vectorized call.
     
     Parameters:
-        data (float): numpy.array, list or pandas.Series data to impute.
+        data (float): numpy.array, list, pandas.Series or pandas.DataFrame data to impute.
         lower_bound (float): minimum number of the random data (lower bound of uniform distribution), if empty the parameter will be the minimum of the data.
         upper_bound (float): maximum number of the random data (upper bound of uniform distribution), if empty the parameter will be the maximum of the data.
         maxgap (int): Maximum number of successive NAs to still perform imputation on. 
                 Default setting is to replace all NAs without limitation. 
                 With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA. 
                 This option mostly makes sense if you want to treat long runs of NA afterwards separately.
+        gaps (GapIndex): gap table of `data` (see `imputetspy.gap_index`). 
+                Pass it to reuse the gap discovery when the same series is imputed several times.
+        n_jobs (int): accepted for symmetry with the other imputers. The columns of a pandas.DataFrame or 2-D numpy.array
+                are filled in one vectorized draw, column after column.
+        executor (string): accepted for symmetry with the other imputers, see `n_jobs`.
+        inplace (bool): if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. 
+                The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+        out (numpy.array): array receiving the result, with the same shape as `data`.
+        rng: source of randomness. None (default) uses the global numpy.random state, so numpy.random.seed applies.
+                A numpy.random.Generator is used as is, and an int or numpy.random.SeedSequence seeds a new Generator.
+                For independent streams in parallel workers pass each worker a child of SeedSequence.spawn.
+        distribution (string): "uniform" (default) draws uniformly between the bounds,
+                "empirical" resamples the observed values lying between the bounds.
     Returns:
-        numpy.array Imputed data.
+        numpy.array Imputed data (pandas.DataFrame for DataFrame input).
     
     Examples:
 
@@ -198,42 +252,37 @@ def na_random(data, lower_bound = None, upper_bound = None, maxgap = None) :
         
         >>> data = imputetspy.datasets.ts_nh4()
         
-        >>> data_fill_random = imputetspy.na_random(data, lower_bound = min(data_fill_random) , upper_bound = max(data_fill_random))
+        >>> data_fill_random = imputetspy.na_random(data, lower_bound = 0, upper_bound = 10, rng = 42)
+        >>> data_fill_empirical = imputetspy.na_random(data, distribution = "empirical", rng = 42)
 
     
     """
-    x = check_data(data)
-    idx = np.arange(x.shape[0])
-    nan_idx = idx[np.isnan(x)]
-    
-    if maxgap != None :
-        z = consecutive(nan_idx)
-        exc = []
-        for i in range(len(z)) :
-            if len(z[i]) > maxgap :
-                exc.extend(z[i])
-        nan_idx = nan_idx[np.isin(nan_idx, exc) == False]
-    else :
-        pass
-    
-    if lower_bound == None :
-        lower_bound = np.nanmin(x)
-    
-    
-    if upper_bound == None :
-        upper_bound = np.nanmax(x)
-        
-    inp = []
-    for i in range(len(nan_idx)) : 
-        inp.append(np.random.uniform(lower_bound, upper_bound))
-        
-    
-    x[nan_idx] = inp
+    if is_2d(data) :
+        return impute_columns(na_random, data, n_jobs, executor, kernel = random_fill_2d,
+                              lower_bound = lower_bound, upper_bound = upper_bound, maxgap = maxgap,
+                              gaps = gaps, inplace = inplace, out = out, rng = rng,
+                              distribution = distribution)
+
+    if distribution not in ("uniform", "empirical") :
+        raise ValueError("distribution must be 'uniform' or 'empirical'")
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps)
+    nan_idx = gaps.nan_idx(maxgap)
+    if nan_idx.shape[0] == 0 :
+        return x
+    valid = gaps.valid_idx
+    # a single column: every cell and every observation belongs to column 0
+    x[nan_idx] = random_draw(get_rng(rng), np.zeros(nan_idx.shape[0], dtype=np.int64), x[valid],
+                             np.zeros(valid.shape[0], dtype=np.int64), 1,
+                             lower_bound, upper_bound, distribution)
     
     return x
 
 
-def locf(data, na_remaining = "rev", maxgap = None):
+@instrumented
+@cached
+def locf(data, na_remaining = "rev", maxgap = None, gaps = None,
+         n_jobs = None, executor = "thread", inplace = False, out = None, time = None, backend = None):
     """ Last Observation Carried Forward
     
     For each set of missing indices, use the value of one row before(same
@@ -243,16 +292,23 @@ def locf(data, na_remaining = "rev", maxgap = None):
     before will be filled with this value.
     
     Parameters:
-        data: numpy.array, list or pandas.Series
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
             Data to impute.
         na_remaining : Method to be used for remaining nan (if missing number apear in the first observation) :
             "keep" - to return the series with NAs
             "mean" - to replace remaining NAs by overall mean
             "rev" - to perform nocb / locf from the reverse direction
         maxgap : Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive nan runs, that are longer than 'maxgap' will be left nan. This option mostly makes sense if you want to treat long runs of nan afterwards separately
+        gaps : imputetspy.GapIndex of `data` (see `imputetspy.gap_index`). Pass it to reuse the gap discovery when the same series is imputed several times.
+        n_jobs : accepted for symmetry with the other imputers. The columns of a pandas.DataFrame or 2-D numpy.array are filled in one pass vectorized along axis 0.
+        executor : accepted for symmetry with the other imputers, see `n_jobs`.
+        inplace : if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+        out : numpy.array receiving the result, with the same shape as `data`.
+        time : None (unit spacing, the default), "index" to use the DatetimeIndex or numeric index of a pandas.Series, or an array of timestamps or numbers with one value per sample. The series is not resampled: distances are measured on this axis and `maxgap` becomes a duration ("2h", pandas.Timedelta, or a number for numeric axes), the time between the observations around a gap.
+        backend : None for the global setting, or "numpy" / "numba" for this call (see `imputetspy.set_backend`). With numba the gaps are walked by compiled loops, and the columns of 2-D data are filled one by one.
     
     Returns:
-        numpy.array imputed data.
+        numpy.array imputed data (pandas.DataFrame for DataFrame input).
         
     Examples:
         >>> import imputetspy
@@ -263,65 +319,48 @@ def locf(data, na_remaining = "rev", maxgap = None):
         >>> data_fill_nocb = imputetspy.nocb(data)
     
     """
-    data = check_data(data)
-    nan_xy = np.argwhere(np.isnan(data))
-    nan_xy_idx = np.array([x[0] for x in nan_xy])
-    
-    if maxgap != None :
-        z = consecutive(nan_xy_idx)
-        exc = []
-        for i in range(len(z)) :
-            if len(z[i]) > maxgap :
-                exc.extend(z[i])
-        nan_xy_idx = nan_xy_idx[np.isin(nan_xy_idx, exc) == False]
-    else :
-        pass
-    
-    n = data.shape[0]
-    n_int = np.arange(n)#[x for x in range(n)]
-    
-    data_cp = data.copy()
-    
-    for i in nan_xy_idx :
-        try :
-            cdd = n_int [n_int > i]
-            idx_rep = np.min(cdd[np.isin(cdd, nan_xy_idx) == False])
-            data_cp[i] = data_cp[idx_rep]
-        except :
-            if na_remaining == "rev" :
-                cdd = n_int [n_int < i]
-                idx_rep = np.max(cdd[np.isin(cdd, nan_xy_idx) == False])
-                data_cp[i] = data_cp[idx_rep]
-            elif na_remaining == "mean":
-                idx_rep = np.mean(data[np.isnan(data) == False])
-                data_cp[i] = idx_rep
-            elif na_remaining == "keep":
-                pass
-            else :
-                raise("the option is invalid, please fill valid option!!!!")
-    return data_cp
+    if is_2d(data) :
+        kernel = None if use_loops(backend) else partial(carry_fill_2d, forward = True)
+        return impute_columns(locf, data, n_jobs, executor, kernel = kernel,
+                              na_remaining = na_remaining, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, time = time,
+                              **({"backend": backend} if kernel is None else {}))
+
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps, backend)
+    t, is_datetime = time_axis(data, time, x.shape[0])
+    return carry_fill(x, gaps, forward = True, na_remaining = na_remaining,
+                      keep = time_keep(gaps, maxgap, t, is_datetime), backend = backend)
         
 
-def nocb(data, axis=0, na_remaining = "rev", maxgap = None):
+@instrumented
+@cached
+def nocb(data, axis=0, na_remaining = "rev", maxgap = None, gaps = None,
+         n_jobs = None, executor = "thread", inplace = False, out = None, time = None, backend = None):
     """ Next Observation Carried Backward
 
-    For each set of missing indices, use the value of one row before(same
-    column). In the case that the missing value is the first row, look one
-    row ahead instead. If this next row is also NaN, look to the next row.
-    Repeat until you find a row in this column that's not NaN. All the rows
-    before will be filled with this value.
+    For each set of missing indices, use the value of the next row that is
+    not NaN (same column). In the case that the missing value is the last row,
+    the remaining NaNs are handled according to `na_remaining`.
 
     Parameters:
-        data: numpy.array, list or pandas.Series
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
             Data to impute.
         na_remaining : Method to be used for remaining nan (if missing number apear in the last observation) :
             "keep" - to return the series with NAs
             "mean" - to replace remaining NAs by overall mean
             "rev" - to perform nocb / locf from the reverse direction
         maxgap : Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive nan runs, that are longer than 'maxgap' will be left nan. This option mostly makes sense if you want to treat long runs of nan afterwards separately
+        gaps : imputetspy.GapIndex of `data` (see `imputetspy.gap_index`). Pass it to reuse the gap discovery when the same series is imputed several times.
+        n_jobs : accepted for symmetry with the other imputers. The columns of a pandas.DataFrame or 2-D numpy.array are filled in one pass vectorized along axis 0.
+        executor : accepted for symmetry with the other imputers, see `n_jobs`.
+        inplace : if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+        out : numpy.array receiving the result, with the same shape as `data`.
+        time : None (unit spacing, the default), "index" to use the DatetimeIndex or numeric index of a pandas.Series, or an array of timestamps or numbers with one value per sample. The series is not resampled: distances are measured on this axis and `maxgap` becomes a duration ("2h", pandas.Timedelta, or a number for numeric axes), the time between the observations around a gap.
+        backend : None for the global setting, or "numpy" / "numba" for this call (see `imputetspy.set_backend`). With numba the gaps are walked by compiled loops, and the columns of 2-D data are filled one by one.
 
     Returns:
-        numpy.ndarray Imputed data.
+        numpy.ndarray Imputed data (pandas.DataFrame for DataFrame input).
     
     Examples:
         >>> import imputetspy
@@ -331,62 +370,57 @@ def nocb(data, axis=0, na_remaining = "rev", maxgap = None):
         >>> data_fill_locf = imputetspy.locf(data)
         >>> data_fill_nocb = imputetspy.nocb(data)
     """
-    data = check_data(data)
-    nan_xy = np.argwhere(np.isnan(data))
-    nan_xy_idx = np.array([x[0] for x in nan_xy])
-    
-    if maxgap != None :
-        z = consecutive(nan_xy_idx)
-        exc = []
-        for i in range(len(z)) :
-            if len(z[i]) > maxgap :
-                exc.extend(z[i])
-        nan_xy_idx = nan_xy_idx[np.isin(nan_xy_idx, exc) == False]
-    else :
-        pass
-    
-    n = data.shape[0]
-    n_int = np.arange(n)#[x for x in range(n)]
-    
-    data_cp = data.copy()
-    
-    for i in nan_xy_idx :
-        try :
-            cdd = n_int [n_int < i]
-            idx_rep = np.min(cdd[np.isin(cdd, nan_xy_idx) == False])
-            data_cp[i] = data_cp[idx_rep]
-        except :
-            if na_remaining == "rev" :
-                cdd = n_int [n_int > i]
-                idx_rep = np.max(cdd[np.isin(cdd, nan_xy_idx) == False])
-                data_cp[i] = data_cp[idx_rep]
-            elif na_remaining == "mean":
-                idx_rep = np.mean(data[np.isnan(data) == False])
-                data_cp[i] = idx_rep
-            elif na_remaining == "keep":
-                pass
-            else :
-                raise("the option is invalid, please fill valid option!!!!")
-    return data_cp
+    if is_2d(data) :
+        kernel = None if use_loops(backend) else partial(carry_fill_2d, forward = False)
+        return impute_columns(nocb, data, n_jobs, executor, kernel = kernel,
+                              na_remaining = na_remaining, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, time = time,
+                              **({"backend": backend} if kernel is None else {}))
+
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps, backend)
+    t, is_datetime = time_axis(data, time, x.shape[0])
+    return carry_fill(x, gaps, forward = False, na_remaining = na_remaining,
+                      keep = time_keep(gaps, maxgap, t, is_datetime), backend = backend)
     
 
 
 
-def na_interpolate(data, option = "linear", maxgap = None) :
+@instrumented
+@cached
+def na_interpolate(data, option = "linear", maxgap = None, gaps = None,
+                   n_jobs = None, executor = "thread", inplace = False, out = None, time = None) :
   """ Missing Value Imputation by Interpolation
   
-  Uses linear, spline or stineman interpolation to replace missing values.
+  Uses linear, spline, stineman, pchip, akima, nearest or quadratic interpolation to replace missing values.
+  Values are only evaluated at the missing positions: linear interpolation
+  works from the two observations around each gap, and the cubic spline is
+  fitted on bounded windows of observations around the gaps instead of the
+  whole series. Every option scales linearly with the series length.
+  Leading and trailing NAs take the nearest observation (every option but
+  "stineman", which extrapolates).
 
   
   Parameters:
-    data: numpy.array, list or pandas.Series data to impute.
+    data: numpy.array, list, pandas.Series or pandas.DataFrame data to impute.
     option: The interpolate algorithm to be used. Accepts these following input:  
                 - "linear" - use linear interpolation\n
                 - "spline" - interpolation based on spline function\n
                 - "stineman" - interpolation based on stineman function\n
+                - "pchip" - shape preserving piecewise cubic Hermite interpolation (no overshoot)\n
+                - "akima" - Akima piecewise cubic interpolation, robust to outliers\n
+                - "nearest" - value of the nearest observation\n
+                - "quadratic" - quadratic spline interpolation\n
+    maxgap: Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA.
+    gaps: imputetspy.GapIndex of `data` (see `imputetspy.gap_index`). Pass it to reuse the gap discovery when the same series is imputed several times.
+    n_jobs: number of workers used when `data` is a pandas.DataFrame or 2-D numpy.array; every column is imputed independently. None runs serially, -1 uses every CPU.
+    executor: "thread" (default), "process" or a concurrent.futures.Executor running the columns when `n_jobs` is set.
+    inplace: if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy. The buffer must be writable and of a floating dtype, which is kept (float32 stays float32).
+    out: numpy.array receiving the result, with the same shape as `data`.
+    time: None (unit spacing, the default), "index" to use the DatetimeIndex or numeric index of a pandas.Series, or an array of timestamps or numbers with one value per sample. The series is not resampled: distances are measured on this axis and `maxgap` becomes a duration ("2h", pandas.Timedelta, or a number for numeric axes), the time between the observations around a gap.
 
   Returns:
-    numpy.array imputed data.
+    numpy.array imputed data (pandas.DataFrame for DataFrame input).
   
   Examples:
     >>> import imputetspy
@@ -395,40 +429,35 @@ def na_interpolate(data, option = "linear", maxgap = None) :
     
     >>> data_fill_lin = imputetspy.na_interpolate(data, option = 'linear')
     >>> data_fill_sp = imputetspy.na_interpolate(data, option = 'spline')
+    >>> data_fill_pchip = imputetspy.na_interpolate(data, option = 'pchip')
 
   
   """
 
-  x = check_data(data)
-  idx = np.arange(x.shape[0])
-  nan_idx = idx[np.isnan(x)]
-  
-  if maxgap != None :
-    z = consecutive(nan_idx)
-    exc = []
-    for i in range(len(z)) :
-        if len(z[i]) > maxgap :
-            exc.extend(z[i])
-    nan_idx = nan_idx[np.isin(nan_idx, exc) == False]
-  else :
-      pass
+  if is_2d(data) :
+    linear = option == "linear"
+    return impute_columns(na_interpolate, data, n_jobs, executor, kernel = linear_fill_2d if linear else None,
+                          maxgap = maxgap, gaps = gaps,
+                          inplace = inplace, out = out, time = time,
+                          **({} if linear else {"option": option}))
+
+  x = check_data(data, inplace, out)
+  gaps = get_gaps(x, gaps)
+  t, is_datetime = time_axis(data, time, x.shape[0])
+  keep = time_keep(gaps, maxgap, t, is_datetime)
 
-  
   if option == "linear" :
-    f = interp1d(idx[np.isin(idx, nan_idx) == False],
-                x[np.isin(idx, nan_idx) == False]   )
-    intrep_val = f(idx)
-  elif option == "spline" :
-    f = interp1d(idx[np.isin(idx, nan_idx) == False],
-                x[np.isin(idx, nan_idx) == False], kind= "cubic"   )
-    intrep_val = f(idx)
+    linear_fill(x, gaps, keep, t = t)
+  elif option == "nearest" :
+    nearest_fill(x, gaps, keep, t = t)
+  elif option in ("spline", "quadratic", "pchip", "akima") :
+    spline_fill(x, gaps, keep, kind = "cubic" if option == "spline" else option, t = t)
   elif option == "stineman" :
-    intrep_val = stineman_interp(idx , idx[np.isin(idx, nan_idx) == False], 
-                            x[np.isin(idx, nan_idx) == False], yp = None)
+    nan_idx = gaps.positions(keep)
+    non_nan_idx = gaps.valid_idx
+    x[nan_idx] = stineman_interp(*at_times(t, nan_idx, non_nan_idx), x[non_nan_idx], yp = None)
   else :
-    raise print("Please fill the valid option!!!")
-    
-  x[nan_idx] = intrep_val[nan_idx]
+    raise ValueError("Please fill the valid option!!!")
   
   return x
     
@@ -0,0 +1,115 @@
+import numpy as np
+from imputetspy.streaming import StreamLOCF, StreamNOCB, StreamMA, StreamInterpolate
+
+
+class OnlineImputer(object):
+    """ Stateful imputer fed one sample at a time.
+
+    `update(value)` returns the values that became final with this sample, in
+    series order: a valid sample is usually returned straight away, while a
+    missing one is returned as soon as its right-hand context is known. The
+    state is bounded (see `pending`), so every update costs O(1) amortized.
+    `flush()` returns the samples still held back, imputed as at the end of a
+    series, and resets the imputer.
+
+    Concatenating every returned array gives the same result as the batch
+    imputer of `imputetspy.main` applied to the whole series.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def update(self, value):
+        """ Push one sample and return the numpy.array of values that became final (possibly empty). """
+        return self._collect(self._stream.push_value(value))
+
+    def flush(self):
+        """ Return the samples still held back, imputed as the end of the series. """
+        return self._collect(self._stream.finish())
+
+    @property
+    def pending(self):
+        """ Number of samples pushed but not returned yet (the current lookahead). """
+        return self._stream.pending
+
+    def _collect(self, out):
+        out = list(out)
+        if len(out) == 1 :
+            return out[0]
+        if not out :
+            return np.empty(0)
+        return np.concatenate(out)
+
+
+class OnlineLOCF(OnlineImputer):
+    """ Online Last Observation Carried Forward, see `imputetspy.locf`.
+
+    Without `maxgap` a missing sample is filled at once with the last
+    observation. With `maxgap`, a run is held back until it is closed or known
+    to be longer than `maxgap`, so the lookahead never exceeds `maxgap` + 1.
+
+    Parameters:
+        na_remaining: "rev" to fill leading NaNs with the first observation (held back until it arrives) or "keep".
+        maxgap: maximum number of successive NAs to still perform imputation on.
+
+    Examples:
+        >>> import imputetspy
+        >>> imputer = imputetspy.OnlineLOCF(maxgap = 3)
+        >>> for value in imputetspy.datasets.ts_nh4():
+        ...     filled = imputer.update(value)
+        >>> rest = imputer.flush()
+    """
+
+    def __init__(self, na_remaining = "rev", maxgap = None):
+        OnlineImputer.__init__(self, StreamLOCF(na_remaining = na_remaining, maxgap = maxgap))
+
+
+class OnlineNOCB(OnlineImputer):
+    """ Online Next Observation Carried Backward, see `imputetspy.nocb`.
+
+    Missing samples are returned with the next observation. With `maxgap` the
+    lookahead never exceeds `maxgap` + 1 samples.
+
+    Parameters:
+        na_remaining: "rev" to fill trailing NaNs with the last observation on `flush` or "keep".
+        maxgap: maximum number of successive NAs to still perform imputation on.
+    """
+
+    def __init__(self, na_remaining = "rev", maxgap = None):
+        OnlineImputer.__init__(self, StreamNOCB(na_remaining = na_remaining, maxgap = maxgap))
+
+
+class OnlineMA(OnlineImputer):
+    """ Online moving average, see `imputetspy.na_ma`.
+
+    The last k/2 observations are kept as left context. A missing sample is
+    returned once k/2 observations have arrived after it; runs longer than
+    `maxgap` are returned as NaN as soon as nothing before them is pending.
+
+    Parameters:
+        k: width of the moving average window (k/2 observations on each side), at least 2.
+        weighting: None, "linear" or "exponential".
+        maxgap: maximum number of successive NAs to still perform imputation on.
+
+    Examples:
+        >>> import imputetspy
+        >>> imputer = imputetspy.OnlineMA(k = 4)
+        >>> imputer.update(1.0), imputer.update(float("nan")), imputer.update(3.0), imputer.update(5.0)
+    """
+
+    def __init__(self, k = 4, weighting = None, maxgap = None):
+        OnlineImputer.__init__(self, StreamMA(k = k, weighting = weighting, maxgap = maxgap))
+
+
+class OnlineInterpolate(OnlineImputer):
+    """ Online linear interpolation, see `imputetspy.na_interpolate`.
+
+    A missing sample is returned when the next observation arrives. With
+    `maxgap` the lookahead never exceeds `maxgap` + 1 samples.
+
+    Parameters:
+        maxgap: maximum number of successive NAs to still perform imputation on.
+    """
+
+    def __init__(self, maxgap = None):
+        OnlineImputer.__init__(self, StreamInterpolate(maxgap = maxgap))
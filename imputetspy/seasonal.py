@@ -0,0 +1,198 @@
+import warnings
+import numpy as np
+from imputetspy.utils import check_data, linear_fill
+from imputetspy.columns import is_2d, impute_columns
+from imputetspy.gaps import get_gaps
+from imputetspy.instrument import instrumented
+
+
+def get_algorithm(algorithm):
+    """ Imputer of `imputetspy.main` used inside the seasonal methods. """
+    from imputetspy import main
+    algorithms = {
+        "interpolate": main.na_interpolate,
+        "locf": main.locf,
+        "nocb": main.nocb,
+        "mean": main.na_mean,
+        "random": main.na_random,
+        "ma": main.na_ma,
+    }
+    if callable(algorithm) :
+        return algorithm
+    if algorithm not in algorithms :
+        raise ValueError("algorithm must be one of %s or an imputer function" % ", ".join(algorithms))
+    return algorithms[algorithm]
+
+
+def season_view(x, period):
+    """ `x` padded with NaN to whole cycles and reshaped to (cycles, period).
+
+    Column j holds the j-th position of every cycle, i.e. the strided season
+    x[j::period]; imputing the columns imputes every season at once.
+    """
+    cycles = -(-x.shape[0] // period)
+    pad = np.full(cycles * period, np.nan)
+    pad[:x.shape[0]] = x
+    return pad.reshape(cycles, period)
+
+
+def decompose(data, period):
+    """ Classical additive decomposition of a series into trend and seasonal components.
+
+    Missing values are first filled by linear interpolation. The trend is a
+    centred moving average over one period (a 2 x period average for even
+    periods) computed from cumulative sums, and the seasonal component is the
+    mean detrended value of each position in the cycle, centred to zero.
+    Both run in O(n) whatever the period.
+
+    Parameters:
+        data: numpy.array, list or pandas.Series with at least two full periods.
+        period: number of observations per cycle, e.g. 12 for monthly data.
+
+    Returns:
+        (trend, seasonal) numpy.arrays; the trend is NaN at both ends where the window does not fit.
+
+    Examples:
+        >>> import imputetspy
+        >>> from imputetspy.seasonal import decompose
+        >>> data = imputetspy.datasets.ts_airgap()['number_of_passengers']
+        >>> trend, seasonal = decompose(data, 12)
+    """
+    x = check_data(data)
+    gaps = get_gaps(x)
+    if gaps.valid_idx.shape[0] == 0 :
+        raise ValueError("the series has no observed values")
+    linear_fill(x, gaps)
+    n = x.shape[0]
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    trend = np.full(n, np.nan)
+    if period % 2 :
+        half = period // 2
+        trend[half:n - half] = (c[period:] - c[:-period]) / period
+    else :
+        # 2 x period average: mean of two adjacent period-long windows
+        half = period // 2
+        ma = (c[period:] - c[:-period]) / period
+        trend[half:n - half] = (ma[:-1] + ma[1:]) / 2
+    with warnings.catch_warnings() :
+        warnings.simplefilter("ignore", RuntimeWarning)
+        figure = np.nanmean(season_view(x - trend, period), axis = 0)
+    figure -= figure.mean()
+    seasonal = np.broadcast_to(figure, (-(-n // period), period)).ravel()[:n]
+    return trend, seasonal
+
+
+def _check_period(x, period, name):
+    if (period is None) or (int(period) != period) or (period < 1) :
+        raise ValueError("period must be a positive integer")
+    if period == 1 :
+        warnings.warn("%s: period is 1, the series has no seasonality and the algorithm is applied directly" % name)
+        return False
+    if x.shape[0] < 2 * period :
+        warnings.warn("%s: the series is shorter than two periods, the algorithm is applied directly" % name)
+        return False
+    return True
+
+
+@instrumented
+def na_seadec(data, period, algorithm = "interpolate", maxgap = None, gaps = None,
+              n_jobs = None, executor = "thread", inplace = False, out = None, **kwargs) :
+    """ Seasonally Decomposed Missing Value Imputation
+
+    Removes the seasonal component from the series, imputes the deseasonalized
+    series with `algorithm` and adds the seasonal component back. The seasonal
+    component comes from a classical additive decomposition (see `decompose`)
+    of the linearly interpolated series.
+
+    Parameters:
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
+            Data to impute.
+        period: number of observations per seasonal cycle, e.g. 12 for monthly or 1440 for minute data with a daily cycle.
+        algorithm: imputation of the deseasonalized series: "interpolate", "locf", "nocb", "mean", "random", "ma", or any imputer with the signature of `imputetspy.main` functions.
+        maxgap: Maximum number of successive NAs to still perform imputation on. Default setting is to replace all NAs without restrictions. With this option set, consecutive NAs runs, that are longer than 'maxgap' will be left NA.
+        gaps: imputetspy.GapIndex of `data` (see `imputetspy.gap_index`).
+        n_jobs: number of workers used when `data` is a pandas.DataFrame or 2-D numpy.array; every column is imputed independently.
+        executor: "thread" (default), "process" or a concurrent.futures.Executor running the columns when `n_jobs` is set.
+        inplace: if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy.
+        out: numpy.array receiving the result, with the same shape as `data`.
+        kwargs: further arguments of `algorithm`, e.g. option = "spline" or k = 4.
+
+    Returns:
+        numpy.array imputed data (pandas.DataFrame for DataFrame input).
+
+    Examples:
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_airgap()['number_of_passengers']
+        >>> data_fill = imputetspy.na_seadec(data, 12)
+        >>> data_fill_ma = imputetspy.na_seadec(data, 12, algorithm = "ma", k = 2)
+    """
+    if is_2d(data) :
+        return impute_columns(na_seadec, data, n_jobs, executor, period = period,
+                              algorithm = algorithm, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, **kwargs)
+
+    impute = get_algorithm(algorithm)
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps)
+    fill = gaps.nan_idx(maxgap)
+    if (fill.shape[0] == 0) or not _check_period(x, period, "na_seadec") :
+        return impute(x, maxgap = maxgap, gaps = gaps, inplace = True, **kwargs)
+
+    _, seasonal = decompose(x, period)
+    filled = impute(x - seasonal, **kwargs)
+    x[fill] = filled[fill] + seasonal[fill]
+    return x
+
+
+@instrumented
+def na_seasplit(data, period, algorithm = "interpolate", maxgap = None, gaps = None,
+                n_jobs = None, executor = "thread", inplace = False, out = None, **kwargs) :
+    """ Seasonally Splitted Missing Value Imputation
+
+    Splits the series into one sub-series per position in the seasonal cycle
+    (every January, every February, ...) and imputes each of them with
+    `algorithm`. The split is a reshape to a (cycles, period) array imputed
+    by the column-wise 2-D path of `algorithm`. "locf", "nocb", "mean"
+    (mean or median), "random", "interpolate" (linear) and "ma" (mean or
+    median windows) fill every season at once without a Python loop over
+    the seasons; other options and callables impute the seasons one by one,
+    which `n_jobs` can spread over a pool.
+
+    Parameters:
+        data: numpy.array, list, pandas.Series or pandas.DataFrame
+            Data to impute.
+        period: number of observations per seasonal cycle, e.g. 12 for monthly data.
+        algorithm: imputation of each season: "interpolate", "locf", "nocb", "mean", "random", "ma", or any imputer with the signature of `imputetspy.main` functions.
+        maxgap: Maximum number of successive NAs of the original series to still perform imputation on. Default setting is to replace all NAs without restrictions.
+        gaps: imputetspy.GapIndex of `data` (see `imputetspy.gap_index`).
+        n_jobs: number of workers imputing the seasons (or the columns of a pandas.DataFrame); None runs serially, -1 uses every CPU.
+        executor: "thread" (default), "process" or a concurrent.futures.Executor.
+        inplace: if True, fill the caller's numpy.array (or the values behind a pandas.Series) instead of a copy.
+        out: numpy.array receiving the result, with the same shape as `data`.
+        kwargs: further arguments of `algorithm`.
+
+    Returns:
+        numpy.array imputed data (pandas.DataFrame for DataFrame input).
+
+    Examples:
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_airgap()['number_of_passengers']
+        >>> data_fill = imputetspy.na_seasplit(data, 12)
+        >>> data_fill_locf = imputetspy.na_seasplit(data, 12, algorithm = "locf")
+    """
+    if is_2d(data) :
+        return impute_columns(na_seasplit, data, n_jobs, executor, period = period,
+                              algorithm = algorithm, maxgap = maxgap, gaps = gaps,
+                              inplace = inplace, out = out, **kwargs)
+
+    impute = get_algorithm(algorithm)
+    x = check_data(data, inplace, out)
+    gaps = get_gaps(x, gaps)
+    fill = gaps.nan_idx(maxgap)
+    if (fill.shape[0] == 0) or not _check_period(x, period, "na_seasplit") :
+        return impute(x, maxgap = maxgap, gaps = gaps, inplace = True, **kwargs)
+
+    # the NaN padding only lengthens the trailing gap of some seasons, and is dropped afterwards
+    seasons = impute(season_view(x, period), n_jobs = n_jobs, executor = executor, inplace = True, **kwargs)
+    x[fill] = seasons.ravel()[fill]
+    return x
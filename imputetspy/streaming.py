@@ -0,0 +1,383 @@
+from itertools import chain
+import numpy as np
+from imputetspy.gaps import GapIndex
+from imputetspy.utils import window_bounds, window_reduce
+
+
+class _StreamImputer(object):
+    """ Shared bookkeeping of the chunk-wise imputers.
+
+    The imputer keeps three pieces of state between chunks:
+
+    * `ctx` - the last few valid observations already emitted, i.e. the left
+      context a later gap can need (one value, or k/2 values for `na_ma`).
+    * `vals` / `reps` - the pending region that cannot be resolved before more
+      data arrives. Every NaN run in it is stored as a single NaN with its run
+      length in `reps`, so a pending gap costs O(1) memory whatever its length.
+    * `pos` - the position in the series of the first pending value.
+
+    Subclasses decide where the pending region starts (`_boundary`) and how a
+    gap is filled (`_gap_values`). Every gap is filled with either a constant
+    or a straight line through its anchors, evaluated at the series positions.
+    """
+
+    context = 1
+
+    def __init__(self, maxgap = None, block = 65536):
+        self.maxgap = maxgap
+        self.block = block
+        self._reset()
+
+    def _reset(self):
+        self.ctx = np.empty(0)
+        self.ctx_pos = np.empty(0, dtype=np.int64)
+        self.vals = np.empty(0)
+        self.reps = np.empty(0, dtype=np.int64)
+        self.pos = 0
+        self.dropped = False
+
+    def push(self, chunk):
+        """ Feed the next chunk and return an iterator over the arrays that can be emitted.
+
+        The state is updated before returning; the iterator only expands the
+        resolved values, in blocks of at most `block` values for long gaps.
+        """
+        x = np.array(chunk, dtype=float).ravel()
+        out = []
+        if self.dropped :
+            # continuation of a run already known to be longer than maxgap
+            valid = np.flatnonzero(~np.isnan(x))
+            lead = valid[0] if valid.shape[0] else x.shape[0]
+            if lead :
+                out.append(x[:lead])
+                self.pos += lead
+                x = x[lead:]
+            self.dropped = x.shape[0] == 0
+        if x.shape[0] == 0 :
+            return iter(out)
+        vals = np.concatenate((self.vals, x))
+        reps = np.concatenate((self.reps, np.ones(x.shape[0], dtype=np.int64)))
+        return chain(out, self._resolve(vals, reps, final = False))
+
+    def push_value(self, value):
+        """ `push` of a single sample, skipping the gap bookkeeping when nothing is pending. """
+        value = float(value)
+        if (value == value) and (self.vals.shape[0] == 0) and not self.dropped :
+            if self.ctx.shape[0] == self.context :
+                self.ctx[:-1] = self.ctx[1:]
+                self.ctx_pos[:-1] = self.ctx_pos[1:]
+                self.ctx[-1] = value
+                self.ctx_pos[-1] = self.pos
+            else :
+                self.ctx = np.append(self.ctx, value)
+                self.ctx_pos = np.append(self.ctx_pos, self.pos)
+            self.pos += 1
+            return iter((np.array([value]),))
+        return self.push(np.array([value]))
+
+    @property
+    def pending(self):
+        """ Number of samples pushed but not emitted yet. """
+        return int(self.reps.sum())
+
+    def finish(self):
+        """ Flush the pending region at the end of the series, see `push`. """
+        out = self._resolve(self.vals, self.reps, final = True)
+        self._reset()
+        return out
+
+    def _resolve(self, vals, reps, final):
+        nctx = self.ctx.shape[0]
+        wv = np.concatenate((self.ctx, vals))
+        wr = np.concatenate((np.ones(nctx, dtype=np.int64), reps))
+        tpos = np.concatenate((self.ctx_pos, self.pos + np.cumsum(reps) - reps))
+        n = wv.shape[0]
+        gaps = GapIndex(np.isnan(wv))
+        csum = np.concatenate(([0], np.cumsum(wr)))
+        true_len = csum[gaps.right] - csum[gaps.starts]
+
+        boundary = n if final else max(self._boundary(wv, gaps), nctx)
+        if boundary < n and self.maxgap is not None and len(gaps) :
+            # an open run already longer than maxgap will stay NaN whatever comes next
+            if gaps.starts[-1] == boundary and gaps.right[-1] == n and true_len[-1] > self.maxgap :
+                boundary = n
+                self.dropped = True
+
+        slope, x_lo, y_lo = self._gap_values(wv, tpos, gaps, final)
+        if self.maxgap is not None :
+            too_long = true_len > self.maxgap
+            y_lo[too_long] = np.nan
+            if slope is not None :
+                slope[too_long] = 0
+        gid = np.full(n, -1)
+        gid[gaps.positions()] = np.repeat(np.arange(len(gaps)), gaps.lengths)
+        out = self._emit(wv, wr, tpos, gid, (slope, x_lo, y_lo), nctx, boundary)
+
+        # keep the left context and the compressed pending region
+        valid = gaps.valid_idx[gaps.valid_idx < boundary][-self.context:]
+        self.ctx = wv[valid]
+        self.ctx_pos = tpos[valid]
+        self.pos = tpos[boundary] if boundary < n else tpos[-1] + wr[-1] if n else self.pos
+        keep = np.ones(n - boundary, dtype=bool)
+        rest_reps = wr[boundary:].copy()
+        inside = gaps.starts >= boundary
+        starts = gaps.starts[inside] - boundary
+        rest_reps[starts] = true_len[inside]
+        keep[gaps.positions(inside) - boundary] = False
+        keep[starts] = True
+        self.vals = wv[boundary:][keep]
+        self.reps = rest_reps[keep]
+        return out
+
+    def _emit(self, wv, wr, tpos, gid, line, i0, i1):
+        cur = i0
+        for b in np.flatnonzero(wr[i0:i1] > 1) + i0 :
+            if cur < b :
+                yield self._values(wv, tpos, gid, line, cur, b)
+            for start in range(0, wr[b], self.block) :
+                p = tpos[b] + np.arange(start, min(wr[b], start + self.block))
+                yield self._line(np.full(p.shape[0], gid[b]), p, *line)
+            cur = b + 1
+        if cur < i1 :
+            yield self._values(wv, tpos, gid, line, cur, i1)
+
+    def _values(self, wv, tpos, gid, line, i0, i1):
+        v = wv[i0:i1].copy()
+        m = np.isnan(v)
+        if m.any() :
+            v[m] = self._line(gid[i0:i1][m], tpos[i0:i1][m], *line)
+        return v
+
+    def _line(self, g, p, slope, x_lo, y_lo):
+        if slope is None :
+            return y_lo[g]
+        return slope[g]*(p - x_lo[g]) + y_lo[g]
+
+    def _boundary(self, wv, gaps):
+        """ Index of `wv` from which the values still depend on future data. """
+        raise NotImplementedError
+
+    def _gap_values(self, wv, tpos, gaps, final):
+        """ Per gap (slope, x_lo, y_lo) of the fill line; slope None for constant fills. """
+        raise NotImplementedError
+
+
+class StreamLOCF(_StreamImputer):
+    """ Chunk-wise Last Observation Carried Forward, see `imputetspy.locf`.
+
+    Only the last valid value is carried across chunks. A run is held back
+    while its length could still exceed `maxgap`, and leading NaNs are held
+    back until the first observation when `na_remaining` is "rev".
+    """
+
+    def __init__(self, na_remaining = "rev", maxgap = None, block = 65536):
+        if na_remaining not in ("rev", "keep") :
+            raise ValueError("streaming locf supports na_remaining 'rev' and 'keep' only")
+        self.na_remaining = na_remaining
+        _StreamImputer.__init__(self, maxgap, block)
+
+    def _boundary(self, wv, gaps):
+        n = wv.shape[0]
+        if len(gaps) and gaps.right[-1] == n :
+            leading = gaps.left[-1] < 0
+            if (self.maxgap is not None) or (leading and self.na_remaining == "rev") :
+                return gaps.starts[-1]
+        return n
+
+    def _gap_values(self, wv, tpos, gaps, final):
+        n = wv.shape[0]
+        src = gaps.left.copy()
+        if self.na_remaining == "rev" :
+            src[src < 0] = gaps.right[src < 0]
+        ok = (src >= 0) & (src < n)
+        y_lo = np.full(len(gaps), np.nan)
+        y_lo[ok] = wv[src[ok]]
+        return None, None, y_lo
+
+
+class StreamNOCB(_StreamImputer):
+    """ Chunk-wise Next Observation Carried Backward, see `imputetspy.nocb`.
+
+    A run is held back (as a count) until its right anchor arrives, or until
+    it is known to be longer than `maxgap`.
+    """
+
+    def __init__(self, na_remaining = "rev", maxgap = None, block = 65536):
+        if na_remaining not in ("rev", "keep") :
+            raise ValueError("streaming nocb supports na_remaining 'rev' and 'keep' only")
+        self.na_remaining = na_remaining
+        _StreamImputer.__init__(self, maxgap, block)
+
+    def _boundary(self, wv, gaps):
+        n = wv.shape[0]
+        if len(gaps) and gaps.right[-1] == n :
+            return gaps.starts[-1]
+        return n
+
+    def _gap_values(self, wv, tpos, gaps, final):
+        n = wv.shape[0]
+        src = gaps.right.copy()
+        if self.na_remaining == "rev" :
+            src[src >= n] = gaps.left[src >= n]
+        ok = (src >= 0) & (src < n)
+        y_lo = np.full(len(gaps), np.nan)
+        y_lo[ok] = wv[src[ok]]
+        return None, None, y_lo
+
+
+class StreamMA(_StreamImputer):
+    """ Chunk-wise moving average, see `imputetspy.na_ma`.
+
+    The last k/2 valid values are carried across chunks as left context, and
+    a gap is held back until k/2 valid values follow it. All NaNs of a gap
+    share the same window, so a held back gap is stored as a count.
+    """
+
+    def __init__(self, k = 4, weighting = None, maxgap = None, block = 65536):
+        if k // 2 < 1 :
+            raise ValueError("streaming na_ma needs k >= 2")
+        if weighting not in (None, "linear", "exponential") :
+            raise ValueError('please specify correct weighting!!!!')
+        self.k = k
+        self.weighting = weighting
+        self.context = k // 2
+        _StreamImputer.__init__(self, maxgap, block)
+
+    def _boundary(self, wv, gaps):
+        n = wv.shape[0]
+        if not len(gaps) :
+            return n
+        after = gaps.valid_idx.shape[0] - np.searchsorted(gaps.valid_idx, gaps.starts)
+        short = np.flatnonzero(after < self.context)
+        return gaps.starts[short[0]] if short.shape[0] else n
+
+    def _gap_values(self, wv, tpos, gaps, final):
+        valid_idx = gaps.valid_idx
+        start, pos, stop = window_bounds(valid_idx, gaps.starts, self.context)
+        y_lo = window_reduce(wv[valid_idx], start, pos, stop, np.mean, self.weighting)
+        return None, None, y_lo
+
+
+class StreamInterpolate(_StreamImputer):
+    """ Chunk-wise linear interpolation, see `imputetspy.na_interpolate`.
+
+    A gap is held back (as a count) until its right anchor arrives. Leading
+    and trailing gaps take the nearest observation.
+    """
+
+    def _boundary(self, wv, gaps):
+        n = wv.shape[0]
+        if len(gaps) and gaps.right[-1] == n :
+            return gaps.starts[-1]
+        return n
+
+    def _gap_values(self, wv, tpos, gaps, final):
+        n = wv.shape[0]
+        lo = gaps.left.copy()
+        hi = gaps.right.copy()
+        lo[lo < 0] = hi[lo < 0]
+        hi[hi >= n] = lo[hi >= n]
+        ok = (lo >= 0) & (lo < n)
+        slope = np.zeros(len(gaps))
+        x_lo = np.zeros(len(gaps))
+        y_lo = np.full(len(gaps), np.nan)
+        x_lo[ok] = tpos[lo[ok]]
+        y_lo[ok] = wv[lo[ok]]
+        inner = ok & (lo != hi)
+        x_hi = tpos[hi[inner]].astype(float)
+        slope[inner] = (wv[hi[inner]] - y_lo[inner]) / (x_hi - x_lo[inner])
+        return slope, x_lo, y_lo
+
+
+_STREAMS = {
+    "locf": StreamLOCF,
+    "nocb": StreamNOCB,
+    "na_ma": StreamMA,
+    "na_interpolate": StreamInterpolate,
+}
+
+
+def impute_chunks(chunks, method = "locf", **kwargs):
+    """ Streaming imputation of a series given as an iterator of chunks.
+
+    Only the state a method needs at a chunk boundary is kept in memory: the
+    last valid value for "locf", the k/2 neighbour buffer for "na_ma", and the
+    pending gap waiting for its right anchor for "nocb" and "na_interpolate".
+    Pending gaps are stored as run lengths, so memory stays bounded by the
+    chunk size whatever the length of the series or of its gaps.
+
+    The concatenation of the yielded arrays equals the imputation of the whole
+    series, but their boundaries do not necessarily match the input chunks:
+    values are emitted as soon as their right-hand context is known.
+
+    Parameters:
+        chunks: iterable of numpy.array, list or pandas.Series chunks of one series.
+        method: "locf", "nocb", "na_ma" or "na_interpolate" (linear).
+        kwargs: parameters of the method, e.g. `k`, `weighting`, `na_remaining` and `maxgap`.
+                na_remaining = "mean" is not available as it needs the whole series.
+
+    Returns:
+        generator of numpy.array imputed values.
+
+    Examples:
+        >>> import numpy as np
+        >>> import imputetspy
+        >>> data = imputetspy.datasets.ts_heating()
+        >>> chunks = np.array_split(data, 100)
+        >>> data_fill = np.concatenate(list(imputetspy.impute_chunks(chunks, "na_ma", k = 4)))
+    """
+    if method not in _STREAMS :
+        raise ValueError("method must be one of %s" % ", ".join(sorted(_STREAMS)))
+    stream = _STREAMS[method](**kwargs)
+    for chunk in chunks :
+        for out in stream.push(chunk) :
+            if out.shape[0] :
+                yield out
+    for out in stream.finish() :
+        if out.shape[0] :
+            yield out
+
+
+def impute_aligned(chunks, method = "locf", **kwargs):
+    """ Streaming imputation yielding one array per input chunk.
+
+    Like `impute_chunks`, but the imputed values are regrouped along the
+    input chunks: the i-th yielded array has the length of the i-th chunk,
+    and is yielded as soon as all its values are final. Use it when the
+    result is written back next to the input, e.g. row group by row group.
+
+    Parameters:
+        chunks: iterable of numpy.array, list or pandas.Series chunks of one series.
+        method: "locf", "nocb", "na_ma" or "na_interpolate" (linear).
+        kwargs: parameters of the method, see `impute_chunks`.
+
+    Returns:
+        generator of numpy.array imputed chunks.
+    """
+    if method not in _STREAMS :
+        raise ValueError("method must be one of %s" % ", ".join(sorted(_STREAMS)))
+    stream = _STREAMS[method](**kwargs)
+    sizes = []
+    done = 0
+    ready = [np.empty(0)]
+    n_ready = 0
+
+    def regroup(outs):
+        nonlocal ready, n_ready
+        for out in outs :
+            ready.append(out)
+            n_ready += out.shape[0]
+        while (len(sizes) > done) and (n_ready >= sizes[done]) :
+            vals = np.concatenate(ready) if len(ready) != 1 else ready[0]
+            ready = [vals[sizes[done]:]]
+            n_ready -= sizes[done]
+            yield vals[:sizes[done]]
+
+    for chunk in chunks :
+        sizes.append(len(chunk))
+        for vals in regroup(stream.push(chunk)) :
+            yield vals
+            done += 1
+    for vals in regroup(stream.finish()) :
+        yield vals
+        done += 1
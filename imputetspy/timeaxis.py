@@ -0,0 +1,106 @@
+import datetime
+import numpy as np
+from imputetspy.instrument import stage
+
+
+def time_axis(data, time = None, n = None):
+    """ Sampling times of a series as a float64 array.
+
+    Parameters:
+        data: the series being imputed, used when `time` is "index".
+        time: None for unit spacing, "index" to use the index of a pandas.Series,
+            or an array-like of timestamps (DatetimeIndex, datetime64) or numbers.
+        n: expected length of the time axis.
+
+    Returns:
+        (t, is_datetime): `t` is None for unit spacing. Datetime axes are given
+        in nanoseconds since their first timestamp.
+    """
+    if time is None :
+        return None, False
+    if isinstance(time, str) :
+        if time != "index" :
+            raise ValueError("time must be 'index', an array of timestamps or numbers, or None")
+        if not hasattr(data, "index") :
+            raise ValueError("time = 'index' is only available for pandas.Series and pandas.DataFrame data")
+        time = data.index
+    if getattr(time, "tz", None) is not None :
+        time = time.tz_convert(None)
+    t = np.asarray(time)
+    if t.dtype.kind == "O" :
+        import pandas as pd
+        t = np.asarray(pd.to_datetime(time, utc = True).tz_convert(None))
+    if t.ndim != 1 :
+        raise ValueError("time must be one dimensional")
+    if (n is not None) and (t.shape[0] != n) :
+        raise ValueError("time has %d values, the series has %d" % (t.shape[0], n))
+    is_datetime = t.dtype.kind == "M"
+    if is_datetime :
+        t = t.astype("datetime64[ns]").view(np.int64)
+        t = (t - t[:1]).astype(float)
+    elif t.dtype.kind in "iuf" :
+        t = t.astype(float)
+    else :
+        raise TypeError("time must hold timestamps or numbers")
+    if np.any(~(np.diff(t) > 0)) :
+        raise ValueError("time must be strictly increasing")
+    return t, is_datetime
+
+
+def to_duration(maxgap, is_datetime = False):
+    """ `maxgap` in the unit of the time axis (nanoseconds for datetime axes). """
+    if maxgap is None :
+        return None
+    if is_datetime :
+        if isinstance(maxgap, str) :
+            import pandas as pd
+            maxgap = pd.Timedelta(maxgap)
+        if hasattr(maxgap, "to_timedelta64") :
+            maxgap = maxgap.to_timedelta64()
+        if isinstance(maxgap, (datetime.timedelta, np.timedelta64)) :
+            return float(np.timedelta64(maxgap, "ns").astype(np.int64))
+        raise ValueError("maxgap must be a duration (e.g. '2h' or pandas.Timedelta) for a datetime time axis")
+    if isinstance(maxgap, (str, datetime.timedelta, np.timedelta64)) :
+        raise ValueError("maxgap must be a number for a numeric time axis")
+    return float(maxgap)
+
+
+def gap_durations(gaps, t):
+    """ Time between the observations around each gap.
+
+    A gap at the start (end) of the series is measured from its first missing
+    sample (to its last missing sample) instead.
+    """
+    left = np.where(gaps.left < 0, gaps.starts, gaps.left)
+    right = np.where(gaps.right >= gaps.n, gaps.right - 1, gaps.right)
+    return t[right] - t[left]
+
+
+@stage("maxgap")
+def time_keep(gaps, maxgap = None, t = None, is_datetime = False):
+    """ GapIndex.keep with `maxgap` read as a duration when a time axis `t` is given. """
+    if (t is None) or (maxgap is None) :
+        return gaps.keep(maxgap)
+    return gap_durations(gaps, t) <= to_duration(maxgap, is_datetime)
+
+
+def group_labels(data, groups, n = None):
+    """ Group label of every sample.
+
+    Parameters:
+        data: the series being imputed, used when `groups` is a string.
+        groups: an array-like with one label per sample, or the name of a field of
+            the DatetimeIndex of a pandas.Series / DataFrame, e.g. "hour", "dayofweek" or "month".
+        n: expected number of labels.
+    """
+    if isinstance(groups, str) :
+        index = getattr(data, "index", None)
+        if (index is None) or (not hasattr(index, groups)) :
+            raise ValueError("groups = %r needs a pandas.Series or DataFrame whose index has a %r field" % (groups, groups))
+        groups = getattr(index, groups)
+    labels = np.asarray(groups)
+    if labels.ndim != 1 :
+        raise ValueError("groups must be one dimensional")
+    if (n is not None) and (labels.shape[0] != n) :
+        raise ValueError("groups has %d labels, the series has %d" % (labels.shape[0], n))
+    return labels
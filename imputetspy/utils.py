@@ -1,32 +1,587 @@
+import warnings
+from functools import partial
 import numpy as np
+from imputetspy.gaps import GapIndex
+from imputetspy.backend import use_loops, kernel
+from imputetspy.kernels import carry_gaps, ma_windows
+from imputetspy.instrument import stage
 
-def check_data(data) :  
-  data_type = str(type(data))
-  if ("list" in data_type) :
-    x = np.asarray(data)
-  elif ("series" in data_type) :
-    x = data.values
-  elif ("array" in data_type) :
-    x = data.copy()
-  else :
-    print("this function are available for single columns data, please do not use pd.DataFrame")
+@stage("check_data")
+def check_data(data, inplace = False, out = None) :
+  """ Return the array an imputer fills.
+
+  By default this is a copy of `data`. With `inplace` it is the caller's own
+  buffer (the numpy.array itself or the values behind a pandas.Series), and
+  with `out` the values of `data` are first copied into `out`. Floating
+  dtypes such as float32 are kept as they are.
+  """
+  if out is not None :
+    x = as_array(data)
+    if (not isinstance(out, np.ndarray)) or (out.shape != x.shape) :
+      raise ValueError("out must be a numpy.array with the same shape as data")
+    if not out.flags.writeable :
+      raise ValueError("out must be writable")
+    if not np.shares_memory(out, x) :
+      out[...] = x
+    return out
+  if inplace :
+    if isinstance(data, np.ndarray) :
+      x = data
+    elif hasattr(data, "array") and hasattr(data, "index") and np.ndim(data) == 1 :
+      x = np.asarray(data.array)
+    else :
+      raise TypeError("inplace imputation is only available for numpy.array and pandas.Series data")
+    if (x.dtype.kind != "f") or (not x.flags.writeable) :
+      raise ValueError("inplace imputation needs a writable floating point buffer")
+    return x
+  x = as_array(data)
+  if x.ndim > 2 :
+    raise ValueError("this function are available for 1-D and 2-D data only")
+  # Arrow views are read-only, and Arrow data has no numpy memory to share
+  if (not x.flags.writeable) or (type(x) is not np.ndarray) or ((not is_arrow(data)) and np.may_share_memory(x, data)) :
+    x = np.array(x)
   return x
 
+def is_arrow(data) :
+  """ True for pyarrow objects, recognised without importing pyarrow. """
+  return type(data).__module__.startswith("pyarrow")
+
+def as_array(data) :
+  """ numpy view of `data` (a copy only when a conversion is needed). """
+  if isinstance(data, np.ndarray) :
+    return data
+  elif is_arrow(data) :
+    from imputetspy.arrow import arrow_to_numpy
+    return arrow_to_numpy(data)
+  elif isinstance(data, (list, tuple)) :
+    return np.asarray(data, dtype=float)
+  elif hasattr(data, "to_numpy") :
+    x = data.to_numpy()
+    if x.dtype.kind not in "fiu" :
+      x = data.to_numpy(dtype=float, na_value=np.nan)
+    return x
+  raise TypeError("this function are available for numpy.array, list, pandas.Series, pandas.DataFrame and pyarrow.Array data")
+
 def consecutive(data, stepsize=1):
   return np.split(data, np.where(np.diff(data) != stepsize)[0]+1)
 
+def carry_fill(x, gaps, forward = True, na_remaining = "rev", maxgap = None, keep = None, backend = None):
+  """ Forward (LOCF) or backward (NOCB) fill of `x` in place, in linear time.
+
+  Every gap of the GapIndex `gaps` takes the value of its valid neighbour on
+  the left (LOCF) or on the right (NOCB). Gaps that have no such neighbour
+  (leading NaNs for LOCF, trailing NaNs for NOCB) are handled according to
+  `na_remaining`. `keep` selects the filled gaps and overrides `maxgap`.
+  The loop backends walk the gaps with `kernels.carry_gaps` instead.
+  """
+  if na_remaining not in ("rev", "mean", "keep") :
+    raise ValueError("the option is invalid, please fill valid option!!!!")
+  n = x.shape[0]
+  if keep is None :
+    keep = gaps.keep(maxgap)
+  src, alt = (gaps.left, gaps.right) if forward else (gaps.right, gaps.left)
+  if use_loops(backend) :
+    valid = gaps.valid_idx
+    mean = np.mean(x[valid]) if (na_remaining == "mean") and (valid.shape[0] > 0) else np.nan
+    kernel(carry_gaps, backend)(x, gaps.starts, gaps.lengths, src, alt, keep,
+                                na_remaining == "rev", na_remaining == "mean", mean)
+    return x
+  missing = (src < 0) | (src >= n)
+  ok = keep & ~missing
+  x[gaps.positions(ok)] = np.repeat(x[src[ok]], gaps.lengths[ok])
+  remaining = keep & missing
+  if remaining.any() :
+    if na_remaining == "rev" :
+      ok = remaining & (alt >= 0) & (alt < n)
+      x[gaps.positions(ok)] = np.repeat(x[alt[ok]], gaps.lengths[ok])
+    elif na_remaining == "mean" :
+      x[gaps.positions(remaining)] = np.mean(x[gaps.valid_idx])
+  return x
+
+def column_fill_mask(nan_mask, maxgap = None):
+  """ 2-D version of GapIndex.nan_idx: NaNs of each column sitting in runs of at most `maxgap`. """
+  if maxgap is None :
+    return nan_mask.copy()
+  n, m = nan_mask.shape
+  stacked = np.zeros((n + 1, m), dtype=bool)
+  stacked[:n] = nan_mask
+  gaps = GapIndex(stacked.ravel(order="F"))
+  fill = np.zeros(stacked.size, dtype=bool)
+  fill[gaps.nan_idx(maxgap)] = True
+  return fill.reshape((n + 1, m), order="F")[:n]
+
+def carry_index(nan_mask, forward = True):
+  """ Row of the last (forward) or next (backward) valid value of every cell, along axis 0.
+
+  Cells without such a row get -1 (forward) or n (backward).
+  """
+  n = nan_mask.shape[0]
+  rows = np.arange(n).reshape((n,) + (1,) * (nan_mask.ndim - 1))
+  if forward :
+    src = np.where(nan_mask, -1, rows)
+    np.maximum.accumulate(src, axis=0, out=src)
+    return src
+  src = np.where(nan_mask, n, rows)[::-1]
+  np.minimum.accumulate(src, axis=0, out=src)
+  return src[::-1]
+
+def carry_fill_2d(x, forward = True, na_remaining = "rev", maxgap = None):
+  """ Column-wise LOCF / NOCB of a 2-D array, vectorized along axis 0. """
+  if na_remaining not in ("rev", "mean", "keep") :
+    raise ValueError("the option is invalid, please fill valid option!!!!")
+  n = x.shape[0]
+  nan_mask = np.isnan(x)
+  fill = column_fill_mask(nan_mask, maxgap)
+  cols = np.broadcast_to(np.arange(x.shape[1]), x.shape)
+  if na_remaining == "mean" :
+    with warnings.catch_warnings() :
+      warnings.simplefilter("ignore", RuntimeWarning)
+      col_mean = np.nanmean(np.ascontiguousarray(x.T), axis=1)
+  src = carry_index(nan_mask, forward)
+  missing = (src < 0) | (src >= n)
+  ok = fill & ~missing
+  remaining = fill & missing
+  x[ok] = x[src[ok], cols[ok]]
+  if remaining.any() :
+    if na_remaining == "rev" :
+      src = carry_index(nan_mask, not forward)
+      ok = remaining & (src >= 0) & (src < n)
+      x[ok] = x[src[ok], cols[ok]]
+    elif na_remaining == "mean" :
+      x[remaining] = col_mean[cols[remaining]]
+  return x
+
+def stat_fill_2d(x, option = "mean", maxgap = None):
+  """ Column-wise overall mean / median fill of a 2-D array, vectorized along axis 0. """
+  nan_mask = np.isnan(x)
+  fill = column_fill_mask(nan_mask, maxgap)
+  with warnings.catch_warnings() :
+    warnings.simplefilter("ignore", RuntimeWarning)
+    # reduce contiguous rows of the transpose so the summation order matches the 1-D path
+    if option == "mean" :
+      val = np.nanmean(np.ascontiguousarray(x.T), axis=1)
+    else :
+      val = np.nanmedian(x, axis=0)
+  x[fill] = np.broadcast_to(val, x.shape)[fill]
+  return x
+
+def group_stat(obs, groups, n_groups, option = "mean"):
+  """ Statistic of the observed values `obs` within each group, in one vectorized reduction.
+
+  `groups` holds the group number (0 to n_groups - 1) of every value. Sums
+  ("mean", "harmonic", "geometric") are bincount reductions; "median" and
+  "mode" sort the values by group and value once. The mode is the most
+  frequent value, the smallest one among ties (as scipy.stats.mode).
+  Groups without observations get NaN, and so do the harmonic mean of a
+  group with a value <= 0 and the geometric mean of one with a negative value.
+  """
+  counts = np.bincount(groups, minlength = n_groups)
+  with warnings.catch_warnings() :
+    warnings.simplefilter("ignore", RuntimeWarning)
+    if option == "mean" :
+      return np.bincount(groups, obs, minlength = n_groups) / counts
+    elif option == "harmonic" :
+      # undefined (NaN) for groups with a value that is not positive
+      bad = np.bincount(groups, obs <= 0, minlength = n_groups) > 0
+      return np.where(bad, np.nan, counts / np.bincount(groups, 1 / obs, minlength = n_groups))
+    elif option == "geometric" :
+      return np.exp(np.bincount(groups, np.log(obs), minlength = n_groups) / counts)
+  if option not in ("median", "mode") :
+    raise ValueError("option must be 'mean', 'median', 'mode', 'harmonic' or 'geometric'")
+  val = np.full(n_groups, np.nan)
+  if obs.shape[0] == 0 :
+    return val
+  order = np.argsort(obs) if n_groups == 1 else np.lexsort((obs, groups))
+  v, g = obs[order], groups[order]
+  some = counts > 0
+  if option == "median" :
+    first = np.cumsum(counts) - counts
+    val[some] = (v[first[some] + (counts[some] - 1) // 2] + v[first[some] + counts[some] // 2]) / 2
+    return val
+  # runs of equal values within a group, then the longest run of every group
+  new = np.concatenate(([True], (g[1:] != g[:-1]) | (v[1:] != v[:-1])))
+  run = np.flatnonzero(new)
+  run_len = np.diff(np.concatenate((run, [v.shape[0]])))
+  best = np.lexsort((v[run], -run_len, g[run]))
+  head = best[np.concatenate(([True], g[run][best][1:] != g[run][best][:-1]))]
+  val[g[run][head]] = v[run][head]
+  return val
+
+def row_stat(block, option = "mean"):
+  """ Statistic of every row of a NaN padded 2-D block, see `group_stat`. """
+  with warnings.catch_warnings() :
+    warnings.simplefilter("ignore", RuntimeWarning)
+    if option == "mean" :
+      return np.nanmean(block, axis = 1)
+    elif option == "median" :
+      return np.nanmedian(block, axis = 1)
+    elif option == "harmonic" :
+      return np.where(np.any(block <= 0, axis = 1), np.nan,
+                      np.sum(~np.isnan(block), axis = 1) / np.nansum(1 / block, axis = 1))
+    elif option == "geometric" :
+      # nanmean would skip the NaN logs of negative values, which make the mean undefined
+      return np.where(np.any(block < 0, axis = 1), np.nan, np.exp(np.nanmean(np.log(block), axis = 1)))
+  # mode: sort every row (NaN last) and take its longest run, the first one among ties
+  s = np.sort(block, axis = 1)
+  new = np.ones(s.shape, dtype=bool)
+  new[:, 1:] = s[:, 1:] != s[:, :-1]
+  run = np.cumsum(new.ravel()) - 1
+  run_len = np.bincount(run)[run].reshape(s.shape)
+  run_len[np.isnan(s)] = 0
+  return s[np.arange(s.shape[0]), np.argmax(run_len, axis = 1)]
+
+def local_stat(x, gaps, keep, window, option = "mean", block = 1 << 22):
+  """ Statistic of the observations within `window` positions before and after each selected gap.
+
+  "mean", "harmonic" and "geometric" come from prefix sums over the series,
+  so the cost does not depend on `window`. "median" and "mode" (and the
+  others when some values are not positive) lay the neighbourhoods out as a
+  NaN padded (gaps, 2 * window) array, reduced row-wise in chunks of at
+  most `block` cells.
+  """
+  n = x.shape[0]
+  a = np.maximum(gaps.starts[keep] - window, 0)
+  b = gaps.starts[keep]
+  c = gaps.right[keep]
+  d = np.minimum(c + window, n)
+  obs = ~gaps.mask
+  f = None
+  if option in ("mean", "harmonic", "geometric") :
+    with warnings.catch_warnings() :
+      warnings.simplefilter("ignore", RuntimeWarning)
+      f = x if option == "mean" else (1 / x if option == "harmonic" else np.log(x))
+    # zeros or negative values would poison every later prefix sum
+    if not np.all(np.isfinite(f[obs])) or ((option == "harmonic") and np.any(x[obs] <= 0)) :
+      f = None
+  if f is not None :
+    f = np.concatenate(([0.0], np.cumsum(np.where(obs, f, 0.0))))
+    cnt = np.concatenate(([0], np.cumsum(obs)))
+    total = f[b] - f[a] + f[d] - f[c]
+    count = cnt[b] - cnt[a] + cnt[d] - cnt[c]
+    with warnings.catch_warnings() :
+      warnings.simplefilter("ignore", RuntimeWarning)
+      if option == "mean" :
+        return total / count
+      elif option == "harmonic" :
+        return count / total
+      return np.exp(total / count)
+  val = np.empty(a.shape[0])
+  cols = np.arange(2 * window)
+  left = cols < window
+  step = max(1, block // (2 * window))
+  for i in range(0, a.shape[0], step) :
+    j = slice(i, i + step)
+    # the first `window` columns end right before the gap, the others start right after it
+    p = np.where(left, b[j, None] - window + cols, c[j, None] + cols - window)
+    inside = np.where(left, p >= a[j, None], p < d[j, None])
+    val[j] = row_stat(np.where(inside, x[np.clip(p, 0, n - 1)], np.nan), option)
+  return val
+
+def get_rng(rng = None):
+  """ Random source of `na_random`.
+
+  None keeps the global numpy.random state (so numpy.random.seed still
+  applies), a numpy.random.Generator or RandomState is used as is, and
+  anything else (an int, a SeedSequence) seeds a new Generator.
+  """
+  if rng is None :
+    return np.random
+  if isinstance(rng, (np.random.Generator, np.random.RandomState)) :
+    return rng
+  return np.random.default_rng(rng)
+
+def random_draw(rng, cols, obs, obs_cols, n_cols, lower_bound = None, upper_bound = None, distribution = "uniform"):
+  """ Random values of the missing cells `cols` (column of each cell), drawn in one call.
+
+  `obs` holds the observed values of every column, column after column, with
+  their column in `obs_cols`. "uniform" draws between the bounds, which
+  default to the observed minimum and maximum of each column. "empirical"
+  resamples the observed values lying within the bounds. Cells of columns
+  without such values stay NaN.
+  """
+  counts = np.bincount(obs_cols, minlength = n_cols)
+  first = np.cumsum(counts) - counts
+  some = counts > 0
+  if distribution == "uniform" :
+    lo = np.full(n_cols, np.nan if lower_bound is None else lower_bound, dtype=float)
+    hi = np.full(n_cols, np.nan if upper_bound is None else upper_bound, dtype=float)
+    if lower_bound is None :
+      lo[some] = np.minimum.reduceat(obs, first[some])
+    if upper_bound is None :
+      hi[some] = np.maximum.reduceat(obs, first[some])
+    lo, hi = lo[cols], hi[cols]
+    ok = ~(np.isnan(lo) | np.isnan(hi))
+    out = np.full(cols.shape[0], np.nan)
+    out[ok] = rng.uniform(lo[ok], hi[ok])
+    return out
+  elif distribution == "empirical" :
+    inside = np.ones(obs.shape[0], dtype=bool)
+    if lower_bound is not None :
+      inside &= obs >= lower_bound
+    if upper_bound is not None :
+      inside &= obs <= upper_bound
+    obs, obs_cols = obs[inside], obs_cols[inside]
+    counts = np.bincount(obs_cols, minlength = n_cols)
+    first = np.cumsum(counts) - counts
+    n = counts[cols]
+    ok = n > 0
+    out = np.full(cols.shape[0], np.nan)
+    # floor(u * n) with u in [0, 1) picks one of the n observed values of the column
+    out[ok] = obs[first[cols[ok]] + (rng.random(int(ok.sum())) * n[ok]).astype(np.int64)]
+    return out
+  raise ValueError("distribution must be 'uniform' or 'empirical'")
+
+def random_fill_2d(x, lower_bound = None, upper_bound = None, maxgap = None, rng = None, distribution = "uniform"):
+  """ Column-wise `na_random` of a 2-D array, every value drawn in one call, column after column. """
+  nan_mask = np.isnan(x)
+  fill = column_fill_mask(nan_mask, maxgap)
+  cols, rows = np.nonzero(fill.T)
+  obs_cols, obs_rows = np.nonzero(~nan_mask.T)
+  x[rows, cols] = random_draw(get_rng(rng), cols, x[obs_rows, obs_cols], obs_cols, x.shape[1],
+                              lower_bound, upper_bound, distribution)
+  return x
+
 def power_exp(x) :
-  result = []
-  for i in range(x) :
-    j = i + 1
-    result.append(np.power(1/2, j))
-  return np.array(result)
+  return np.power(1/2, np.arange(1, x + 1))
 
+def linear_weights(x) :
+  return 1/(np.arange(x) + 2)
+
+def window_bounds(valid_idx, nan_idx, half):
+  """ Moving average window of each NaN as positions into `valid_idx`.
+
+  The window of a NaN holds the `half` closest valid observations on its left
+  (`start:pos`) and on its right (`pos:stop`). With `half` equal to 0 every
+  earlier observation is taken on the left and none on the right, which is
+  what slicing with `[-0:]` and `[:0]` gives.
+  """
+  pos = np.searchsorted(valid_idx, nan_idx)
+  if half > 0 :
+    start = np.maximum(pos - half, 0)
+  else :
+    start = np.zeros_like(pos)
+  stop = np.minimum(pos + half, valid_idx.shape[0])
+  return start, pos, stop
+
+def distance_weights(dist, weighting):
+  """ Weights of observations `dist` sampling steps away from the missing value. """
+  if weighting == "linear" :
+    return 1/(1 + dist)
+  return np.power(1/2, dist)
+
+def window_reduce(vals, start, pos, stop, func = np.mean, weighting = None, tv = None, tq = None):
+  """ Reduce every window of `vals` with `func` in one call per window width.
+
+  Windows of the same width are gathered into a contiguous 2-D block and
+  reduced along axis 1, which keeps the summation order (and hence the
+  result) identical to reducing each window on its own. `func` must accept
+  an `axis` argument, e.g. numpy.mean or numpy.median.
+
+  By default the weights depend on the rank of an observation in its half
+  window. When the times of the observations `tv` and of the missing values
+  `tq` are given (in sampling steps), they depend on the time distance.
+  """
+  out = np.full(start.shape[0], np.nan)
+  width = stop - start
+  for w in np.unique(width) :
+    if w == 0 :
+      continue
+    sel = np.flatnonzero(width == w)
+    cols = np.arange(w)
+    win = vals[start[sel, None] + cols]
+    if (weighting is not None) and (tv is not None) :
+      win = distance_weights(np.abs(tv[start[sel, None] + cols] - tq[sel, None]), weighting) * win
+    elif weighting is not None :
+      n_left = (pos[sel] - start[sel])[:, None]
+      rank = cols - np.where(cols >= n_left, n_left, 0)
+      if weighting == "linear" :
+        win = (1/(rank + 2)) * win
+      else :
+        win = np.power(1/2, rank + 1) * win
+    out[sel] = func(win, axis = 1)
+  return out
+
+def ma_fill_2d(x, k = 4, func = "mean", weighting = None, maxgap = None):
+  """ Column-wise moving average of a 2-D array (`na_ma` with func "mean" or "median").
+
+  The columns are laid end to end and the windows of `window_bounds` are cut
+  at the column boundaries, so every window holds the same observations as
+  for the column alone; `window_reduce` then reduces all of them at once.
+  """
+  n, m = x.shape
+  flat = x.ravel(order="F")
+  nan_mask = np.isnan(flat)
+  valid_idx = np.flatnonzero(~nan_mask)
+  nan_idx = np.flatnonzero(column_fill_mask(nan_mask.reshape((n, m), order="F"), maxgap).ravel(order="F"))
+  half = k // 2
+  col = nan_idx // n
+  first = np.searchsorted(valid_idx, np.arange(m) * n)[col]
+  end = np.searchsorted(valid_idx, (np.arange(m) + 1) * n)[col]
+  start, pos, stop = window_bounds(valid_idx, nan_idx, half)
+  start = np.maximum(start, first) if half > 0 else first
+  stop = np.minimum(stop, end)
+  val = window_reduce(flat[valid_idx], start, pos, stop, np.median if func == "median" else np.mean, weighting)
+  x[nan_idx % n, col] = val
+  return x
+
+def window_apply(vals, start, pos, stop, func, weighting = None, tv = None, tq = None):
+  """ Fallback of `window_reduce` for callables without an `axis` argument. """
+  inp = []
+  for i, (a, p, b) in enumerate(zip(start, pos, stop)) :
+    prv = vals[a:p]
+    nxt = vals[p:b]
+    if (weighting is not None) and (tv is not None) :
+      prv = distance_weights(np.abs(tv[a:p] - tq[i]), weighting) * prv
+      nxt = distance_weights(np.abs(tv[p:b] - tq[i]), weighting) * nxt
+    elif weighting == "linear" :
+      prv = linear_weights(len(prv)) * prv
+      nxt = linear_weights(len(nxt)) * nxt
+    elif weighting == "exponential" :
+      prv = power_exp(len(prv)) * prv
+      nxt = power_exp(len(nxt)) * nxt
+    inp.append(func(np.append(prv, nxt)))
+  return inp
+
+def window_loop(vals, start, pos, stop, median = False, weighting = None, tv = None, tq = None, backend = None):
+  """ `window_reduce` of the mean (or median) walked window by window by `kernels.ma_windows`. """
+  out = np.empty(start.shape[0])
+  empty = np.empty(0)
+  kernel(ma_windows, backend)(vals, start, pos, stop, {None: 0, "linear": 1, "exponential": 2}[weighting],
+                              empty if tv is None else tv, empty if tq is None else tq, median, out)
+  return out
+
+def gap_anchors(gaps, keep = None):
+  """ Positions of the selected gaps with the index of their left and right anchors.
+
+  A gap at the start (end) of the series takes its right (left) anchor on
+  both sides, so it is filled with the nearest observation. Returns the
+  positions and, for every position, the `lo` and `hi` anchor indices.
+  """
+  if keep is None :
+    keep = np.ones(len(gaps), dtype=bool)
+  lengths = gaps.lengths[keep]
+  left, right = gaps.left[keep], gaps.right[keep]
+  left = np.where(left < 0, right, left)
+  right = np.where(right >= gaps.n, left, right)
+  return gaps.positions(keep), np.repeat(left, lengths), np.repeat(right, lengths)
+
+def at_times(t, *idx):
+  """ Positions `idx` on the time axis `t` (the positions themselves for unit spacing). """
+  if t is None :
+    return idx
+  return tuple(t[i] for i in idx)
+
+def linear_fill(x, gaps, keep = None, t = None):
+  """ Linear interpolation evaluated at the missing positions of the selected gaps only.
+
+  Every value is `slope * (i - lo) + y[lo]` with the slope of its two anchors,
+  the formula of numpy.interp and scipy's interp1d, so results are identical
+  to interpolating the whole series. With a time axis `t` the distances are
+  taken on `t` instead of the positions.
+  """
+  pos, lo, hi = gap_anchors(gaps, keep)
+  if (gaps.valid_idx.shape[0] == 0) or (pos.shape[0] == 0) :
+    return x
+  y_lo, y_hi = x[lo], x[hi]
+  inner = lo != hi
+  val = y_lo.copy()
+  t_pos, t_lo, t_hi = at_times(t, pos[inner], lo[inner], hi[inner])
+  slope = (y_hi[inner] - y_lo[inner]) / (t_hi - t_lo)
+  val[inner] = slope * (t_pos - t_lo) + y_lo[inner]
+  x[pos] = val
+  return x
+
+def linear_fill_2d(x, maxgap = None):
+  """ Column-wise `linear_fill` of a 2-D array, vectorized along axis 0.
+
+  The anchors of every missing cell are the rows of the last and next valid
+  values of its column (the nearest one at both ends), and the values use the
+  formula of `linear_fill`, so results are identical to filling each column.
+  """
+  n = x.shape[0]
+  nan_mask = np.isnan(x)
+  rows, cols = np.nonzero(column_fill_mask(nan_mask, maxgap))
+  lo = carry_index(nan_mask, True)[rows, cols]
+  hi = carry_index(nan_mask, False)[rows, cols]
+  lo = np.where(lo < 0, hi, lo)
+  hi = np.where(hi >= n, lo, hi)
+  ok = lo < n
+  rows, cols, lo, hi = rows[ok], cols[ok], lo[ok], hi[ok]
+  y_lo, y_hi = x[lo, cols], x[hi, cols]
+  inner = lo != hi
+  val = y_lo.copy()
+  slope = (y_hi[inner] - y_lo[inner]) / (hi[inner] - lo[inner])
+  val[inner] = slope * (rows[inner] - lo[inner]) + y_lo[inner]
+  x[rows, cols] = val
+  return x
+
+def nearest_fill(x, gaps, keep = None, t = None):
+  """ Nearest observation interpolation at the missing positions of the selected gaps.
+
+  Positions halfway between two observations take the left one, as
+  interp1d(kind="nearest") does.
+  """
+  pos, lo, hi = gap_anchors(gaps, keep)
+  if (gaps.valid_idx.shape[0] == 0) or (pos.shape[0] == 0) :
+    return x
+  t_pos, t_lo, t_hi = at_times(t, pos, lo, hi)
+  x[pos] = np.where(t_pos - t_lo <= t_hi - t_pos, x[lo], x[hi])
+  return x
+
+def _fitter(kind):
+  """ Interpolator class of a spline `kind` and the number of points it needs. """
+  from scipy import interpolate
+  if kind == "cubic" :
+    return partial(interpolate.make_interp_spline, k = 3), 4
+  elif kind == "quadratic" :
+    return partial(interpolate.make_interp_spline, k = 2), 3
+  elif kind == "pchip" :
+    return interpolate.PchipInterpolator, 2
+  elif kind == "akima" :
+    return interpolate.Akima1DInterpolator, 2
+  raise ValueError("unknown spline kind %r" % kind)
+
+def spline_fill(x, gaps, keep = None, kind = "cubic", window = 8192, margin = 32, t = None):
+  """ Piecewise polynomial interpolation fitted on bounded windows of observations.
+
+  The observations are cut into blocks of `window` points. Each block is
+  extended by `margin` observations on both sides and gets its own
+  interpolator, which is evaluated at the gaps whose left anchor falls in the
+  block, so the cost is O(n) and memory stays bounded.
+
+  `kind` is "cubic" or "quadratic" (the not-a-knot splines of interp1d), or
+  "pchip" / "akima" (scipy's shape preserving PchipInterpolator and
+  Akima1DInterpolator). PCHIP and Akima only look at 1 and 2 neighbours on
+  each side, so windowing does not change them. The influence of a data
+  point on a cubic spline decays by a factor of about 3.7 per knot (5.8 for
+  quadratic), so with the default margin the splines match a fit on the
+  whole series to rounding error.
+
+  Gaps at the start or end of the series take the nearest observation. With
+  a time axis `t` the interpolators are fitted and evaluated on `t`.
+  """
+  fitter, min_points = _fitter(kind)
+  valid = gaps.valid_idx
+  if valid.shape[0] < min_points :
+    raise ValueError("%s interpolation needs at least %d observed values" % (kind, min_points))
+  pos, lo, hi = gap_anchors(gaps, keep)
+  edge = lo == hi
+  x[pos[edge]] = x[lo[edge]]
+  pos, lo = pos[~edge], lo[~edge]
+  if pos.shape[0] == 0 :
+    return x
+  # rank of the left anchor among the observations, hence the block of each position
+  block = np.searchsorted(valid, lo) // window
+  bounds = np.flatnonzero(np.diff(block)) + 1
+  for a, b in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [pos.shape[0]]))) :
+    i = block[a] * window
+    first = max(min(i - margin, valid.shape[0] - min_points), 0)
+    sel = valid[first:max(i + window + margin + 1, first + min_points)]
+    spline = fitter(*at_times(t, sel), x[sel])
+    x[pos[a:b]] = spline(*at_times(t, pos[a:b]))
+  return x
 
-#!/usr/bin/env python
-import numpy as np
 
-#!/usr/bin/env python
 def slopes(x,y):
   """
   SLOPES calculate the slope y'(x) Given data vectors X and Y SLOPES
@@ -26,4 +26,6 @@ setup(
         author_email='ahmadzaenal125@gmail.com',
         keywords='time series, imputation',  # Optional
         install_requires=['numpy','pandas>=0.25.0','matplotlib','scikit-learn>=0.19.1', 'statsmodels', 'patsy'],  # Optional
+        extras_require={'numba': ['numba'], 'arrow': ['pyarrow']},
+        entry_points={'console_scripts': ['imputetspy = imputetspy.cli:main']},
      )
@@ -0,0 +1,148 @@
+""" AsyncImputer: coalescing, back-pressure and cancellation. """
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy import aio
+from imputetspy.aio import AsyncImputer
+
+CALLS = []
+RELEASE = threading.Event()
+
+
+def blocking(data, tag = 0):
+    """ Imputer waiting for RELEASE, counting its calls. """
+    CALLS.append(tag)
+    RELEASE.wait(5)
+    return imputetspy.locf(data)
+
+
+@pytest.fixture(autouse = True)
+def reset():
+    CALLS.clear()
+    RELEASE.clear()
+    yield
+    RELEASE.set()
+
+
+def series(n = 200):
+    x = np.cumsum(np.random.default_rng(0).standard_normal(n))
+    x[::7] = np.nan
+    return x
+
+
+async def settle():
+    # let the tasks reach their worker
+    for _ in range(20) :
+        await asyncio.sleep(0.005)
+
+
+def test_awaitable_imputers():
+    x = series()
+
+    async def main():
+        return await aio.na_ma(x, k = 6), await aio.na_interpolate(x, option = "spline")
+
+    ma, spline = asyncio.run(main())
+    assert np.array_equal(ma, imputetspy.na_ma(x, k = 6))
+    assert np.array_equal(spline, imputetspy.na_interpolate(x, option = "spline"))
+
+
+def test_identical_calls_share_one_computation():
+    x = series()
+
+    async def main():
+        async with AsyncImputer(n_jobs = 2) as imputer :
+            calls = [asyncio.ensure_future(imputer.run(blocking, x)) for _ in range(5)]
+            await settle()
+            RELEASE.set()
+            return await asyncio.gather(*calls)
+
+    results = asyncio.run(main())
+    assert CALLS == [0]
+    assert len({id(r) for r in results}) == 5
+    assert all(np.array_equal(r, imputetspy.locf(x)) for r in results)
+
+
+def test_max_pending():
+    x = series()
+
+    async def main():
+        async with AsyncImputer(n_jobs = 1, max_pending = 2) as imputer :
+            a = asyncio.ensure_future(imputer.run(blocking, x, tag = 1))
+            b = asyncio.ensure_future(imputer.run(blocking, x, tag = 2))
+            await settle()
+            with pytest.raises(asyncio.QueueFull) :
+                await imputer.run(blocking, x, tag = 3)
+            # an identical call joins a pending imputation instead of queueing
+            c = asyncio.ensure_future(imputer.run(blocking, x, tag = 2))
+            await settle()
+            assert imputer.pending == 2
+            RELEASE.set()
+            await asyncio.gather(a, b, c)
+            await asyncio.sleep(0)
+            return imputer.pending
+
+    assert asyncio.run(main()) == 0
+    assert sorted(CALLS) == [1, 2]
+
+
+def test_cancel_waiting_call():
+    x = series()
+
+    async def main():
+        async with AsyncImputer(n_jobs = 1) as imputer :
+            running = asyncio.ensure_future(imputer.run(blocking, x, tag = 1))
+            waiting = asyncio.ensure_future(imputer.run(blocking, x, tag = 2))
+            await settle()
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError) :
+                await waiting
+            RELEASE.set()
+            await running
+            await asyncio.sleep(0)
+            return imputer.pending
+
+    assert asyncio.run(main()) == 0
+    # the cancelled imputation never reached a worker
+    assert CALLS == [1]
+
+
+def test_cancel_one_of_shared_callers():
+    x = series()
+
+    async def main():
+        async with AsyncImputer(n_jobs = 1) as imputer :
+            first = asyncio.ensure_future(imputer.run(blocking, x))
+            second = asyncio.ensure_future(imputer.run(blocking, x))
+            await settle()
+            first.cancel()
+            RELEASE.set()
+            return await second
+
+    assert np.array_equal(asyncio.run(main()), imputetspy.locf(x))
+
+
+def test_several_event_loops():
+    imputer = AsyncImputer(n_jobs = 2)
+    x = series()
+    for _ in range(3) :
+        result = asyncio.run(imputer.run(imputetspy.locf, x))
+        assert np.array_equal(result, imputetspy.locf(x))
+    imputer.close()
+
+
+def test_long_series():
+    # keyed and copied in a worker thread
+    x = series(4 * aio.INLINE_SIZE)
+
+    async def main():
+        async with AsyncImputer(n_jobs = 1) as imputer :
+            return await asyncio.gather(*[imputer.run(imputetspy.locf, x) for _ in range(3)])
+
+    results = asyncio.run(main())
+    assert len({id(r) for r in results}) == 3
+    assert all(np.array_equal(r, imputetspy.locf(x)) for r in results)
@@ -0,0 +1,115 @@
+""" Arrow conversion and row-group-wise Parquet imputation. """
+import numpy as np
+import pytest
+
+import imputetspy
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+from imputetspy.arrow import arrow_to_numpy, impute_parquet
+
+
+def walk(n, seed = 0):
+    x = np.cumsum(np.random.default_rng(seed).standard_normal(n))
+    x[np.random.default_rng(seed + 1).random(n) < 0.3] = np.nan
+    x[40:55] = np.nan
+    return x
+
+
+def write(path, x, row_group_size, **columns):
+    table = pa.table(dict(value = pa.array(x, from_pandas = True), **columns))
+    pq.write_table(table, path, row_group_size = row_group_size)
+
+
+def test_zero_copy_view():
+    data = pa.array([1.0, 2.0, 3.0])
+    got = arrow_to_numpy(data)
+    assert not got.flags.writeable
+    assert got.ctypes.data == data.buffers()[1].address
+    # the imputers copy read-only input
+    out = imputetspy.locf(data)
+    assert out.flags.writeable and np.array_equal(out, got)
+
+
+def test_nulls_become_nan():
+    got = arrow_to_numpy(pa.array([1.0, None, 3.0]))
+    assert np.array_equal(got, [1.0, np.nan, 3.0], equal_nan = True)
+    assert arrow_to_numpy(pa.array([None, None])).dtype == np.float64
+
+
+def test_integers_are_cast():
+    got = arrow_to_numpy(pa.array([1, None, 3], type = pa.int32()))
+    assert got.dtype == np.float64
+    assert np.array_equal(got, [1.0, np.nan, 3.0], equal_nan = True)
+
+
+def test_chunked_array():
+    data = pa.chunked_array([[1.0, None], [], [3], [4.0, None]], type = pa.float64())
+    got = arrow_to_numpy(data)
+    assert np.array_equal(got, [1.0, np.nan, 3.0, 4.0, np.nan], equal_nan = True)
+    assert np.array_equal(imputetspy.na_interpolate(data), [1.0, 2.0, 3.0, 4.0, 4.0])
+
+
+def test_unsupported_data():
+    with pytest.raises(TypeError) :
+        arrow_to_numpy(pa.array(["a", "b"]))
+    with pytest.raises(TypeError) :
+        arrow_to_numpy([1.0, 2.0])
+
+
+@pytest.mark.parametrize("method, kwargs", [
+    ("locf", dict()),
+    ("nocb", dict(na_remaining = "keep")),
+    ("na_ma", dict(k = 4)),
+    ("na_interpolate", dict()),
+], ids = lambda v: v if isinstance(v, str) else None)
+@pytest.mark.parametrize("row_group_size", [7, 50, 1000])
+def test_row_groups_match_batch(tmp_path, method, kwargs, row_group_size):
+    x = walk(300)
+    write(tmp_path / "in.parquet", x, row_group_size, other = np.arange(300))
+    rows = impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "value", method, **kwargs)
+    assert rows == 300
+    out = pq.read_table(tmp_path / "out.parquet")
+    assert pq.ParquetFile(tmp_path / "out.parquet").num_row_groups == pq.ParquetFile(tmp_path / "in.parquet").num_row_groups
+    assert out.column("other").to_pylist() == list(range(300))
+    batch = getattr(imputetspy, method)(x, **(dict(kwargs, option = "linear") if method == "na_interpolate" else kwargs))
+    assert np.allclose(arrow_to_numpy(out.column("value")), batch, rtol = 1e-12, equal_nan = True)
+
+
+def test_maxgap_across_row_groups(tmp_path):
+    x = np.arange(60, dtype = float)
+    # gaps straddling the row group boundaries at 10, 20 and 30
+    x[8:13] = np.nan
+    x[19:21] = np.nan
+    x[25:45] = np.nan
+    write(tmp_path / "in.parquet", x, 10)
+    impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "value", "na_interpolate", maxgap = 5)
+    values = pq.read_table(tmp_path / "out.parquet").column("value")
+    assert values.null_count == 20
+    got = arrow_to_numpy(values)
+    assert np.array_equal(got, imputetspy.na_interpolate(x, maxgap = 5), equal_nan = True)
+    assert np.array_equal(got[8:21], np.arange(8, 21)) and np.isnan(got[25:45]).all()
+
+
+def test_integer_column(tmp_path):
+    table = pa.table(dict(count = pa.array([1, None, None, 4, None], type = pa.int64())))
+    pq.write_table(table, tmp_path / "in.parquet", row_group_size = 2)
+    impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "count", "na_interpolate")
+    out = pq.read_table(tmp_path / "out.parquet").column("count")
+    assert out.type == pa.float64()
+    assert out.to_pylist() == [1.0, 2.0, 3.0, 4.0, 4.0]
+
+
+def test_empty_file(tmp_path):
+    pq.write_table(pa.table(dict(value = pa.array([], type = pa.float64()))), tmp_path / "in.parquet")
+    assert impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "value") == 0
+    out = pq.read_table(tmp_path / "out.parquet")
+    assert (out.num_rows == 0) and (out.schema.field("value").type == pa.float64())
+
+
+def test_bad_arguments(tmp_path):
+    write(tmp_path / "in.parquet", walk(20), 10)
+    with pytest.raises(ValueError) :
+        impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "missing")
+    with pytest.raises(ValueError) :
+        impute_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "value", "na_kalman")
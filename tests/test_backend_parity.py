@@ -0,0 +1,115 @@
+""" The loop-kernel backends must give the results of the numpy backend, bit for bit.
+
+locf / nocb (every na_remaining, with and without maxgap, 1-D and 2-D),
+na_ma (k, weightings, median, k = 0), the gap index and na_kalman run on
+random series. The vectorized Kalman filter agrees with the loops to
+rounding only. The numba cases are skipped when numba is not installed.
+IMPUTETSPY_PARITY_CASES sets the number of random series (30 by default):
+
+    IMPUTETSPY_PARITY_CASES=200 python -m pytest tests/test_backend_parity.py
+"""
+import os
+
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.backend import numba_available
+from imputetspy.gaps import GapIndex
+from imputetspy.kalman import VECTORIZE_MIN, fit_kalman
+
+BACKENDS = [
+    "python",
+    pytest.param("numba", marks = pytest.mark.skipif(not numba_available(), reason = "numba is not installed")),
+]
+N_CASES = int(os.environ.get("IMPUTETSPY_PARITY_CASES", 30))
+
+
+def series(rng, n, rate):
+    x = np.cumsum(rng.standard_normal(n))
+    x[rng.random(n) < rate] = np.nan
+    # a few longer gaps, at the ends too
+    for s in rng.integers(0, n, 3) :
+        x[s:s + rng.integers(1, 12)] = np.nan
+    return x
+
+
+def same(a, b):
+    return (a.shape == b.shape) and np.array_equal(a, b, equal_nan = True)
+
+
+def random_series(seed):
+    rng = np.random.default_rng(seed)
+    return [(series(rng, int(rng.integers(1, 400)), rng.uniform(0, 0.6)), [None, int(rng.integers(1, 6))][rng.integers(0, 2)])
+            for _ in range(N_CASES)]
+
+
+def grid():
+    cases = []
+    for na_remaining in ("rev", "mean", "keep") :
+        cases.append(("locf", dict(na_remaining = na_remaining)))
+        cases.append(("nocb", dict(na_remaining = na_remaining)))
+    for k in (0, 1, 4, 9) :
+        for weighting in (None, "linear", "exponential") :
+            cases.append(("na_ma", dict(k = k, weighting = weighting)))
+        cases.append(("na_ma", dict(k = k, func = "median")))
+    return cases
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("method, kwargs", grid(), ids = lambda v: v if isinstance(v, str) else None)
+def test_imputers(backend, method, kwargs):
+    fn = getattr(imputetspy, method)
+    for x, maxgap in random_series(0) :
+        expected = fn(x, backend = "numpy", maxgap = maxgap, **kwargs)
+        assert same(expected, fn(x, backend = backend, maxgap = maxgap, **kwargs)), (method, kwargs, maxgap, x)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("method", ["locf", "nocb"])
+def test_2d(backend, method):
+    fn = getattr(imputetspy, method)
+    for x, maxgap in random_series(1) :
+        x = np.column_stack([x, x[::-1]])
+        assert same(fn(x, backend = "numpy", maxgap = maxgap), fn(x, backend = backend, maxgap = maxgap))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_gap_index(backend):
+    rng = np.random.default_rng(2)
+    for _ in range(N_CASES) :
+        mask = rng.random(int(rng.integers(0, 300))) < rng.uniform(0, 0.9)
+        a, b = GapIndex(mask), GapIndex(mask, backend = backend)
+        keep = rng.random(a.starts.shape[0]) < 0.5
+        assert same(a.starts, b.starts) and same(a.lengths, b.lengths)
+        assert same(a.positions(), b.positions()) and same(a.positions(keep), b.positions(keep))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("model", ["level", "trend"])
+def test_kalman(backend, model):
+    x = series(np.random.default_rng(3), 150, 0.2)
+    assert same(imputetspy.na_kalman(x, model = model, backend = "numpy"),
+                imputetspy.na_kalman(x, model = model, backend = backend))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("model", ["level", "trend"])
+def test_kalman_vectorized(backend, model):
+    x = series(np.random.default_rng(5), 4 * VECTORIZE_MIN, 0.01)
+    x[1000:1200] = np.nan
+    params = fit_kalman(x, model, backend = "numpy")
+    for smooth in (True, False) :
+        assert np.allclose(imputetspy.na_kalman(x, model = model, params = params, smooth = smooth, backend = "numpy"),
+                           imputetspy.na_kalman(x, model = model, params = params, smooth = smooth, backend = backend),
+                           rtol = 1e-9, atol = 1e-9)
+
+
+def test_python_matches_numba():
+    if not numba_available() :
+        pytest.skip("numba is not installed")
+    for x, maxgap in random_series(4) :
+        for method, kwargs in grid() :
+            fn = getattr(imputetspy, method)
+            assert same(fn(x, backend = "python", maxgap = maxgap, **kwargs),
+                        fn(x, backend = "numba", maxgap = maxgap, **kwargs)), (method, kwargs)
@@ -0,0 +1,78 @@
+""" ResultCache: memory and disk tiers. """
+import os
+
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.cache import ResultCache
+
+
+def series(n, seed):
+    x = np.cumsum(np.random.default_rng(seed).standard_normal(n))
+    x[::5] = np.nan
+    return x
+
+
+def test_hits_and_misses():
+    cache = ResultCache()
+    x = series(100, 0)
+    first = cache.call(imputetspy.na_ma, x, k = 4)
+    again = cache.call(imputetspy.na_ma, x, k = 4)
+    assert np.array_equal(first, again) and (again is not first)
+    cache.call(imputetspy.na_ma, x, k = 6)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_memory_budget():
+    cache = ResultCache(max_bytes = 2500)
+    for seed in range(5) :
+        cache.call(imputetspy.locf, series(100, seed))
+    assert (len(cache) == 3) and (cache.nbytes <= 2500)
+
+
+def test_disk_tier_budget(tmp_path, monkeypatch):
+    cache = ResultCache(max_bytes = 0, directory = tmp_path, disk_max_bytes = 3000)
+    # misses do not rescan the directory
+    monkeypatch.setattr(os, "scandir", None)
+    for seed in range(6) :
+        cache.call(imputetspy.locf, series(100, seed))
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) == 3
+    assert cache.disk_nbytes == sum(os.path.getsize(tmp_path / f) for f in files) <= 3000
+    # the newest results are kept
+    cache.call(imputetspy.locf, series(100, 5))
+    assert cache.disk_hits == 1
+    monkeypatch.undo()
+    # a new cache counts the files already there
+    again = ResultCache(directory = tmp_path, disk_max_bytes = 3000)
+    assert again.disk_nbytes == cache.disk_nbytes
+
+
+def test_read_only_disk_tier(tmp_path, monkeypatch):
+    x = series(100, 0)
+    expected = ResultCache(directory = tmp_path).call(imputetspy.locf, x)
+
+    def fail(*args, **kwargs):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(os, "utime", fail)
+    monkeypatch.setattr(os, "replace", fail)
+    cache = ResultCache(directory = tmp_path, disk_max_bytes = 10 ** 6)
+    assert np.array_equal(cache.call(imputetspy.locf, x), expected)
+    assert cache.disk_hits == 1
+    # results that can not be written stay in memory
+    y = series(100, 1)
+    cache.call(imputetspy.locf, y)
+    cache.call(imputetspy.locf, y)
+    assert cache.hits == 1
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+@pytest.mark.parametrize("kwargs", [dict(inplace = True), dict(rng = np.random.default_rng(0))])
+def test_uncacheable_calls(kwargs):
+    cache = ResultCache()
+    x = series(50, 0)
+    fn = imputetspy.na_random if "rng" in kwargs else imputetspy.locf
+    cache.call(fn, x, **kwargs)
+    assert len(cache) == 0
@@ -0,0 +1,104 @@
+""" The imputetspy command: parameters, text blocks and whole runs on a directory. """
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.cli import _format, main, parse_params, read_text, stream_params
+
+
+def walk(n, seed = 0):
+    x = np.cumsum(np.random.default_rng(seed).standard_normal(n))
+    x[np.random.default_rng(seed + 1).random(n) < 0.2] = np.nan
+    return x
+
+
+def test_parse_params():
+    params = parse_params(["k=6", "weighting=linear", "maxgap = None", "option='spline'", "x=1.5"])
+    assert params == {"k": 6, "weighting": "linear", "maxgap": None, "option": "spline", "x": 1.5}
+    assert parse_params(None) == {}
+    with pytest.raises(ValueError) :
+        parse_params(["k"])
+
+
+@pytest.mark.parametrize("method, params, streamed", [
+    ("locf", dict(), dict()),
+    ("na_interpolate", dict(option = "linear", maxgap = 3), dict(maxgap = 3)),
+    ("na_interpolate", dict(option = "spline"), None),
+    ("na_ma", dict(k = 6, func = "mean"), dict(k = 6)),
+    ("na_ma", dict(func = "median"), None),
+    ("locf", dict(na_remaining = "mean"), None),
+    ("locf", dict(unknown = 1), None),
+    ("na_mean", dict(), None),
+], ids = lambda v: v if isinstance(v, str) else None)
+def test_stream_params(method, params, streamed):
+    assert stream_params(method, params) == streamed
+
+
+@pytest.mark.parametrize("block", [1, 2, 3, 5, 8, 1000])
+def test_read_text_blocks(tmp_path, block):
+    path = tmp_path / "values.txt"
+    # values split across blocks, line breaks, missing tokens and no final newline
+    path.write_text("1.25,NA,3\n-4.5,,nan\r\n1e3,70")
+    chunks = list(read_text(path, block = block))
+    assert all(c.shape[0] for c in chunks)
+    assert np.array_equal(np.concatenate(chunks), [1.25, np.nan, 3, -4.5, np.nan, np.nan, 1e3, 70],
+                          equal_nan = True)
+
+
+def test_read_text_delimiter(tmp_path):
+    path = tmp_path / "values.txt"
+    path.write_text("1;2\n;4\n")
+    assert np.array_equal(np.concatenate(list(read_text(path, ";", block = 3))), [1, 2, np.nan, 4],
+                          equal_nan = True)
+
+
+def test_format_reads_back():
+    x = np.array([0.1, 1 / 3, 1e16, -2.5e-8, np.nan, 7.0])
+    assert _format(x, None) == ",".join(x.astype(str))
+    assert np.array_equal(np.array(_format(x, None).split(","), dtype = float), x, equal_nan = True)
+    assert _format(x[:2], "%.2f", ";") == "0.10;0.33"
+
+
+@pytest.mark.parametrize("method, params", [
+    ("na_interpolate", []),
+    ("na_ma", ["-p", "k=6", "-p", "weighting=linear"]),
+    ("na_interpolate", ["-p", "option=spline"]),
+], ids = lambda v: v if isinstance(v, str) else None)
+def test_main_text_files(tmp_path, method, params):
+    series = {}
+    for name in ["a.txt", "sub/b.txt"] :
+        path = tmp_path / "in" / name
+        path.parent.mkdir(parents = True, exist_ok = True)
+        series[name] = walk(500, len(series))
+        path.write_text("\n".join(_format(series[name], None).split(",")))
+    argv = [str(tmp_path / "in" / "**" / "*.txt"), "--out", str(tmp_path / "out"), "-m", method, "--block", "64"]
+    assert main(argv + params) == 0
+    kwargs = parse_params(params[1::2])
+    for name, x in series.items() :
+        got = np.concatenate(list(read_text(tmp_path / "out" / name)))
+        assert np.allclose(got, getattr(imputetspy, method)(x, **kwargs), rtol = 1e-12)
+
+
+def test_main_csv_column(tmp_path):
+    pd = pytest.importorskip("pandas")
+    x = walk(300)
+    frame = pd.DataFrame({"time": np.arange(300), "nh4": x})
+    frame.to_csv(tmp_path / "plant.csv", index = False)
+    assert main([str(tmp_path / "plant.csv"), "-c", "nh4", "-m", "locf", "-o", str(tmp_path / "out"),
+                 "--block", "400"]) == 0
+    got = pd.read_csv(tmp_path / "out" / "plant.csv")
+    assert got["time"].tolist() == list(range(300))
+    assert np.allclose(got["nh4"].to_numpy(), imputetspy.locf(x), rtol = 1e-12)
+
+
+def test_main_failures(tmp_path, capsys):
+    (tmp_path / "bad.txt").write_text("1,x,3")
+    (tmp_path / "good.txt").write_text("1,,3")
+    assert main([str(tmp_path / "*.txt"), "-o", str(tmp_path / "out")]) == 1
+    assert "FAILED" in capsys.readouterr().out
+    assert (tmp_path / "out" / "good.txt").read_text() == "1.0,2.0,3.0"
+    assert not (tmp_path / "out" / "bad.txt").exists()
+    with pytest.raises(SystemExit) :
+        main([str(tmp_path / "none*.txt"), "-o", str(tmp_path / "out")])
+    with pytest.raises(SystemExit) :
+        main([str(tmp_path / "good.txt"), "-o", str(tmp_path)])
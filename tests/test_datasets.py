@@ -0,0 +1,31 @@
+""" Binary cache of the text series behind `imputetspy.datasets.load_series`. """
+import os
+import stat
+
+import numpy as np
+
+import imputetspy
+
+
+def test_load_series_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPUTETSPY_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "series.txt"
+    path.write_text("1.5,nan,2.5,3")
+    first = imputetspy.datasets.load_series(path)
+    again = imputetspy.datasets.load_series(path)
+    assert isinstance(again, np.memmap) and not again.flags.writeable
+    assert np.array_equal(first, [1.5, np.nan, 2.5, 3.0], equal_nan = True)
+    assert np.array_equal(first, again, equal_nan = True)
+    files = os.listdir(tmp_path / "cache")
+    assert len(files) == 1
+    # readable by the other users of a shared cache directory, as the umask allows
+    umask = os.umask(0o022)
+    os.umask(umask)
+    mode = stat.S_IMODE(os.stat(tmp_path / "cache" / files[0]).st_mode)
+    assert mode == 0o666 & ~umask
+
+
+def test_bundled_datasets(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPUTETSPY_CACHE_DIR", str(tmp_path))
+    assert imputetspy.datasets.ts_nh4().shape == (4552,)
+    assert imputetspy.datasets.ts_airgap().shape[0] == 144
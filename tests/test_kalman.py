@@ -0,0 +1,39 @@
+""" na_kalman on small series; the backends are compared in test_backend_parity. """
+import warnings
+
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.kalman import fit_kalman
+
+
+def walk(n, seed = 0):
+    return np.cumsum(np.random.default_rng(seed).standard_normal(n))
+
+
+@pytest.mark.parametrize("model", ["level", "trend"])
+def test_regular_gaps_do_not_warn(model):
+    x = walk(200)
+    x[::2] = np.nan
+    with warnings.catch_warnings() :
+        warnings.simplefilter("error")
+        got = imputetspy.na_kalman(x, model = model)
+    assert not np.isnan(got).any()
+
+
+@pytest.mark.parametrize("model", ["level", "trend"])
+def test_params_and_maxgap(model):
+    x = walk(300, 1)
+    x[50:53] = np.nan
+    x[100:120] = np.nan
+    params = fit_kalman(x, model)
+    got = imputetspy.na_kalman(x, model = model, params = params, maxgap = 5)
+    assert np.array_equal(got, imputetspy.na_kalman(x, model = model, maxgap = 5), equal_nan = True)
+    assert not np.isnan(got[50:53]).any() and np.isnan(got[100:120]).all()
+    assert np.array_equal(got[~np.isnan(x)], x[~np.isnan(x)])
+
+
+def test_too_few_observations():
+    with pytest.raises(ValueError) :
+        imputetspy.na_kalman(np.array([1.0, np.nan, 2.0]), model = "trend")
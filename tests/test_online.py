@@ -0,0 +1,69 @@
+""" Online imputers fed sample by sample must give the batch result of `imputetspy.main`. """
+import numpy as np
+import pytest
+
+import imputetspy
+
+N_CASES = 20
+IMPUTERS = [
+    ("locf", imputetspy.OnlineLOCF, dict(na_remaining = "rev")),
+    ("locf", imputetspy.OnlineLOCF, dict(na_remaining = "keep")),
+    ("nocb", imputetspy.OnlineNOCB, dict(na_remaining = "rev")),
+    ("na_ma", imputetspy.OnlineMA, dict(k = 4, weighting = "exponential")),
+    ("na_interpolate", imputetspy.OnlineInterpolate, dict()),
+]
+
+
+def series(rng, n, rate):
+    x = np.cumsum(rng.standard_normal(n))
+    x[rng.random(n) < rate] = np.nan
+    for s in np.concatenate(([0, n - 5], rng.integers(0, n, 3))) :
+        x[s:s + rng.integers(1, 12)] = np.nan
+    return x
+
+
+def feed(imputer, x):
+    out = [imputer.update(v) for v in x] + [imputer.flush()]
+    return np.concatenate(out)
+
+
+@pytest.mark.parametrize("method, cls, kwargs", IMPUTERS, ids = lambda v: v if isinstance(v, str) else "")
+def test_online_matches_batch(method, cls, kwargs):
+    rng = np.random.default_rng(0)
+    fn = getattr(imputetspy, method)
+    if method == "na_interpolate" :
+        fn = lambda x, **kw: imputetspy.na_interpolate(x, option = "linear", **kw)
+    for _ in range(N_CASES) :
+        x = series(rng, int(rng.integers(2, 200)), rng.uniform(0, 0.5))
+        if np.isnan(x).all() :
+            continue
+        maxgap = [None, int(rng.integers(1, 6))][rng.integers(0, 2)]
+        got = feed(cls(maxgap = maxgap, **kwargs), x)
+        assert np.allclose(got, fn(x, maxgap = maxgap, **kwargs), rtol = 1e-12, atol = 1e-12, equal_nan = True), (method, maxgap, x)
+
+
+def test_lookahead_is_bounded():
+    imputer = imputetspy.OnlineLOCF(maxgap = 3)
+    x = np.array([1.0] + [np.nan] * 10 + [2.0, np.nan, 3.0])
+    lookahead = []
+    for v in x :
+        imputer.update(v)
+        lookahead.append(imputer.pending)
+    assert max(lookahead) <= 4
+    rest = imputer.flush()
+    assert (rest.shape[0] == 0) and (imputer.pending == 0)
+
+
+def test_valid_sample_returned_at_once():
+    imputer = imputetspy.OnlineLOCF()
+    assert imputer.update(1.0).tolist() == [1.0]
+    assert imputer.update(np.nan).tolist() == [1.0]
+    imputer = imputetspy.OnlineNOCB()
+    assert imputer.update(np.nan).shape[0] == 0
+    assert imputer.update(2.0).tolist() == [2.0, 2.0]
+
+
+def test_flush_resets():
+    imputer = imputetspy.OnlineInterpolate()
+    feed(imputer, np.array([1.0, np.nan, 3.0, np.nan]))
+    assert feed(imputer, np.array([5.0, np.nan, 7.0])).tolist() == [5.0, 6.0, 7.0]
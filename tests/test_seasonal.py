@@ -0,0 +1,72 @@
+""" na_seasplit and the column-wise 2-D paths it relies on. """
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.seasonal import season_view
+
+ALGORITHMS = [
+    ("interpolate", dict()),
+    ("interpolate", dict(option = "spline")),
+    ("ma", dict(k = 4)),
+    ("ma", dict(k = 6, weighting = "exponential")),
+    ("ma", dict(k = 2, func = "median")),
+    ("locf", dict()),
+    ("nocb", dict()),
+    ("mean", dict()),
+]
+
+
+def block(rng, n, m, rate):
+    x = np.cumsum(rng.standard_normal((n, m)), axis = 0)
+    x[rng.random((n, m)) < rate] = np.nan
+    return x
+
+
+def by_column(fn, x, **kwargs):
+    return np.column_stack([fn(x[:, j].copy(), **kwargs) for j in range(x.shape[1])])
+
+
+@pytest.mark.parametrize("method, kwargs", [
+    ("na_interpolate", dict()),
+    ("na_ma", dict(k = 2)),
+    ("na_ma", dict(k = 5, weighting = "linear")),
+    ("na_ma", dict(k = 4, weighting = "exponential")),
+    ("na_ma", dict(k = 8, func = "median")),
+], ids = lambda v: v if isinstance(v, str) else None)
+def test_2d_kernels_match_columns(method, kwargs):
+    rng = np.random.default_rng(0)
+    fn = getattr(imputetspy, method)
+    for _ in range(30) :
+        x = block(rng, int(rng.integers(1, 60)), int(rng.integers(1, 6)), rng.uniform(0, 0.9))
+        # every column needs an observation for the 1-D imputers
+        x[0, np.isnan(x).all(axis = 0)] = 1.0
+        maxgap = [None, int(rng.integers(1, 4))][rng.integers(0, 2)]
+        assert np.array_equal(fn(x, maxgap = maxgap, **kwargs), by_column(fn, x, maxgap = maxgap, **kwargs), equal_nan = True)
+
+
+@pytest.mark.parametrize("algorithm, kwargs", ALGORITHMS, ids = lambda v: v if isinstance(v, str) else None)
+def test_seasplit_imputes_each_season(algorithm, kwargs):
+    rng = np.random.default_rng(1)
+    period = 7
+    x = np.sin(np.arange(300) * 2 * np.pi / period) + 0.1 * rng.standard_normal(300)
+    x[rng.random(300) < 0.3] = np.nan
+    got = imputetspy.na_seasplit(x, period, algorithm = algorithm, **kwargs)
+    impute = imputetspy.seasonal.get_algorithm(algorithm)
+    expected = by_column(impute, season_view(x, period), **kwargs).ravel()[:x.shape[0]]
+    assert np.allclose(got, np.where(np.isnan(x), expected, x))
+
+
+def test_seasplit_maxgap():
+    x = np.arange(40, dtype = float)
+    x[10:15] = np.nan
+    x[30] = np.nan
+    got = imputetspy.na_seasplit(x, 4, maxgap = 2)
+    assert np.isnan(got[10:15]).all() and (got[30] == 30.0)
+
+
+def test_seasplit_short_series_warns():
+    x = np.array([1.0, np.nan, 3.0])
+    with pytest.warns(UserWarning) :
+        got = imputetspy.na_seasplit(x, 12)
+    assert got.tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,91 @@
+""" Chunk-wise imputation must give the batch result of `imputetspy.main`, whatever the chunking. """
+import numpy as np
+import pytest
+
+import imputetspy
+from imputetspy.streaming import impute_aligned, impute_chunks
+
+N_CASES = 20
+METHODS = [
+    ("locf", dict(na_remaining = "rev")),
+    ("locf", dict(na_remaining = "keep")),
+    ("nocb", dict(na_remaining = "rev")),
+    ("nocb", dict(na_remaining = "keep")),
+    ("na_ma", dict(k = 2)),
+    ("na_ma", dict(k = 4, weighting = "linear")),
+    ("na_ma", dict(k = 6, weighting = None)),
+    ("na_interpolate", dict()),
+]
+
+
+def series(rng, n, rate):
+    x = np.cumsum(rng.standard_normal(n))
+    x[rng.random(n) < rate] = np.nan
+    # a few longer gaps, at the ends too
+    for s in np.concatenate(([0, n - 5], rng.integers(0, n, 3))) :
+        x[s:s + rng.integers(1, 30)] = np.nan
+    return x
+
+
+def chunked(rng, x):
+    cuts = np.sort(rng.integers(0, x.shape[0] + 1, int(rng.integers(0, 12))))
+    return np.split(x, cuts)
+
+
+def cases(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(N_CASES) :
+        x = series(rng, int(rng.integers(1, 300)), rng.uniform(0, 0.6))
+        yield x, chunked(rng, x), [None, int(rng.integers(1, 6))][rng.integers(0, 2)]
+
+
+def batch(method, x, maxgap, kwargs):
+    if method == "na_interpolate" :
+        kwargs = dict(kwargs, option = "linear")
+    return getattr(imputetspy, method)(x, maxgap = maxgap, **kwargs)
+
+
+def close(a, b):
+    return (a.shape == b.shape) and np.allclose(a, b, rtol = 1e-12, atol = 1e-12, equal_nan = True)
+
+
+@pytest.mark.parametrize("method, kwargs", METHODS, ids = lambda v: v if isinstance(v, str) else None)
+def test_impute_chunks(method, kwargs):
+    for x, chunks, maxgap in cases(0) :
+        if np.isnan(x).all() :
+            continue
+        out = list(impute_chunks(chunks, method, maxgap = maxgap, **kwargs))
+        got = np.concatenate(out) if out else np.empty(0)
+        assert close(got, batch(method, x, maxgap, kwargs)), (method, kwargs, maxgap, x)
+
+
+@pytest.mark.parametrize("method, kwargs", METHODS, ids = lambda v: v if isinstance(v, str) else None)
+def test_impute_aligned(method, kwargs):
+    for x, chunks, maxgap in cases(1) :
+        if np.isnan(x).all() :
+            continue
+        out = list(impute_aligned(chunks, method, maxgap = maxgap, **kwargs))
+        assert [o.shape[0] for o in out] == [len(c) for c in chunks]
+        assert close(np.concatenate(out), batch(method, x, maxgap, kwargs)), (method, kwargs, maxgap, x)
+
+
+def test_long_gap_is_held_as_a_count():
+    stream = imputetspy.streaming.StreamInterpolate(block = 1000)
+    x = np.full(100000, np.nan)
+    x[0] = 0.0
+    out = []
+    for chunk in np.split(x, 100) :
+        out += list(stream.push(chunk))
+    assert (stream.pending == 99999) and (stream.vals.shape[0] == 1)
+    out += list(stream.push(np.array([1.0]))) + list(stream.finish())
+    assert max(o.shape[0] for o in out) <= 1000
+    assert close(np.concatenate(out), np.linspace(0, 1, 100001))
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError) :
+        list(impute_chunks([np.ones(3)], "na_kalman"))
+    with pytest.raises(ValueError) :
+        list(impute_chunks([np.ones(3)], "locf", na_remaining = "mean"))
+    with pytest.raises(ValueError) :
+        list(impute_chunks([np.ones(3)], "na_ma", k = 1))